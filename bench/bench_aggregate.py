@@ -0,0 +1,54 @@
+"""
+Benchmark: one scan per dashboard summary vs the single-scan aggregation engine.
+
+Synthetic entity rows are streamed in chunks, standing in for the MySQL cursor. The
+per-summary mode re-reads every chunk once for each summary, like the separate view
+queries did; the single scan reads each chunk once and aggregates all summaries from it.
+
+Usage (from the repository root):
+    python -m bench.bench_aggregate --rows 2000000
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from scripts.aggregate import DASHBOARD_SUMMARIES, DEFAULT_SCAN_CHUNK_SIZE, SCAN_COLUMNS, aggregate_chunks
+
+
+def synthetic_chunks(rows, chunk_size):
+    """Entity rows as fetched from MySQL, built chunk by chunk."""
+    rng = np.random.default_rng(0)
+    for start in range(0, rows, chunk_size):
+        size = min(chunk_size, rows - start)
+        chunk = pd.DataFrame({column: rng.integers(0, 3, size) for column in SCAN_COLUMNS})
+        chunk["crash_date"] = pd.Timestamp("2012-07-01") + pd.to_timedelta(rng.integers(0, 4500, size), unit="D")
+        chunk["crash_time"] = pd.to_timedelta(rng.integers(0, 86400, size), unit="s")
+        chunk["borough_id"] = rng.integers(1, 6, size)
+        chunk["on_street_name"] = pd.Series(rng.integers(0, 2000, size)).map("STREET {}".format)
+        chunk["contributing_factor_vehicle_1_id"] = rng.integers(1, 60, size)
+        yield chunk[SCAN_COLUMNS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000000, help="Entity rows to aggregate.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_SCAN_CHUNK_SIZE, help="Rows per chunk.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    for table_name in DASHBOARD_SUMMARIES:
+        aggregate_chunks(synthetic_chunks(args.rows, args.chunk_size), [table_name])
+    per_summary_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    aggregate_chunks(synthetic_chunks(args.rows, args.chunk_size))
+    single_scan_seconds = time.perf_counter() - start
+
+    print(f"rows:         {args.rows}")
+    print(f"per summary:  {per_summary_seconds:8.2f}s ({len(DASHBOARD_SUMMARIES)} scans)")
+    print(f"single scan:  {single_scan_seconds:8.2f}s")
+    print(f"speedup:      {per_summary_seconds / single_scan_seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
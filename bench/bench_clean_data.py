@@ -0,0 +1,73 @@
+"""
+Micro-benchmark: the original per-column text cleaning vs the clean_data engine.
+
+The raw sample file is tiled to the requested size with fresh collision_ids, read with
+the schema dtypes, and cleaned by both implementations.
+
+Usage (from the repository root):
+    python -m bench.bench_clean_data --rows 2000000
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from scripts.schema import STAGING_COLUMNS, dtypes_for
+from scripts.transform import TEXT_FIELDS, clean_data
+
+RAW_FILE = "data/input/raw_api_data.csv"
+
+
+def legacy_clean_data(data):
+    """The original transform.py steps: astype(str), strip, regex replace and 'nan' -> None per field."""
+    data = data[STAGING_COLUMNS]
+    data['latitude'] = pd.to_numeric(data['latitude'], errors='coerce')
+    data['longitude'] = pd.to_numeric(data['longitude'], errors='coerce')
+    data.dropna(subset=['latitude', 'longitude', 'crash_date'], inplace=True)
+
+    for field in TEXT_FIELDS:
+        data[field] = data[field].astype(str).str.strip()
+        data[field] = data[field].str.replace(r'\s+', ' ', regex=True)
+        data[field] = data[field].replace('nan', None)
+
+    data.drop_duplicates(subset=['collision_id'], inplace=True)
+    return data
+
+
+def make_raw_frame(rows):
+    """Tile the raw sample to the requested number of rows with unique collision_ids."""
+    sample = pd.read_csv(RAW_FILE, dtype=dtypes_for())
+    repeats = -(-rows // len(sample))
+    data = pd.concat([sample] * repeats, ignore_index=True).iloc[:rows]
+    data['collision_id'] = np.arange(len(data), dtype=np.int64)
+    return data
+
+
+def time_call(func, data):
+    start = time.perf_counter()
+    result = func(data.copy())
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Number of raw rows to clean.")
+    args = parser.parse_args()
+
+    data = make_raw_frame(args.rows)
+    legacy, legacy_seconds = time_call(legacy_clean_data, data)
+    engine, engine_seconds = time_call(clean_data, data)
+
+    # Both implementations must produce the same values
+    for field in TEXT_FIELDS:
+        expected = legacy[field].astype(object).where(legacy[field].notna(), None)
+        actual = engine[field].astype(object).where(engine[field].notna(), None)
+        assert expected.tolist() == actual.tolist(), field
+
+    print(f"rows:       {args.rows:,}")
+    print(f"legacy:     {legacy_seconds:8.3f}s ({args.rows / legacy_seconds:12,.0f} rows/sec)")
+    print(f"clean_data: {engine_seconds:8.3f}s ({args.rows / engine_seconds:12,.0f} rows/sec)")
+    print(f"speedup:    {legacy_seconds / engine_seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: the sequential analysis run vs the concurrent dashboard build.
+
+Every chart gets a synthetic query result of realistic shape (one row per day since
+2012 for the daily trends) and each query waits --latency seconds, standing in for
+MySQL. Both modes render into a temporary folder.
+
+Usage (from the repository root):
+    python -m bench.bench_dashboard --latency 0.5 --workers 4
+"""
+import argparse
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from scripts import analysis
+
+
+def synthetic_results(days):
+    """One fake result per chart query."""
+    rng = np.random.default_rng(0)
+    boroughs = ["BRONX", "BROOKLYN", "MANHATTAN", "QUEENS", "STATEN ISLAND"]
+    dates = pd.date_range("2012-07-01", periods=days, freq="D")
+    monthly = pd.DataFrame({"date": dates, "n": rng.integers(300, 900, days)}).resample("MS", on="date").sum()
+    return {
+        analysis.HIGH_RISK_AREAS_QUERY: pd.DataFrame({
+            "borough": boroughs, "total_collisions": rng.integers(1000, 9000, len(boroughs))}),
+        analysis.COLLISION_SEVERITY_TRENDS_QUERY: pd.DataFrame({
+            "collision_date": dates, "total_injuries": rng.integers(100, 400, days),
+            "total_fatalities": rng.integers(0, 5, days)}),
+        analysis.CONTRIBUTING_FACTORS_QUERY: pd.DataFrame({
+            "contributing_factor": [f"Factor {i}" for i in range(10)],
+            "total_collisions": rng.integers(100, 9000, 10)}),
+        analysis.CYCLIST_PEDESTRIAN_SAFETY_QUERY: pd.DataFrame({
+            "borough": boroughs, "pedestrians_injured": rng.integers(100, 900, 5),
+            "pedestrians_killed": rng.integers(0, 20, 5), "cyclists_injured": rng.integers(100, 900, 5),
+            "cyclists_killed": rng.integers(0, 20, 5)}),
+        analysis.TIME_BASED_PATTERNS_QUERY: pd.DataFrame({
+            "hour_of_day": range(24), "total_collisions": rng.integers(100, 9000, 24)}),
+        analysis.MONTHLY_DASHBOARD_QUERY: pd.DataFrame({
+            "year": monthly.index.year, "month": monthly.index.month, "total_collisions": monthly["n"],
+            "total_injuries": monthly["n"] // 3, "total_fatalities": monthly["n"] // 300}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds each query takes.")
+    parser.add_argument("--days", type=int, default=4500, help="Days in the daily trend results.")
+    parser.add_argument("--workers", type=int, default=analysis.DEFAULT_RENDER_WORKERS, help="Render processes.")
+    args = parser.parse_args()
+
+    results = synthetic_results(args.days)
+
+    def fetch(query):
+        time.sleep(args.latency)
+        return results[query].copy()
+
+    analysis.fetch_data = fetch
+    plt.switch_backend("Agg")
+    with tempfile.TemporaryDirectory() as directory:
+        analysis.output_dir = directory
+
+        start = time.perf_counter()
+        analysis.run_analysis()
+        sequential_seconds = time.perf_counter() - start
+
+        timings = analysis.build_dashboard(workers=args.workers)
+
+    print()
+    analysis.print_timings(timings)
+    dashboard_seconds = timings["total"]["wall_seconds"]
+    print(f"sequential: {sequential_seconds:8.2f}s")
+    print(f"dashboard:  {dashboard_seconds:8.2f}s ({args.workers} render processes)")
+    print(f"speedup:    {sequential_seconds / dashboard_seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark: grid cell computation and the hotspot engine over millions of collisions.
+
+Synthetic crash coordinates are drawn around a few dozen hotspots across the city.
+cell_ids stands for the staging load's per-chunk work; hotspots ranks the cells from
+one cell per collision and from the per-cell totals that CELL_TOTALS_QUERY returns.
+
+Usage (from the repository root):
+    python -m bench.bench_hotspots --rows 5000000
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from scripts.geo import DEFAULT_HOTSPOT_LEVEL, cell_ids, hotspots
+
+
+def synthetic_coordinates(rows):
+    """Half of the crashes around 40 hotspots, the rest uniform over the city."""
+    rng = np.random.default_rng(0)
+    centers = np.column_stack([rng.uniform(40.55, 40.90, 40), rng.uniform(-74.10, -73.75, 40)])
+    clustered = rows // 2
+    picks = centers[rng.integers(0, len(centers), clustered)] + rng.normal(0, 0.002, (clustered, 2))
+    uniform = np.column_stack([rng.uniform(40.50, 40.92, rows - clustered), rng.uniform(-74.25, -73.70, rows - clustered)])
+    points = np.vstack([picks, uniform])
+    return pd.Series(points[:, 0]), pd.Series(points[:, 1])
+
+
+def best_of(repeats, function, *args, **kwargs):
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        seconds.append(time.perf_counter() - start)
+    return result, min(seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000000, help="Collisions.")
+    parser.add_argument("--level", type=int, default=DEFAULT_HOTSPOT_LEVEL, help="Hotspot resolution level.")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs; the best is reported.")
+    args = parser.parse_args()
+
+    latitude, longitude = synthetic_coordinates(args.rows)
+    cells, cell_seconds = best_of(args.repeats, cell_ids, latitude, longitude)
+    top, per_row_seconds = best_of(args.repeats, hotspots, cells, level=args.level, k=10)
+    totals = cells.value_counts()
+    _, per_cell_seconds = best_of(args.repeats, hotspots, totals.index, totals.to_numpy(), level=args.level, k=10)
+
+    print(top.to_string(index=False))
+    print(f"rows:                         {args.rows}")
+    print(f"cell_ids:                     {cell_seconds * 1000:8.1f} ms")
+    print(f"hotspots, one cell per row:   {per_row_seconds * 1000:8.1f} ms")
+    print(f"hotspots, {len(totals):>7} cell totals: {per_cell_seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Micro-benchmark: per-row json.loads location parsing vs the vectorized extractor.
+
+Usage (from the repository root):
+    python -m bench.bench_preprocess_location --rows 1000000
+"""
+import argparse
+import json
+import time
+import numpy as np
+import pandas as pd
+from scripts.load_source import preprocess_location
+
+
+def legacy_preprocess_location(data):
+    """The original implementation: json.loads and a new pd.Series for every row."""
+    def extract_coordinates(location):
+        if pd.isnull(location):
+            return None, None
+        try:
+            location_json = json.loads(location)
+            return location_json.get('latitude'), location_json.get('longitude')
+        except (json.JSONDecodeError, KeyError):
+            return None, None
+
+    data[['latitude', 'longitude']] = data['location'].apply(
+        lambda loc: pd.Series(extract_coordinates(loc))
+    )
+    data.drop(columns=['location'], inplace=True)
+    return data
+
+
+def make_locations(rows, seed=0):
+    """Build a 'location' column of JSON objects with ~10% nulls and ~1% malformed values."""
+    rng = np.random.default_rng(seed)
+    latitudes = rng.uniform(40.49, 40.92, rows).round(6)
+    longitudes = rng.uniform(-74.26, -73.70, rows).round(6)
+    locations = pd.Series([
+        json.dumps({"latitude": f"{lat}", "longitude": f"{lon}",
+                    "human_address": '{"address": "", "city": "", "state": "", "zip": ""}'})
+        for lat, lon in zip(latitudes, longitudes)
+    ], dtype=object)
+    draws = rng.random(rows)
+    locations[draws < 0.10] = None
+    locations[(draws >= 0.10) & (draws < 0.11)] = '{"latitude": "40.7"'
+    return pd.DataFrame({"location": locations})
+
+
+def time_call(func, data):
+    start = time.perf_counter()
+    result = func(data.copy())
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000, help="Number of synthetic locations.")
+    args = parser.parse_args()
+
+    data = make_locations(args.rows)
+    legacy, legacy_seconds = time_call(legacy_preprocess_location, data)
+    vectorized, vectorized_seconds = time_call(preprocess_location, data)
+
+    # Both implementations must agree, including which rows are null
+    for column in ("latitude", "longitude"):
+        expected = pd.to_numeric(legacy[column], errors="coerce")
+        pd.testing.assert_series_equal(expected, vectorized[column], check_names=False)
+
+    print(f"rows:       {args.rows:,}")
+    print(f"legacy:     {legacy_seconds:8.3f}s ({args.rows / legacy_seconds:12,.0f} rows/sec)")
+    print(f"vectorized: {vectorized_seconds:8.3f}s ({args.rows / vectorized_seconds:12,.0f} rows/sec)")
+    print(f"speedup:    {legacy_seconds / vectorized_seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: the spatial index against a full scan for radius queries.
+
+Builds the index over synthetic collisions (the coordinates of bench_hotspots), persists
+and reloads it, and answers "collisions, injuries and fatalities within --radius metres
+since 2020" for a batch of query points, k-nearest and bounding box queries. The full
+scan computes every distance per query point with NumPy, as a spatially unindexed
+query has to; it is timed on a sample of the query points.
+
+Usage (from the repository root):
+    python -m bench.bench_spatial_index --rows 2000000 --queries 5000
+"""
+import os
+import argparse
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from bench.bench_hotspots import synthetic_coordinates
+from scripts.geo import project
+from scripts.spatial_index import build_index, load_index, query_bbox, query_nearest, radius_totals, save_index
+
+
+def synthetic_points(rows):
+    rng = np.random.default_rng(1)
+    latitude, longitude = synthetic_coordinates(rows)
+    return pd.DataFrame({
+        'collision_id': np.arange(1, rows + 1),
+        'crash_date': pd.Timestamp("2012-07-01") + pd.to_timedelta(rng.integers(0, 4500, rows), unit="D"),
+        'latitude': latitude,
+        'longitude': longitude,
+        'number_of_persons_injured': rng.integers(0, 3, rows),
+        'number_of_persons_killed': (rng.random(rows) < 0.002).astype(int),
+    })
+
+
+def full_scan_totals(points, x, y, latitude, longitude, meters, since):
+    """Totals of one query point by computing the distance to every collision."""
+    center_x, center_y, _ = project([latitude], [longitude])
+    near = (np.hypot(x - center_x[0], y - center_y[0]) <= meters) & (points['crash_date'].to_numpy() >= np.datetime64(since))
+    return near.sum(), points['number_of_persons_injured'].to_numpy()[near].sum()
+
+
+def timed(label, timings, function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    timings[label] = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000000, help="Collisions.")
+    parser.add_argument("--queries", type=int, default=5000, help="Query points per batch.")
+    parser.add_argument("--radius", type=float, default=250, help="Search radius in metres.")
+    parser.add_argument("--scan-sample", type=int, default=50, help="Query points timed with the full scan.")
+    args = parser.parse_args()
+
+    points = synthetic_points(args.rows)
+    rng = np.random.default_rng(2)
+    latitude, longitude = rng.uniform(40.55, 40.90, args.queries), rng.uniform(-74.10, -73.75, args.queries)
+
+    timings = {}
+    index = timed("build index", timings, build_index, points)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "collision_points.pkl")
+        timed("save index", timings, save_index, index, path)
+        index = timed("load index", timings, load_index, path)
+
+    totals = timed(f"{args.queries} radius totals", timings, radius_totals, index, latitude, longitude, args.radius,
+                   since="2020-01-01")
+    timed(f"{args.queries} x 10 nearest", timings, query_nearest, index, latitude, longitude, k=10)
+    timed(f"{args.queries} x 10 nearest, fatal only", timings, query_nearest, index, latitude, longitude, k=10,
+          min_killed=1)
+    timed(f"{args.queries} 500 m boxes", timings, query_bbox, index, latitude, longitude, latitude + 0.0045,
+          longitude + 0.006)
+
+    x, y, _ = project(points['latitude'], points['longitude'])
+    sample = min(args.scan_sample, args.queries)
+    start = time.perf_counter()
+    for i in range(sample):
+        collisions, injuries = full_scan_totals(points, x, y, latitude[i], longitude[i], args.radius, "2020-01-01")
+        assert (collisions, injuries) == tuple(totals.iloc[i][['collisions', 'injuries']])
+    scan_seconds = (time.perf_counter() - start) / sample
+
+    print(f"rows: {args.rows}, mean collisions per radius: {totals['collisions'].mean():.1f}")
+    for label, seconds in timings.items():
+        print(f"{label:40} {seconds * 1000:10.1f} ms")
+    print(f"{'full scan, per query point':40} {scan_seconds * 1000:10.1f} ms")
+    print(f"{'full scan, extrapolated to the batch':40} {scan_seconds * args.queries * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: the load stages and the analysis queries end to end on the embedded SQLite backend.
+
+A synthetic staging CSV is loaded into a fresh SQLite database (DB_BACKEND=sqlite),
+transferred to the entities table in batches, and every dashboard query is fetched
+without the query cache, followed by the single-scan aggregation. No MySQL server is
+needed, so this runs on a laptop or in CI.
+
+Usage (from the repository root):
+    python -m bench.bench_sqlite_pipeline --rows 200000
+"""
+import os
+import argparse
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from scripts.schema import STAGING_COLUMNS
+
+
+def write_staging_csv(path, rows):
+    """Staging rows with realistic cardinalities: five boroughs, 2,000 streets, 60 factors."""
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({column: [None] * rows for column in STAGING_COLUMNS})
+    data["collision_id"] = np.arange(1, rows + 1)
+    data["crash_date"] = (pd.Timestamp("2012-07-01") + pd.to_timedelta(rng.integers(0, 4500, rows), unit="D")).strftime("%Y-%m-%dT00:00:00.000")
+    data["crash_time"] = pd.Series(rng.integers(0, 24, rows)).map("{}:30".format)
+    data["borough"] = rng.choice(["BRONX", "BROOKLYN", "MANHATTAN", "QUEENS", "STATEN ISLAND"], rows)
+    data["on_street_name"] = pd.Series(rng.integers(0, 2000, rows)).map("STREET {}".format)
+    for column in STAGING_COLUMNS:
+        if column.startswith("number_of_"):
+            data[column] = rng.integers(0, 3, rows)
+    data["contributing_factor_vehicle_1"] = pd.Series(rng.integers(0, 60, rows)).map("Factor {}".format)
+    data["vehicle_type_code1"] = rng.choice(["Sedan", "Taxi", "Bike", "Bus"], rows)
+    data.to_csv(path, index=False)
+
+
+def timed(label, timings, function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    timings[label] = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000, help="Collisions to load.")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows per entities transfer batch.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DB_BACKEND"] = "sqlite"
+        os.environ["SQLITE_PATH"] = os.path.join(directory, "collisions.sqlite3")
+        os.environ["QUERY_CACHE"] = "off"
+        # Imported after the backend is selected; the stages log to their files in logs/
+        from scripts import analysis, load_entities, migrate, query_cache
+        from scripts.aggregate import aggregate_dashboard
+        from scripts.load_staging import load_data_to_staging
+        query_cache.CACHE_DIR = os.path.join(directory, "cache")
+
+        csv_path = os.path.join(directory, "staging.csv")
+        write_staging_csv(csv_path, args.rows)
+
+        timings = {}
+        timed("migrate", timings, migrate.migrate)
+        timed("load staging", timings, load_data_to_staging, csv_path, "staging_collision_data", chunk_size=50000)
+        timed("transfer entities", timings, load_entities.transfer_data_in_batches, batch_size=args.batch_size)
+        for name, (query, _) in analysis.CHARTS.items():
+            timed(f"fetch {name}", timings, analysis.fetch_data, query)
+        timed("single-scan aggregation", timings, aggregate_dashboard)
+
+    print(f"rows: {args.rows}")
+    for label, seconds in timings.items():
+        print(f"{label:40} {seconds:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark: the monthly trends query against the raw table, the daily totals and the monthly rollup.
+
+Synthetic entity rows are inserted into a fresh SQLite database (DB_BACKEND=sqlite) and
+the summary tables are rebuilt. The monthly chart data is then computed three ways:
+grouping entities_collision_data by YEAR/MONTH (O(rows)), rolling up the daily totals
+(O(days)) and reading the monthly rollup (O(months x boroughs)). The extra cost of the
+weekly and monthly rollups on every transferred batch is measured with summary_deltas.
+
+Usage (from the repository root):
+    python -m bench.bench_trend_rollups --rows 1000000
+"""
+import os
+import argparse
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+RAW_MONTHLY_QUERY = """
+    SELECT YEAR(crash_date) AS year, MONTH(crash_date) AS month, COUNT(*) AS total_collisions,
+        SUM(number_of_persons_injured) AS total_injuries, SUM(number_of_persons_killed) AS total_fatalities
+    FROM entities_collision_data
+    GROUP BY YEAR(crash_date), MONTH(crash_date)
+    ORDER BY year, month
+"""
+
+DAILY_MONTHLY_QUERY = """
+    SELECT YEAR(collision_date) AS year, MONTH(collision_date) AS month, SUM(total_collisions) AS total_collisions,
+        SUM(total_injuries) AS total_injuries, SUM(total_fatalities) AS total_fatalities
+    FROM collision_severity_trends
+    GROUP BY YEAR(collision_date), MONTH(collision_date)
+    ORDER BY year, month
+"""
+
+ENTITY_INSERT_COLUMNS = [
+    'collision_id', 'crash_date', 'crash_time', 'borough_id', 'on_street_name',
+    'number_of_persons_injured', 'number_of_persons_killed', 'number_of_pedestrians_injured',
+    'number_of_pedestrians_killed', 'number_of_cyclist_injured', 'number_of_cyclist_killed',
+    'contributing_factor_vehicle_1_id',
+]
+
+
+def synthetic_entities(rows, first_id=1):
+    """Entity rows over twelve years, five boroughs and 2,000 streets."""
+    rng = np.random.default_rng(first_id)
+    data = pd.DataFrame({
+        'collision_id': np.arange(first_id, first_id + rows),
+        'crash_date': pd.Timestamp("2012-07-01") + pd.to_timedelta(rng.integers(0, 4500, rows), unit="D"),
+        'crash_time': pd.to_timedelta(rng.integers(0, 24 * 60, rows), unit="min"),
+        'borough_id': rng.integers(1, 6, rows),
+        'on_street_name': pd.Series(rng.integers(0, 2000, rows)).map("STREET {}".format),
+        'contributing_factor_vehicle_1_id': rng.integers(1, 60, rows),
+    })
+    for column in ENTITY_INSERT_COLUMNS:
+        if column.startswith("number_of_"):
+            data[column] = rng.integers(0, 3, rows)
+    return data[ENTITY_INSERT_COLUMNS]
+
+
+def best_of(repeats, function, *args):
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*args)
+        seconds.append(time.perf_counter() - start)
+    return result, min(seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000, help="Entity rows.")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows per transferred batch.")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs; the best is reported.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DB_BACKEND"] = "sqlite"
+        os.environ["SQLITE_PATH"] = os.path.join(directory, "collisions.sqlite3")
+        # Imported after the backend is selected
+        from config.db_config import get_db_connection
+        from scripts import analysis, migrate
+        from scripts.bulk_load import dataframe_to_rows
+        from scripts.summaries import SUMMARIES, rebuild_summaries, summary_deltas
+
+        migrate.migrate()
+        connection = get_db_connection()
+        try:
+            cursor = connection.cursor()
+            entities = synthetic_entities(args.rows)
+            cursor.executemany(
+                f"INSERT INTO entities_collision_data ({', '.join(ENTITY_INSERT_COLUMNS)}) "
+                f"VALUES ({', '.join(['%s'] * len(ENTITY_INSERT_COLUMNS))})",
+                dataframe_to_rows(entities, ENTITY_INSERT_COLUMNS)
+            )
+            cursor.close()
+            rebuild_summaries(connection)
+            connection.commit()
+        finally:
+            connection.close()
+
+        timings = {}
+        for label, query in (
+            ("entities GROUP BY YEAR, MONTH", RAW_MONTHLY_QUERY),
+            ("daily totals rolled up per month", DAILY_MONTHLY_QUERY),
+            ("monthly rollup", analysis.MONTHLY_DASHBOARD_QUERY),
+        ):
+            result, timings[label] = best_of(args.repeats, analysis.query_database, query)
+            assert result["total_collisions"].sum() == args.rows
+
+        batch = synthetic_entities(args.batch_size, first_id=args.rows + 1)
+        without_rollups = [name for name in SUMMARIES if name not in ("weekly_trends_summary", "monthly_trends_summary")]
+        _, timings[f"summary deltas of a {args.batch_size}-row batch"] = best_of(args.repeats, summary_deltas, batch)
+        _, timings["  without the weekly and monthly rollups"] = best_of(args.repeats, summary_deltas, batch,
+                                                                         without_rollups)
+
+    print(f"rows: {args.rows}")
+    for label, seconds in timings.items():
+        print(f"{label:45} {seconds * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,174 @@
 import mysql.connector
+from mysql.connector import pooling
 from dotenv import load_dotenv
 import os
+import time
+import threading
 
 # Load environment variables from the .env file
 load_dotenv()
 
-def get_db_connection():
+# Connections kept open per pool (override with DB_POOL_SIZE; mysql.connector allows at most 32)
+DEFAULT_POOL_SIZE = 5
+
+# Seconds to wait for a free connection when the pool is exhausted (override with DB_POOL_TIMEOUT)
+DEFAULT_POOL_TIMEOUT = 30
+
+# Pause between attempts to borrow a connection from an exhausted pool
+_POOL_RETRY_SECONDS = 0.05
+
+# Storage backends selectable with DB_BACKEND: the MySQL server, or an embedded SQLite
+# database (SQLITE_PATH, a file or ':memory:') for running and profiling without a server
+BACKENDS = ("mysql", "sqlite")
+
+# One pool per connection flavour, shared by every stage running in this process
+_pools = {}
+_pools_lock = threading.Lock()
+_engines = {}
+
+
+def get_backend():
+    """
+    Read the storage backend from the environment.
+
+    Returns:
+        str: One of BACKENDS, 'mysql' unless DB_BACKEND says otherwise.
+    """
+    backend = os.getenv('DB_BACKEND', 'mysql').strip().lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown DB_BACKEND '{backend}'. Expected one of {BACKENDS}.")
+    return backend
+
+
+def get_db_settings():
+    """
+    Read the MySQL connection settings from the environment.
+
+    Returns:
+        dict: Keyword arguments for mysql.connector.connect.
+    """
+    return {
+        "host": os.getenv('DB_HOST'),
+        "port": int(os.getenv('DB_PORT', 3306)),  # Default MySQL port is 3306
+        "user": os.getenv('DB_USER'),
+        "password": os.getenv('DB_PASSWORD'),
+        "database": os.getenv('DB_NAME'),
+    }
+
+
+def database_identity():
+    """
+    Name the database the connections of this process reach, without connecting.
+
+    Returns:
+        str: 'sqlite:<absolute path>' or 'mysql:<user>@<host>:<port>/<database>'.
+    """
+    if get_backend() == "sqlite":
+        from config import sqlite_backend
+        path = os.getenv('SQLITE_PATH', sqlite_backend.DEFAULT_SQLITE_PATH)
+        return f"sqlite:{path if path == ':memory:' else os.path.abspath(path)}"
+    settings = get_db_settings()
+    return f"mysql:{settings['user']}@{settings['host']}:{settings['port']}/{settings['database']}"
+
+
+def get_pool_size():
+    """
+    Read the number of connections kept open per pool.
+
+    Returns:
+        int: DB_POOL_SIZE, or DEFAULT_POOL_SIZE when it is not set.
     """
-    Establish a connection to the MySQL database.
+    return int(os.getenv('DB_POOL_SIZE', DEFAULT_POOL_SIZE))
+
+
+def get_connection_pool(allow_local_infile=False):
+    """
+    Return the process-wide connection pool, creating it on first use.
+
+    Connections that may run LOAD DATA LOCAL INFILE come from a separate pool so the
+    capability is only enabled where a loader asks for it.
+
+    Parameters:
+        allow_local_infile (bool): Select the pool whose connections allow LOAD DATA LOCAL INFILE.
 
     Returns:
-        mysql.connector.connection_cext.CMySQLConnection: A connection object to interact with the database.
+        mysql.connector.pooling.MySQLConnectionPool: The shared pool.
+    """
+    with _pools_lock:
+        if allow_local_infile not in _pools:
+            _pools[allow_local_infile] = pooling.MySQLConnectionPool(
+                pool_name="nyc_collision_infile" if allow_local_infile else "nyc_collision",
+                pool_size=get_pool_size(),
+                pool_reset_session=True,
+                allow_local_infile=allow_local_infile,
+                **get_db_settings()
+            )
+        return _pools[allow_local_infile]
+
+
+def get_db_connection(allow_local_infile=False):
+    """
+    Borrow a connection to the MySQL database from the shared pool.
+
+    With DB_BACKEND=sqlite a connection to the embedded SQLite database is returned
+    instead (see config/sqlite_backend.py). It accepts the same MySQL statements, and
+    its errors are raised as mysql.connector errors, so the stages run unchanged.
+
+    Checkout is health-checked: the pool pings the idle connection and reconnects it if
+    the server dropped it. Calling close() on the returned connection hands it back to
+    the pool instead of closing the socket, so later stages in the same process reuse it
+    without paying connect/auth latency. When every connection is in use, the call waits
+    up to DB_POOL_TIMEOUT seconds for one to be returned.
+
+    Parameters:
+        allow_local_infile (bool): Enable LOAD DATA LOCAL INFILE on the connection.
+
+    Returns:
+        mysql.connector.pooling.PooledMySQLConnection: A connection object to interact with the database.
 
     Raises:
-        mysql.connector.Error: If the connection fails.
+        mysql.connector.Error: If the connection fails or the pool stays exhausted.
     """
+    if get_backend() == "sqlite":
+        # Imported here: it registers process-wide sqlite3 adapters the MySQL backend must not get
+        from config import sqlite_backend
+        return sqlite_backend.connect(os.getenv('SQLITE_PATH', sqlite_backend.DEFAULT_SQLITE_PATH))
     try:
-        connection = mysql.connector.connect(
-            host=os.getenv('DB_HOST'),
-            port=int(os.getenv('DB_PORT', 3306)),  # Default MySQL port is 3306
-            user=os.getenv('DB_USER'),
-            password=os.getenv('DB_PASSWORD'),
-            database=os.getenv('DB_NAME')
-        )
-        return connection
+        pool = get_connection_pool(allow_local_infile)
+        deadline = time.monotonic() + float(os.getenv('DB_POOL_TIMEOUT', DEFAULT_POOL_TIMEOUT))
+        while True:
+            try:
+                return pool.get_connection()
+            except mysql.connector.errors.PoolError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(_POOL_RETRY_SECONDS)
     except mysql.connector.Error as err:
         print(f"Error: {err}")
         raise
 
+
+def get_engine():
+    """
+    Return a SQLAlchemy engine whose connections are borrowed from the shared pool.
+
+    SQLAlchemy's own pooling is disabled so the mysql.connector pool stays the single
+    place where connections are kept open.
+
+    Returns:
+        sqlalchemy.engine.Engine: The shared engine.
+    """
+    # Imported here: only the analysis queries need SQLAlchemy, not the load stages
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import NullPool
+
+    backend = get_backend()
+    if backend not in _engines:
+        url = "sqlite://" if backend == "sqlite" else "mysql+mysqlconnector://"
+        _engines[backend] = create_engine(url, creator=get_db_connection, poolclass=NullPool)
+    return _engines[backend]
+
+
 # Example usage
 if __name__ == "__main__":
     # Test the connection
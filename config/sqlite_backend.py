@@ -0,0 +1,320 @@
+import os
+import re
+import decimal
+import sqlite3
+import datetime
+import threading
+import numpy as np
+import pandas as pd
+import mysql.connector
+
+# Database file used when SQLITE_PATH is not set; ':memory:' keeps everything in memory
+DEFAULT_SQLITE_PATH = "./data/nyc_collision.sqlite3"
+
+# Seconds a connection waits for another connection's write lock before failing
+BUSY_TIMEOUT_SECONDS = 30
+
+# Quoted string literals, which the dialect translation leaves untouched
+QUOTED_PATTERN = re.compile(r"""('(?:[^'\\]|''|\\.)*'|"(?:[^"\\]|\\.)*")""")
+
+# MySQL-only DDL with no SQLite equivalent: partitioning and primary key changes.
+# SQLite keeps the original single-column primary key and a single B-tree per table.
+SKIPPED_STATEMENT_PATTERN = re.compile(r"^\s*ALTER\s+TABLE\s+\w+\s+(DROP\s+PRIMARY\s+KEY|PARTITION\s+BY)", re.I)
+
+# Rewrites of MySQL syntax into SQLite syntax, applied in order outside string literals
+TRANSLATIONS = [
+    # An AUTO_INCREMENT key must be declared INTEGER PRIMARY KEY to alias the rowid
+    (re.compile(r"\b\w+(\s+UNSIGNED)?\s+AUTO_INCREMENT\s+PRIMARY\s+KEY\b", re.I), "INTEGER PRIMARY KEY"),
+    (re.compile(r"\s+UNSIGNED\b", re.I), ""),
+    # Text already compares byte for byte (BINARY collation)
+    (re.compile(r"\s+CHARACTER\s+SET\s+\w+(\s+COLLATE\s+\w+)?", re.I), ""),
+    (re.compile(r"\s+ON\s+UPDATE\s+CURRENT_TIMESTAMP\b", re.I), ""),
+    (re.compile(r"\bCREATE\s+INDEX\s+(?!IF\s+NOT\s+EXISTS)", re.I), "CREATE INDEX IF NOT EXISTS "),
+    (re.compile(r"\bINSERT\s+IGNORE\s+INTO\b", re.I), "INSERT OR IGNORE INTO"),
+    (re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b", re.I), "ON CONFLICT DO UPDATE SET"),
+    # Null-safe equality
+    (re.compile(r"\s*<=>\s*"), " IS "),
+    (re.compile(r"%s"), "?"),
+]
+
+# Inside the upsert clause, VALUES(column) names the row that was about to be inserted
+UPSERT_VALUES_PATTERN = re.compile(r"\bVALUES\((\w+)\)", re.I)
+
+CREATE_OR_REPLACE_VIEW_PATTERN = re.compile(r"^\s*CREATE\s+OR\s+REPLACE\s+VIEW\s+(\w+)", re.I)
+
+# The one connection behind ':memory:', shared by every caller in the process
+_memory_connection = None
+_memory_lock = threading.Lock()
+
+
+def _outside_literals(sql, rewrite):
+    """Apply rewrite to the parts of sql that are not string literals."""
+    parts = QUOTED_PATTERN.split(sql)
+    return "".join(part if index % 2 else rewrite(part) for index, part in enumerate(parts))
+
+
+def _translate(part):
+    for pattern, replacement in TRANSLATIONS:
+        part = pattern.sub(replacement, part)
+    if "ON CONFLICT DO UPDATE SET" in part:
+        head, upsert = part.split("ON CONFLICT DO UPDATE SET", 1)
+        part = head + "ON CONFLICT DO UPDATE SET" + UPSERT_VALUES_PATTERN.sub(r"excluded.\1", upsert)
+    return part
+
+
+def translate_statement(statement):
+    """
+    Translate one MySQL statement into SQLite.
+
+    Covers the MySQL syntax used by the migrations and the stages: %s placeholders,
+    INSERT IGNORE, ON DUPLICATE KEY UPDATE, the null-safe <=>, CREATE OR REPLACE VIEW,
+    AUTO_INCREMENT and UNSIGNED columns, character sets and collations. Partitioning and
+    primary key changes are dropped. HOUR(), YEAR(), MONTH(), DAYOFMONTH(), WEEKDAY(),
+    SUBDATE(date, days), TIMESTAMP() and TIME() are registered as functions on every
+    connection (see connect), and DATE() is built into SQLite.
+
+    Parameters:
+        statement (str): A single MySQL statement.
+
+    Returns:
+        list: The SQLite statements to run in its place (none for skipped DDL).
+
+    Raises:
+        mysql.connector.errors.NotSupportedError: For LOAD DATA, which SQLite lacks.
+    """
+    if SKIPPED_STATEMENT_PATTERN.match(statement):
+        return []
+    if re.match(r"^\s*LOAD\s+DATA\b", statement, re.I):
+        raise mysql.connector.errors.NotSupportedError(
+            msg="LOAD DATA LOCAL INFILE needs the MySQL backend; use the 'executemany' strategy with SQLite."
+        )
+
+    statement = _outside_literals(statement, _translate)
+    view = CREATE_OR_REPLACE_VIEW_PATTERN.match(statement)
+    if view:
+        return [
+            f"DROP VIEW IF EXISTS {view.group(1)}",
+            CREATE_OR_REPLACE_VIEW_PATTERN.sub(f"CREATE VIEW {view.group(1)}", statement, count=1),
+        ]
+    return [statement]
+
+
+# SQLite messages of DDL that is already in place -> the MySQL error number for the same
+# case, which migrate.py skips when a migration is rerun
+ALREADY_APPLIED_MESSAGES = {
+    "already exists": 1050,
+    "duplicate column name": 1060,
+}
+
+
+def _database_error(err):
+    """Re-raise a sqlite3 error as the mysql.connector error the stages already handle."""
+    errno = next((number for message, number in ALREADY_APPLIED_MESSAGES.items() if message in str(err)), None)
+    return mysql.connector.errors.DatabaseError(msg=f"SQLite: {err}", errno=errno)
+
+
+class SQLiteCursor(sqlite3.Cursor):
+    """A sqlite3 cursor that accepts the MySQL dialect used by the stages."""
+
+    def execute(self, query, params=()):
+        try:
+            statements = translate_statement(query)
+            for statement in statements[:-1]:
+                super().execute(statement)
+            if statements:
+                super().execute(statements[-1], params or ())
+        except sqlite3.Error as err:
+            raise _database_error(err) from err
+        return self
+
+    def executemany(self, query, rows):
+        try:
+            for statement in translate_statement(query):
+                super().executemany(statement, rows)
+        except sqlite3.Error as err:
+            raise _database_error(err) from err
+        return self
+
+
+class SQLiteConnection(sqlite3.Connection):
+    """
+    A sqlite3 connection that stands in for a pooled mysql.connector connection.
+
+    cursor() accepts mysql.connector's keyword arguments (buffered=..., which SQLite
+    cursors always are), and the shared in-memory connection ignores close() the way
+    a pooled connection is handed back instead of being closed.
+    """
+
+    shared = False
+
+    def cursor(self, factory=SQLiteCursor, **kwargs):
+        return super().cursor(factory)
+
+    def close(self):
+        if not self.shared:
+            super().close()
+
+
+def _hour(value):
+    """HOUR() of a TIME stored as 'HH:MM:SS' (or a DATETIME)."""
+    if value is None:
+        return None
+    text = str(value)
+    return int(text.split(" ")[-1].split(":")[0])
+
+
+def _date_part(start, end):
+    def part(value):
+        return int(str(value)[start:end]) if value is not None else None
+    return part
+
+
+def _date_of(value):
+    return datetime.date.fromisoformat(str(value)[:10])
+
+
+def _weekday(value):
+    """WEEKDAY() of a DATE or DATETIME: 0 for Monday."""
+    return _date_of(value).weekday() if value is not None else None
+
+
+def _subdate(value, days):
+    """SUBDATE(date, days): the date the given number of days earlier."""
+    if value is None or days is None:
+        return None
+    return (_date_of(value) - datetime.timedelta(days=days)).isoformat()
+
+
+def _timestamp(value):
+    """TIMESTAMP() of a DATE or DATETIME stored as text, e.g. '2024-01-01T00:00:00.000' -> '2024-01-01 00:00:00'."""
+    if value is None:
+        return None
+    try:
+        return datetime.datetime.fromisoformat(str(value)).isoformat(" ")
+    except ValueError:
+        return value
+
+
+def _time(value):
+    """TIME() of a TIME (or DATETIME) stored as text, e.g. '9:15' -> '09:15:00'."""
+    if value is None:
+        return None
+    try:
+        return _format_timedelta(_parse_time(str(value).split(" ")[-1]))
+    except ValueError:
+        return value
+
+
+def _format_timedelta(value):
+    seconds = int(pd.Timedelta(value).total_seconds())
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _parse_time(text):
+    hours, minutes, seconds = (text.split(":") + ["0", "0"])[:3]
+    return datetime.timedelta(hours=int(hours), minutes=int(minutes), seconds=float(seconds))
+
+
+def _converter(parse):
+    """Wrap a parser of stored text; values it cannot parse are returned as text, like SQLite stored them."""
+    def convert(value):
+        text = value.decode()
+        try:
+            return parse(text)
+        except ValueError:
+            return text
+    return convert
+
+
+# Whether _register_types ran; guarded by its own lock, as connect() holds _memory_lock
+_types_registered = False
+_types_lock = threading.Lock()
+
+
+def _register_types():
+    """
+    Register the sqlite3 adapters and converters of the backend, once, on first connect.
+
+    They are process-wide in sqlite3, so they are only installed when the SQLite backend
+    is actually used, never merely by importing db_config.
+    """
+    global _types_registered
+    with _types_lock:
+        if _types_registered:
+            return
+        # Python values are stored the way MySQL renders them, and DATETIME, DATE, TIME and
+        # TIMESTAMP columns are read back as the types mysql.connector returns
+        for _type in (datetime.datetime, pd.Timestamp):
+            sqlite3.register_adapter(_type, lambda value: value.isoformat(" "))
+        sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+        sqlite3.register_adapter(datetime.time, lambda value: value.isoformat())
+        sqlite3.register_adapter(datetime.timedelta, _format_timedelta)
+        sqlite3.register_adapter(pd.Timedelta, _format_timedelta)
+        # As text, so no digits are lost; the column's numeric affinity converts it on store
+        sqlite3.register_adapter(decimal.Decimal, str)
+        sqlite3.register_adapter(np.int64, int)
+        sqlite3.register_adapter(np.int32, int)
+        sqlite3.register_adapter(np.float64, float)
+        sqlite3.register_converter("DATETIME", _converter(datetime.datetime.fromisoformat))
+        sqlite3.register_converter("TIMESTAMP", _converter(datetime.datetime.fromisoformat))
+        sqlite3.register_converter("DATE", _converter(lambda text: datetime.date.fromisoformat(text[:10])))
+        sqlite3.register_converter("TIME", _converter(_parse_time))
+        _types_registered = True
+
+
+def _open(database, uri=False):
+    _register_types()
+    connection = sqlite3.connect(
+        database, uri=uri, factory=SQLiteConnection, timeout=BUSY_TIMEOUT_SECONDS,
+        detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False
+    )
+    connection.create_function("HOUR", 1, _hour, deterministic=True)
+    connection.create_function("YEAR", 1, _date_part(0, 4), deterministic=True)
+    connection.create_function("MONTH", 1, _date_part(5, 7), deterministic=True)
+    connection.create_function("DAYOFMONTH", 1, _date_part(8, 10), deterministic=True)
+    connection.create_function("WEEKDAY", 1, _weekday, deterministic=True)
+    connection.create_function("SUBDATE", 2, _subdate, deterministic=True)
+    # Override the built-in time(): values are compared the way MySQL compares TIME columns
+    connection.create_function("TIMESTAMP", 1, _timestamp, deterministic=True)
+    connection.create_function("TIME", 1, _time, deterministic=True)
+    return connection
+
+
+def connect(path=DEFAULT_SQLITE_PATH):
+    """
+    Open a connection to the embedded SQLite database.
+
+    A file database gets a new connection per call, in WAL mode so readers do not block
+    the writer. ':memory:' returns the one in-memory database of the process, whose
+    close() is a no-op, so every stage sees the same data.
+
+    Parameters:
+        path (str): The database file, or ':memory:'.
+
+    Returns:
+        SQLiteConnection: A connection accepting the MySQL dialect of the stages.
+    """
+    global _memory_connection
+    if path == ":memory:":
+        with _memory_lock:
+            if _memory_connection is None:
+                _memory_connection = _open(":memory:")
+                _memory_connection.shared = True
+            return _memory_connection
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = _open(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    return connection
+
+
+def reset_memory_database():
+    """Discard the in-memory database, e.g. between tests."""
+    global _memory_connection
+    with _memory_lock:
+        if _memory_connection is not None:
+            _memory_connection.shared = False
+            _memory_connection.close()
+            _memory_connection = None
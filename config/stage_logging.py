@@ -0,0 +1,20 @@
+import os
+import logging
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+
+def configure_stage_logging(log_file):
+    """
+    Send the INFO and higher records of a run to a stage's log file.
+
+    Only the command-line entry points call this (each stage's __main__ block, their
+    main() functions and scripts/cli.py), never an import: a program importing a stage
+    keeps its own logging setup. Like logging.basicConfig, it does nothing once the
+    root logger has handlers, so the first stage of a run picks the file.
+
+    Parameters:
+        log_file (str): The log file, e.g. 'logs/source_pipeline.log'.
+    """
+    os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+    logging.basicConfig(filename=log_file, level=logging.INFO, format=LOG_FORMAT)
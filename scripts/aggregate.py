@@ -0,0 +1,193 @@
+import logging
+import pandas as pd
+from config.db_config import get_db_connection
+from scripts.dimensions import load_dictionaries
+from scripts.summaries import SUMMARIES, summary_deltas
+
+logger = logging.getLogger("AGGREGATE")
+
+# Entity rows fetched per round trip of the scan
+DEFAULT_SCAN_CHUNK_SIZE = 100000
+
+# Summary tables the dashboard charts are derived from
+DASHBOARD_SUMMARIES = [
+    'high_risk_areas_summary',
+    'collision_severity_summary',
+    'contributing_factors_summary',
+    'cyclist_pedestrian_summary',
+    'time_patterns_summary',
+]
+
+# The entity columns read by the scan: every key and counter behind the dashboard summaries
+SCAN_COLUMNS = [
+    'crash_date',
+    'crash_time',
+    'borough_id',
+    'on_street_name',
+    'number_of_persons_injured',
+    'number_of_persons_killed',
+    'number_of_pedestrians_injured',
+    'number_of_pedestrians_killed',
+    'number_of_cyclist_injured',
+    'number_of_cyclist_killed',
+    'contributing_factor_vehicle_1_id',
+]
+
+SCAN_QUERY = f"SELECT {', '.join(SCAN_COLUMNS)} FROM entities_collision_data"
+
+# Thresholds of the high_risk_areas and cyclist_pedestrian_safety views
+HOTSPOT_MIN_COLLISIONS = 10
+SAFETY_MIN_INJURED = 5
+
+
+def scan_entities(connection, chunk_size=DEFAULT_SCAN_CHUNK_SIZE):
+    """
+    Read entities_collision_data once, as a stream of DataFrame chunks.
+
+    Parameters:
+        connection (mysql.connector.connection.MySQLConnection): An open database connection.
+        chunk_size (int): The number of rows fetched per round trip.
+
+    Yields:
+        pd.DataFrame: Up to chunk_size entity rows with the SCAN_COLUMNS.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute(SCAN_QUERY)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield pd.DataFrame.from_records(rows, columns=SCAN_COLUMNS)
+    finally:
+        cursor.close()
+
+
+def aggregate_chunks(chunks, tables=DASHBOARD_SUMMARIES):
+    """
+    Fold a stream of entity rows into summary totals.
+
+    Each chunk is aggregated into every summary at once, and its deltas are added to the
+    running totals before the next chunk is read, so memory holds one chunk plus the
+    groups seen so far.
+
+    Parameters:
+        chunks (iterable): DataFrames of entity rows, as from scan_entities.
+        tables (list): The summary tables to compute (see SUMMARIES).
+
+    Returns:
+        dict: Summary table name to a DataFrame of its key and measure columns.
+    """
+    totals = {}
+    rows = 0
+    for chunk in chunks:
+        rows += len(chunk)
+        for table_name, delta in summary_deltas(chunk, tables).items():
+            if table_name in totals:
+                keys = SUMMARIES[table_name]['keys']
+                delta = pd.concat([totals[table_name], delta]).groupby(keys, sort=False).sum().reset_index()
+            totals[table_name] = delta
+    logger.info(f"Aggregated {rows} entity rows into {len(tables)} summaries in one scan.")
+    # An empty table still yields empty frames with the summary columns
+    for table_name in tables:
+        if table_name not in totals:
+            spec = SUMMARIES[table_name]
+            totals[table_name] = pd.DataFrame(columns=spec['keys'] + list(spec['measures']))
+    return totals
+
+
+def decode(keys, dictionary):
+    """
+    Translate surrogate keys back into dimension values.
+
+    Parameters:
+        keys (pd.Series): Keys of the dimension; 0 stands for a missing value.
+        dictionary (pd.Series): The value -> key mapping, as from load_dictionaries.
+
+    Returns:
+        pd.Series: The values, None where the key is 0 or unknown.
+    """
+    values = pd.Series(dictionary.index, index=dictionary.to_numpy())
+    return keys.map(values).astype(object).where(lambda decoded: decoded.notna(), None)
+
+
+def dashboard_frames(totals, dictionaries):
+    """
+    Shape summary totals into the results of the dashboard chart queries.
+
+    Parameters:
+        totals (dict): Summary table name to its totals, as from aggregate_chunks.
+        dictionaries (dict): Dimension table name to its dictionary, as from load_dictionaries.
+
+    Returns:
+        dict: Chart name (see analysis.CHARTS) to the DataFrame its render function expects.
+    """
+    frames = {}
+
+    # High-risk areas: streets over the hotspot threshold, summed per borough
+    areas = totals['high_risk_areas_summary']
+    areas = areas[areas['total_collisions'] > HOTSPOT_MIN_COLLISIONS]
+    frames['high_risk_areas'] = (
+        pd.DataFrame({'borough': decode(areas['borough_id'], dictionaries['dim_borough']),
+                      'total_collisions': areas['total_collisions']})
+        .groupby('borough', dropna=False, sort=True).sum().reset_index()
+    )
+
+    # Collision severity: one row per day
+    daily = totals['collision_severity_summary'].sort_values('collision_date').reset_index(drop=True)
+    frames['collision_severity_trends'] = daily[['collision_date', 'total_injuries', 'total_fatalities']]
+
+    # Contributing factors: the ten most frequent
+    factors = totals['contributing_factors_summary'].nlargest(10, 'total_collisions')
+    frames['contributing_factors'] = pd.DataFrame({
+        'contributing_factor': decode(factors['contributing_factor_id'], dictionaries['dim_contributing_factor']),
+        'total_collisions': factors['total_collisions'],
+    }).reset_index(drop=True)
+
+    # Cyclist and pedestrian safety: boroughs over the safety threshold
+    safety = totals['cyclist_pedestrian_summary']
+    safety = safety[safety['pedestrians_injured'] + safety['cyclists_injured'] > SAFETY_MIN_INJURED]
+    safety = safety.sort_values(['pedestrians_injured', 'cyclists_injured'], ascending=False)
+    frames['cyclist_pedestrian_safety'] = pd.DataFrame({
+        'borough': decode(safety['borough_id'], dictionaries['dim_borough']),
+        'pedestrians_injured': safety['pedestrians_injured'],
+        'pedestrians_killed': safety['pedestrians_killed'],
+        'cyclists_injured': safety['cyclists_injured'],
+        'cyclists_killed': safety['cyclists_killed'],
+    }).reset_index(drop=True)
+
+    # Time-based patterns: busiest hours first
+    hours = totals['time_patterns_summary'].sort_values('total_collisions', ascending=False)
+    frames['time_based_patterns'] = hours[['hour_of_day', 'total_collisions']].astype('int64').reset_index(drop=True)
+
+    # Monthly trends: rolled up from the daily totals
+    dates = pd.to_datetime(daily['collision_date'])
+    monthly = (
+        daily[['total_collisions', 'total_injuries', 'total_fatalities']]
+        .groupby([dates.dt.year.rename('year'), dates.dt.month.rename('month')]).sum()
+    )
+    frames['monthly_dashboard'] = monthly.reset_index()
+    return frames
+
+
+def aggregate_dashboard(connection=None, chunk_size=DEFAULT_SCAN_CHUNK_SIZE):
+    """
+    Compute the data of every dashboard chart in a single scan of the entities table.
+
+    Parameters:
+        connection (mysql.connector.connection.MySQLConnection): An open database connection.
+            A new one is opened (and closed) when omitted.
+        chunk_size (int): The number of rows fetched per round trip.
+
+    Returns:
+        dict: Chart name to its DataFrame (see dashboard_frames).
+    """
+    own_connection = connection is None
+    connection = connection or get_db_connection()
+    try:
+        dictionaries = load_dictionaries(connection)
+        totals = aggregate_chunks(scan_entities(connection, chunk_size))
+    finally:
+        if own_connection:
+            connection.close()
+    return dashboard_frames(totals, dictionaries)
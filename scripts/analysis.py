@@ -1,62 +1,87 @@
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-from sqlalchemy import create_engine
-from dotenv import load_dotenv
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from config.db_config import get_engine
+from scripts.query_cache import cache_enabled, cached_query
+from scripts.aggregate import aggregate_dashboard
+import argparse
+import time
 import os
 
-# Load environment variables
-load_dotenv()
+# Ensure output directory exists
+output_dir = "./data/output"
+os.makedirs(output_dir, exist_ok=True)
 
-# Database connection details from .env file
-DB_HOST = "localhost"
-DB_PORT = "3306"
-DB_NAME = "nyc_collision"
-DB_USER = "root"
-DB_PASSWORD = "p!55word"
+def _plotting():
+    """
+    Import matplotlib and seaborn on first use.
 
-# Verify DB connection
-print(f"Connecting to MySQL server at {DB_HOST}:{DB_PORT} with user {DB_USER}")
+    They take about a second to import, which fetching data, the dashboard queries and
+    the command line do not need to pay.
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-)
+    Returns:
+        tuple: The matplotlib.pyplot and seaborn modules.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
 
-# Ensure output directory exists
-output_dir = "/Users/mac/Documents/MentorCruise/Projects/etl_nyc_collision/data/output"
-os.makedirs(output_dir, exist_ok=True)
 
-def fetch_data(query):
+def query_database(query):
+    """
+    Run a SQL query against the database.
+
+    Parameters:
+        query (str): The SQL query to execute.
+
+    Returns:
+        pd.DataFrame: DataFrame containing the query results.
+    """
+    # Connections are borrowed from the pool shared with the load stages
+    with get_engine().connect() as connection:
+        return pd.read_sql(query, connection)
+
+
+def fetch_data(query, use_cache=True):
     """
     Fetch data from the database using a SQL query.
 
+    Results are served from the on-disk query cache (see scripts/query_cache.py) until
+    a load stage commits new data, so rebuilding the dashboard without a new load does
+    not touch the database. Set QUERY_CACHE=off to always query the database.
+
     Parameters:
         query (str): The SQL query to execute.
+        use_cache (bool): Allow a cached result to be returned.
 
     Returns:
         pd.DataFrame: DataFrame containing the query results.
     """
     try:
-        with engine.connect() as connection:
-            return pd.read_sql(query, connection)
+        if use_cache and cache_enabled():
+            return cached_query(query, query_database)
+        return query_database(query)
     except Exception as e:
         print(f"Error fetching data: {e}")
         raise
 
 # 1. High-Risk Areas Visualization
-def visualize_high_risk_areas():
+HIGH_RISK_AREAS_QUERY = "SELECT borough, SUM(total_collisions) AS total_collisions FROM high_risk_areas GROUP BY borough;"
+
+
+def render_high_risk_areas(data):
     """
     Visualize the top 10 high-risk areas for collisions by borough.
 
     Insight:
         This visualization highlights streets with the highest collision counts,
         enabling targeted safety measures like adding traffic lights or reducing speed limits.
+
+    Parameters:
+        data (pd.DataFrame): The result of HIGH_RISK_AREAS_QUERY.
     """
-    query = "SELECT borough, SUM(total_collisions) AS total_collisions FROM high_risk_areas GROUP BY borough;"
-    
+    plt, sns = _plotting()
     try:
-        data = fetch_data(query)
         if data.empty:
             print("No data available for collisions by borough.")
             return
@@ -75,19 +100,28 @@ def visualize_high_risk_areas():
         print(f"Error visualizing collisions by borough: {e}")
         raise
 
+
+def visualize_high_risk_areas():
+    """Fetch and render the high-risk areas chart."""
+    render_high_risk_areas(fetch_data(HIGH_RISK_AREAS_QUERY))
+
 # 2. Collision Severity Trends
-def visualize_collision_severity_trends():
+COLLISION_SEVERITY_TRENDS_QUERY = "SELECT collision_date, total_injuries, total_fatalities FROM collision_severity_trends;"
+
+
+def render_collision_severity_trends(data):
     """
     Visualize the trends in injuries and fatalities over time.
 
     Insight:
         Observing an upward trend in fatalities may indicate a need for immediate intervention,
         while a downward trend could highlight the effectiveness of safety campaigns.
-    """
-    query = "SELECT collision_date, total_injuries, total_fatalities FROM collision_severity_trends;"
 
+    Parameters:
+        data (pd.DataFrame): The result of COLLISION_SEVERITY_TRENDS_QUERY.
+    """
+    plt, sns = _plotting()
     try:
-        data = fetch_data(query)
         if data.empty:
             print("No data available for collision severity trends.")
             return
@@ -109,19 +143,28 @@ def visualize_collision_severity_trends():
         print(f"Error visualizing collision severity trends: {e}")
         raise
 
+
+def visualize_collision_severity_trends():
+    """Fetch and render the collision severity trends chart."""
+    render_collision_severity_trends(fetch_data(COLLISION_SEVERITY_TRENDS_QUERY))
+
 # 3. Contributing Factors Analysis
-def visualize_contributing_factors():
+CONTRIBUTING_FACTORS_QUERY = "SELECT contributing_factor, total_collisions FROM contributing_factors_analysis LIMIT 10;"
+
+
+def render_contributing_factors(data):
     """
     Visualize the top contributing factors to collisions.
 
     Insight:
         Identifying common factors like speeding or distracted driving allows for
         targeted public awareness campaigns and law enforcement actions.
-    """
-    query = "SELECT contributing_factor, total_collisions FROM contributing_factors_analysis LIMIT 10;"
 
+    Parameters:
+        data (pd.DataFrame): The result of CONTRIBUTING_FACTORS_QUERY.
+    """
+    plt, sns = _plotting()
     try:
-        data = fetch_data(query)
         if data.empty:
             print("No data available for contributing factors analysis.")
             return
@@ -140,21 +183,31 @@ def visualize_contributing_factors():
         print(f"Error visualizing contributing factors: {e}")
         raise
 
+
+def visualize_contributing_factors():
+    """Fetch and render the contributing factors chart."""
+    render_contributing_factors(fetch_data(CONTRIBUTING_FACTORS_QUERY))
+
 # 4. Cyclist and Pedestrian Safety Concerns
-def visualize_cyclist_pedestrian_safety():
+CYCLIST_PEDESTRIAN_SAFETY_QUERY = """
+    SELECT borough, pedestrians_injured, pedestrians_killed, cyclists_injured, cyclists_killed
+    FROM cyclist_pedestrian_safety;
+"""
+
+
+def render_cyclist_pedestrian_safety(data):
     """
     Visualize pedestrian and cyclist injuries and fatalities by borough.
 
     Insight:
         Boroughs with high pedestrian or cyclist incidents can prioritize the development
         of bike lanes, crosswalks, and traffic calming measures.
+
+    Parameters:
+        data (pd.DataFrame): The result of CYCLIST_PEDESTRIAN_SAFETY_QUERY.
     """
-    query = """
-        SELECT borough, pedestrians_injured, pedestrians_killed, cyclists_injured, cyclists_killed
-        FROM cyclist_pedestrian_safety;
-    """
+    plt, sns = _plotting()
     try:
-        data = fetch_data(query)
         if data.empty:
             print("No data available for cyclist pedestrian safety.")
             return
@@ -175,19 +228,28 @@ def visualize_cyclist_pedestrian_safety():
         print(f"Error cyclist pedestrian safety: {e}")
         raise
 
+
+def visualize_cyclist_pedestrian_safety():
+    """Fetch and render the cyclist and pedestrian safety chart."""
+    render_cyclist_pedestrian_safety(fetch_data(CYCLIST_PEDESTRIAN_SAFETY_QUERY))
+
 # 5. Time-Based Collision Patterns
-def visualize_time_based_patterns():
+TIME_BASED_PATTERNS_QUERY = "SELECT hour_of_day, total_collisions FROM time_based_collision_patterns;"
+
+
+def render_time_based_patterns(data):
     """
     Visualize the distribution of collisions by hour of the day.
 
     Insight:
         High collision counts during specific hours (e.g., rush hours) can guide
         adjustments in traffic flow management or law enforcement deployment.
-    """
-    query = "SELECT hour_of_day, total_collisions FROM time_based_collision_patterns;"
 
+    Parameters:
+        data (pd.DataFrame): The result of TIME_BASED_PATTERNS_QUERY.
+    """
+    plt, sns = _plotting()
     try:
-        data = fetch_data(query)
         if data.empty:
             print("No data available for time based collision patterns.")
             return
@@ -206,28 +268,38 @@ def visualize_time_based_patterns():
         print(f"Error time based collision patterns: {e}")
         raise
 
+
+def visualize_time_based_patterns():
+    """Fetch and render the time-based collision patterns chart."""
+    render_time_based_patterns(fetch_data(TIME_BASED_PATTERNS_QUERY))
+
 # 6. Monthly Trends
-def visualize_monthly_dashboard():
+# Read from the monthly rollup: one row per borough and month, summed over the boroughs
+MONTHLY_DASHBOARD_QUERY = """
+    SELECT 
+        YEAR(month_start) AS year, 
+        MONTH(month_start) AS month, 
+        SUM(total_collisions) AS total_collisions, 
+        SUM(total_injuries) AS total_injuries, 
+        SUM(total_fatalities) AS total_fatalities
+    FROM monthly_trends_summary
+    GROUP BY month_start
+    ORDER BY month_start;
+"""
+
+
+def render_monthly_dashboard(data):
     """
     Visualize monthly trends in collisions, injuries, and fatalities.
 
     Insight:
         This dashboard helps identify seasonal trends or months with unusually high incident rates.
+
+    Parameters:
+        data (pd.DataFrame): The result of MONTHLY_DASHBOARD_QUERY.
     """
-    query = """
-        SELECT 
-            YEAR(crash_date) AS year, 
-            MONTH(crash_date) AS month, 
-            COUNT(*) AS total_collisions, 
-            SUM(number_of_persons_injured) AS total_injuries, 
-            SUM(number_of_persons_killed) AS total_fatalities
-        FROM collision_data
-        GROUP BY YEAR(crash_date), MONTH(crash_date)
-        ORDER BY year, month;
-    """
-    
+    plt, sns = _plotting()
     try:
-        data = fetch_data(query)
         if data.empty:
             print("No data available for monthly trends.")
             return
@@ -245,27 +317,196 @@ def visualize_monthly_dashboard():
         plt.legend(title="Metric")
         plt.xticks(rotation=45)
         plt.tight_layout()
-        
+        plt.savefig(f"{output_dir}/monthly_trends.png")
+        plt.close()
+
         print(f"Visualization saved: {output_dir}/monthly trends.png")
     except Exception as e:
         print(f"Error monthly trends: {e}")
         raise
-    
-    except Exception as e:
-        print(f"Error visualizing monthly collision trends: {e}")
-        raise
 
 
+def visualize_monthly_dashboard():
+    """Fetch and render the monthly trends chart."""
+    render_monthly_dashboard(fetch_data(MONTHLY_DASHBOARD_QUERY))
+
+
+# Charts of the dashboard build: name -> (query, render function)
+CHARTS = {
+    "high_risk_areas": (HIGH_RISK_AREAS_QUERY, render_high_risk_areas),
+    "collision_severity_trends": (COLLISION_SEVERITY_TRENDS_QUERY, render_collision_severity_trends),
+    "contributing_factors": (CONTRIBUTING_FACTORS_QUERY, render_contributing_factors),
+    "cyclist_pedestrian_safety": (CYCLIST_PEDESTRIAN_SAFETY_QUERY, render_cyclist_pedestrian_safety),
+    "time_based_patterns": (TIME_BASED_PATTERNS_QUERY, render_time_based_patterns),
+    "monthly_dashboard": (MONTHLY_DASHBOARD_QUERY, render_monthly_dashboard),
+}
+
+# Render processes used by build_dashboard
+DEFAULT_RENDER_WORKERS = min(len(CHARTS), os.cpu_count() or 1)
+
+
+def run_analysis():
+    """
+    Render every visualization. Errors are raised to the caller.
+    """
+    visualize_high_risk_areas()
+    visualize_collision_severity_trends()
+    visualize_contributing_factors()
+    visualize_cyclist_pedestrian_safety()
+    visualize_time_based_patterns()
+    visualize_monthly_dashboard()
+    # Add calls to other visualization functions here
+
+
+def _init_render_worker(directory):
+    """Set up a render process: draw off-screen with Agg and save into the caller's output folder."""
+    global output_dir
+    plt, _ = _plotting()
+    plt.switch_backend("Agg")
+    output_dir = directory
+
+
+def _warm_up():
+    """No-op task used to start the render processes while the queries run."""
+
+
+def _render_chart(name, data):
+    """Render one chart in a worker process and return the seconds it took."""
+    start = time.perf_counter()
+    CHARTS[name][1](data)
+    return time.perf_counter() - start
+
+
+def _timed_fetch(query):
+    """Fetch a query result and return it with the seconds it took."""
+    start = time.perf_counter()
+    data = fetch_data(query)
+    return data, time.perf_counter() - start
+
+
+def _timed_scan():
+    """Compute every chart's data in one scan of the entities table and return it with the seconds it took."""
+    start = time.perf_counter()
+    frames = aggregate_dashboard()
+    return frames, time.perf_counter() - start
+
+
+def build_dashboard(charts=None, workers=DEFAULT_RENDER_WORKERS, single_scan=False):
+    """
+    Build the dashboard charts concurrently.
+
+    Every chart's query is fetched at once on a thread pool (the work is waiting on
+    MySQL or reading the query cache). As each result arrives it is handed to a process
+    pool that renders it with the non-interactive Agg backend, so matplotlib's CPU-bound
+    drawing runs on several cores and overlaps with the remaining fetches. The total wall
+    time is then close to that of the slowest chart rather than the sum of all of them.
+
+    With single_scan the chart queries are replaced by one pass over
+    entities_collision_data that computes every chart's data at once (see
+    scripts/aggregate.py); each chart then reports the time of that shared scan.
+
+    Parameters:
+        charts (list): The chart names to build (see CHARTS). All of them when omitted.
+        workers (int): The number of render processes.
+        single_scan (bool): Compute the data with one scan instead of one query per chart.
+
+    Returns:
+        dict: Chart name to its 'fetch_seconds', 'render_seconds' and 'error' (None on
+            success), plus 'wall_seconds' for the whole build under the key 'total'.
+    """
+    names = list(charts or CHARTS)
+    unknown = [name for name in names if name not in CHARTS]
+    if unknown:
+        raise ValueError(f"Unknown charts {unknown}. Expected some of {list(CHARTS)}.")
+
+    timings = {name: {"fetch_seconds": None, "render_seconds": None, "error": None} for name in names}
+    start = time.perf_counter()
+    # Spawned render processes behave the same on every platform and do not inherit the fetch threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_render_worker,
+                             initargs=(output_dir,)) as renderers, \
+            ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="fetch") as fetchers:
+        # Start the render processes while the queries are in flight
+        for _ in range(workers):
+            renderers.submit(_warm_up)
+
+        renders = {}
+        if single_scan:
+            try:
+                frames, scan_seconds = fetchers.submit(_timed_scan).result()
+            except Exception as e:
+                frames, scan_seconds = {}, None
+                for name in names:
+                    timings[name]["error"] = f"fetch failed: {e}"
+            for name in names:
+                if name in frames:
+                    timings[name]["fetch_seconds"] = scan_seconds
+                    renders[renderers.submit(_render_chart, name, frames[name])] = name
+        else:
+            fetches = {fetchers.submit(_timed_fetch, CHARTS[name][0]): name for name in names}
+            for future in as_completed(fetches):
+                name = fetches[future]
+                try:
+                    data, timings[name]["fetch_seconds"] = future.result()
+                except Exception as e:
+                    timings[name]["error"] = f"fetch failed: {e}"
+                    continue
+                renders[renderers.submit(_render_chart, name, data)] = name
+
+        for future in as_completed(renders):
+            name = renders[future]
+            try:
+                timings[name]["render_seconds"] = future.result()
+            except Exception as e:
+                timings[name]["error"] = f"render failed: {e}"
+
+    timings["total"] = {"wall_seconds": time.perf_counter() - start}
+    return timings
+
+
+def print_timings(timings):
+    """
+    Print the per-chart timing summary of a dashboard build.
+
+    Parameters:
+        timings (dict): The result of build_dashboard.
+    """
+    def seconds(value):
+        return f"{value:8.2f}" if value is not None else f"{'-':>8}"
+
+    print(f"{'chart':28} {'fetch s':>8} {'render s':>8}  status")
+    for name, timing in timings.items():
+        if name != "total":
+            print(f"{name:28} {seconds(timing['fetch_seconds'])} {seconds(timing['render_seconds'])}  "
+                  f"{timing['error'] or 'ok'}")
+    charts = [timing for name, timing in timings.items() if name != "total"]
+    serial = sum((timing["fetch_seconds"] or 0) + (timing["render_seconds"] or 0) for timing in charts)
+    print(f"Dashboard built in {timings['total']['wall_seconds']:.2f}s wall time "
+          f"({serial:.2f}s of fetching and rendering).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the collision analysis charts.")
+    parser.add_argument("--dashboard", action="store_true",
+                        help="Fetch all charts concurrently and render them in parallel processes.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_RENDER_WORKERS, help="Render processes.")
+    parser.add_argument("--single-scan", action="store_true",
+                        help="In dashboard mode, compute every chart's data in one pass over the entities table.")
+    parser.add_argument("charts", nargs="*", help=f"Charts to build in dashboard mode. Any of {list(CHARTS)}.")
+    args = parser.parse_args()
+
+    if args.dashboard:
+        timings = build_dashboard(args.charts or None, args.workers, args.single_scan)
+        print_timings(timings)
+        if any(timing.get("error") for timing in timings.values()):
+            raise SystemExit(1)
+    else:
+        run_analysis()
+
 
 if __name__ == "__main__":
     try:
-        visualize_high_risk_areas()
-        visualize_collision_severity_trends()
-        visualize_contributing_factors()
-        visualize_cyclist_pedestrian_safety()
-        visualize_time_based_patterns()
-        visualize_monthly_dashboard()
-        # Add calls to other visualization functions here
+        main()
     except Exception as e:
         print(f"Error in main execution: {e}")
 
@@ -0,0 +1,191 @@
+import os
+import time
+import logging
+import tempfile
+import pandas as pd
+
+logger = logging.getLogger("BULK_LOAD")
+
+# Supported load strategies:
+# - executemany: batched multi-row INSERT statements sent through the cursor
+# - load_data:   each batch is staged to a temp file and sent with LOAD DATA LOCAL INFILE
+STRATEGIES = ("executemany", "load_data")
+
+# Number of rows sent to the server per round trip
+DEFAULT_BATCH_SIZE = 5000
+
+
+def build_insert_query(table_name, columns, upsert=False):
+    """
+    Build a parameterized INSERT statement for the given columns.
+
+    Parameters:
+        table_name (str): The name of the database table to insert data into.
+        columns (list): The ordered list of columns to insert.
+        upsert (bool): Overwrite rows whose primary key already exists.
+
+    Returns:
+        str: The INSERT statement with one placeholder per column.
+    """
+    query = (
+        f"INSERT INTO {table_name} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))})"
+    )
+    if upsert:
+        query += " ON DUPLICATE KEY UPDATE " + ", ".join(f"{column} = VALUES({column})" for column in columns)
+    return query
+
+
+def dataframe_to_rows(data, columns):
+    """
+    Convert a DataFrame into a list of tuples ready for cursor.executemany.
+
+    Missing columns are filled with None, NaN values are replaced with None and
+    numpy scalars are converted to Python native types.
+
+    Parameters:
+        data (pd.DataFrame): The data to convert.
+        columns (list): The ordered list of columns to extract.
+
+    Returns:
+        list: One tuple per row, in column order.
+    """
+    data = data.reindex(columns=columns)
+    data = data.astype(object).where(pd.notnull(data), None)
+    return list(data.itertuples(index=False, name=None))
+
+
+def dataframe_to_load_data_text(data, columns):
+    """
+    Render a DataFrame as tab-separated text in the format expected by LOAD DATA.
+
+    Nulls are written as \\N and backslashes, tabs and newlines inside values are
+    escaped, so the default FIELDS ESCAPED BY '\\\\' clause restores them.
+
+    Parameters:
+        data (pd.DataFrame): The data to render.
+        columns (list): The ordered list of columns to render.
+
+    Returns:
+        str: The rendered rows, one line per row.
+    """
+    data = data.reindex(columns=columns)
+    fields = []
+    for column in columns:
+        values = data[column]
+        nulls = values.isna()
+
+        # Integer counters read with NaNs come back as floats; write them without the '.0'
+        if pd.api.types.is_float_dtype(values) and (values.dropna() % 1 == 0).all():
+            values = values.astype("Int64")
+
+        text = values.astype(str)
+        if not pd.api.types.is_numeric_dtype(values):
+            text = (
+                text.str.replace("\\", "\\\\", regex=False)
+                .str.replace("\t", "\\t", regex=False)
+                .str.replace("\n", "\\n", regex=False)
+            )
+        fields.append(text.mask(nulls, "\\N"))
+
+    if not fields or data.empty:
+        return ""
+    lines = fields[0].str.cat(fields[1:], sep="\t")
+    return "\n".join(lines) + "\n"
+
+
+def _insert_batch_executemany(cursor, table_name, batch, columns, upsert):
+    """Send one batch as a single multi-row INSERT."""
+    cursor.executemany(build_insert_query(table_name, columns, upsert), dataframe_to_rows(batch, columns))
+
+
+def _insert_batch_load_data(cursor, table_name, batch, columns, upsert):
+    """Stage one batch to a temp file and send it with LOAD DATA LOCAL INFILE."""
+    fd, path = tempfile.mkstemp(prefix=f"{table_name}_", suffix=".tsv")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as handle:
+            handle.write(dataframe_to_load_data_text(batch, columns))
+
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s {'REPLACE ' if upsert else ''}INTO TABLE {table_name} "
+            "CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+            "LINES TERMINATED BY '\\n' "
+            f"({', '.join(columns)})",
+            (path,)
+        )
+    finally:
+        os.remove(path)
+
+
+def bulk_insert(connection, table_name, data, columns=None, strategy="executemany",
+                batch_size=DEFAULT_BATCH_SIZE, upsert=False):
+    """
+    Insert a DataFrame into a MySQL table in batches.
+
+    The caller owns the transaction: this function does not commit.
+
+    Parameters:
+        connection (mysql.connector.connection.MySQLConnection): An open database connection.
+            The 'load_data' strategy requires it to be opened with allow_local_infile=True.
+        table_name (str): The name of the database table to insert data into.
+        data (pd.DataFrame): The rows to insert.
+        columns (list): The ordered list of table columns. Defaults to the DataFrame columns.
+        strategy (str): One of STRATEGIES.
+        batch_size (int): The number of rows sent per round trip.
+        upsert (bool): Overwrite rows whose primary key already exists
+            (ON DUPLICATE KEY UPDATE, or REPLACE for 'load_data').
+
+    Returns:
+        dict: Load statistics with 'rows', 'batches', 'seconds' and 'rows_per_sec'.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown bulk load strategy '{strategy}'. Expected one of {STRATEGIES}.")
+    if batch_size < 1:
+        raise ValueError("batch_size must be a positive integer.")
+
+    columns = list(columns) if columns is not None else list(data.columns)
+    insert_batch = _insert_batch_executemany if strategy == "executemany" else _insert_batch_load_data
+
+    start = time.perf_counter()
+    batches = 0
+    cursor = connection.cursor()
+    try:
+        for offset in range(0, len(data), batch_size):
+            insert_batch(cursor, table_name, data.iloc[offset:offset + batch_size], columns, upsert)
+            batches += 1
+    finally:
+        cursor.close()
+
+    seconds = time.perf_counter() - start
+    stats = {
+        "rows": len(data),
+        "batches": batches,
+        "seconds": seconds,
+        "rows_per_sec": len(data) / seconds if seconds > 0 else 0.0,
+    }
+    logger.info(
+        f"Bulk loaded {stats['rows']} rows into {table_name} using '{strategy}' "
+        f"in {stats['batches']} batches, {seconds:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec)."
+    )
+    return stats
+
+
+def combine_stats(stats_list):
+    """
+    Combine the statistics of several bulk_insert calls into one summary.
+
+    Parameters:
+        stats_list (list): The dictionaries returned by bulk_insert.
+
+    Returns:
+        dict: Summed 'rows', 'batches' and 'seconds', and the overall 'rows_per_sec'.
+    """
+    rows = sum(stats["rows"] for stats in stats_list)
+    seconds = sum(stats["seconds"] for stats in stats_list)
+    return {
+        "rows": rows,
+        "batches": sum(stats["batches"] for stats in stats_list),
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds > 0 else 0.0,
+    }
@@ -0,0 +1,203 @@
+import sys
+import argparse
+
+# Only the standard library is imported here. Every stage module pulls in pandas, the
+# database drivers or the plotting libraries, so each handler imports its stage on first
+# use: '--help' and argument errors stay fast, and a subcommand only pays for what it
+# runs. The handlers of the load stages and the pipeline also point the root logger at
+# the stage's log file, which importing a stage no longer does.
+
+LOAD_STRATEGIES = ("executemany", "load_data")
+INTERMEDIATE_FORMATS = ("csv", "parquet")
+# Tables with a seen-ID index (see scripts/dedup_index.py)
+INDEXED_TABLES = ("source_collision_data", "staging_collision_data")
+
+
+def _given(args, *names):
+    """
+    Collect the options that were set on the command line.
+
+    Options left unset are not passed on, so the stage function's own defaults apply
+    without importing its module to read them.
+
+    Parameters:
+        args (argparse.Namespace): The parsed arguments.
+        names (str): The option destinations to collect.
+
+    Returns:
+        dict: Keyword arguments for the stage function.
+    """
+    return {name: getattr(args, name) for name in names if getattr(args, name) is not None}
+
+
+def _load_options(args):
+    return _given(args, "strategy", "batch_size", "chunk_size", "memory_limit_mb", "workers") | {
+        "incremental": args.incremental,
+        "dedup": args.dedup,
+    }
+
+
+def _log_to(log_file):
+    from config.stage_logging import configure_stage_logging
+    configure_stage_logging(log_file)
+
+
+def run_source_command(args):
+    from scripts.load_source import log_file, run_source
+    _log_to(log_file)
+    run_source(**_load_options(args))
+
+
+def run_staging_command(args):
+    from scripts.load_staging import log_file, run_staging
+    _log_to(log_file)
+    run_staging(**_load_options(args))
+
+
+def run_entities_command(args):
+    from scripts.load_entities import log_file, run_entities
+    _log_to(log_file)
+    options = _given(args, "batch_size")
+    # A batch size of 0 runs the single INSERT ... SELECT transfer
+    if options.get("batch_size") == 0:
+        options["batch_size"] = None
+    run_entities(**options)
+
+
+def run_rebuild_index_command(args):
+    from config.db_config import get_db_connection
+    from scripts.dedup_index import rebuild_index
+    connection = get_db_connection()
+    try:
+        for table_name in args.tables or INDEXED_TABLES:
+            print(f"{table_name}: {rebuild_index(connection, table_name)} collision_ids indexed")
+    finally:
+        connection.close()
+
+
+def run_validate_command(args):
+    from scripts.validate import INPUT_FILE, print_report, validate_file
+    file_path = args.file or INPUT_FILE
+    report = validate_file(file_path, **_given(args, "chunk_size", "memory_limit_mb", "workers"))
+    print_report(file_path, report)
+    if not report["valid"]:
+        raise SystemExit(1)
+
+
+def run_transform_command(args):
+    from scripts.transform import transform_file
+    options = _given(args, "input_path", "output_format", "chunk_size", "memory_limit_mb")
+    output_path, rows = transform_file(skip_loaded=args.skip_loaded, **options)
+    print(f"Cleaned data ({rows} rows) loaded to output folder: {output_path}")
+
+
+def run_analyze_command(args):
+    from scripts.analysis import build_dashboard, print_timings, run_analysis
+    if args.dashboard:
+        timings = build_dashboard(args.charts or None, single_scan=args.single_scan, **_given(args, "workers"))
+        print_timings(timings)
+        if any(timing.get("error") for timing in timings.values()):
+            raise SystemExit(1)
+    else:
+        run_analysis()
+
+
+def run_all_command(args):
+    from scripts.pipeline import log_file, run_pipeline
+    _log_to(log_file)
+    statuses = run_pipeline(targets=args.stages or None, force=args.force, **_given(args, "workers"))
+    for name, status in statuses.items():
+        print(f"{name:10} {status}")
+    if any(status in ("failed", "blocked") for status in statuses.values()):
+        raise SystemExit(1)
+
+
+def _add_load_arguments(parser):
+    parser.add_argument("--strategy", choices=LOAD_STRATEGIES, help="Bulk load strategy (default: executemany).")
+    parser.add_argument("--batch-size", type=int, help="Rows sent to the database per round trip.")
+    parser.add_argument("--chunk-size", type=int, help="Stream the input in chunks of this many rows.")
+    parser.add_argument("--memory-limit-mb", type=float, help="Stream the input in chunks sized to this ceiling.")
+    parser.add_argument("--workers", type=int, help="Insert partitions concurrently on this many connections.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Load only rows newer than the table's watermark, with upserts.")
+    parser.add_argument("--dedup", action="store_true", help="Skip collision_ids that were already loaded.")
+
+
+def build_parser():
+    """
+    Build the argument parser of every subcommand.
+
+    Returns:
+        argparse.ArgumentParser: The parser; each subcommand sets a 'handler'.
+    """
+    parser = argparse.ArgumentParser(prog="python -m scripts.cli",
+                                     description="Run the NYC collisions ELT stages.")
+    subparsers = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    source = subparsers.add_parser("source", help="Load the raw CSV into source_collision_data.")
+    _add_load_arguments(source)
+    source.set_defaults(handler=run_source_command)
+
+    staging = subparsers.add_parser("staging", help="Load the cleaned data into staging_collision_data.")
+    _add_load_arguments(staging)
+    staging.set_defaults(handler=run_staging_command)
+
+    entities = subparsers.add_parser("entities", help="Transfer staging rows into the entities tables.")
+    entities.add_argument("--batch-size", type=int,
+                          help="Rows per committed batch (default: 10000); 0 runs a single INSERT ... SELECT.")
+    entities.set_defaults(handler=run_entities_command)
+
+    rebuild_index = subparsers.add_parser("rebuild-index",
+                                          help="Rebuild the seen-ID indexes from the collision_ids in the tables.")
+    rebuild_index.add_argument("--table", dest="tables", action="append", choices=INDEXED_TABLES,
+                               help="Table to index; repeat for several (default: all).")
+    rebuild_index.set_defaults(handler=run_rebuild_index_command)
+
+    validate = subparsers.add_parser("validate", help="Check the raw data and print every violation.")
+    validate.add_argument("file", nargs="?", help="CSV file or Parquet dataset (default: the raw API data).")
+    validate.add_argument("--chunk-size", type=int, help="Rows checked at a time.")
+    validate.add_argument("--memory-limit-mb", type=float, help="Derive the chunk size from this ceiling.")
+    validate.add_argument("--workers", type=int, help="Processes checking chunks.")
+    validate.set_defaults(handler=run_validate_command)
+
+    transform = subparsers.add_parser("transform", help="Clean the raw data into the intermediate file.")
+    transform.add_argument("--input", dest="input_path", help="Raw CSV file (default: the raw API data).")
+    transform.add_argument("--format", dest="output_format", choices=INTERMEDIATE_FORMATS,
+                           help="Intermediate format (default: the INTERMEDIATE_FORMAT setting).")
+    transform.add_argument("--chunk-size", type=int, help="Clean the file in chunks of this many rows.")
+    transform.add_argument("--memory-limit-mb", type=float, help="Clean the file in chunks sized to this ceiling.")
+    transform.add_argument("--skip-loaded", action="store_true",
+                           help="Leave out collision_ids already loaded into the staging table.")
+    transform.set_defaults(handler=run_transform_command)
+
+    analyze = subparsers.add_parser("analyze", help="Render the collision analysis charts.")
+    analyze.add_argument("--dashboard", action="store_true",
+                         help="Fetch all charts concurrently and render them in parallel processes.")
+    analyze.add_argument("--workers", type=int, help="Render processes.")
+    analyze.add_argument("--single-scan", action="store_true",
+                         help="In dashboard mode, compute every chart's data in one pass over the entities table.")
+    analyze.add_argument("charts", nargs="*", help="Charts to build in dashboard mode (default: all).")
+    analyze.set_defaults(handler=run_analyze_command)
+
+    run_all = subparsers.add_parser("run-all", help="Run the pipeline DAG, skipping stages whose inputs are unchanged.")
+    run_all.add_argument("stages", nargs="*", help="Stages to run with their dependencies (default: all).")
+    run_all.add_argument("--force", action="store_true", help="Rerun stages even if their inputs are unchanged.")
+    run_all.add_argument("--workers", type=int, help="Stages run at the same time.")
+    run_all.set_defaults(handler=run_all_command)
+
+    return parser
+
+
+def main(argv=None):
+    """
+    Parse the command line and run the chosen subcommand.
+
+    Parameters:
+        argv (list): The arguments, sys.argv[1:] if None.
+    """
+    args = build_parser().parse_args(sys.argv[1:] if argv is None else argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
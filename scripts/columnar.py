@@ -0,0 +1,208 @@
+import os
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from scripts.streaming import SAMPLE_ROWS, WORKING_COPIES
+
+logger = logging.getLogger("COLUMNAR")
+
+# Format of the file handed from the transform stage to the staging loader: 'csv' or 'parquet'
+INTERMEDIATE_FORMAT_ENV = "INTERMEDIATE_FORMAT"
+
+# Hive-style partition columns derived from crash_date (crash_year=2024/crash_month=1/...)
+PARTITION_COLUMNS = ["crash_year", "crash_month"]
+
+# Parquet compression codec
+COMPRESSION = "zstd"
+
+
+def intermediate_format():
+    """
+    Read the configured intermediate file format.
+
+    Returns:
+        str: 'csv' (the default) or 'parquet'.
+    """
+    file_format = os.getenv(INTERMEDIATE_FORMAT_ENV, "csv").lower()
+    if file_format not in ("csv", "parquet"):
+        raise ValueError(f"Unsupported {INTERMEDIATE_FORMAT_ENV} '{file_format}'. Expected 'csv' or 'parquet'.")
+    return file_format
+
+
+def is_parquet(path):
+    """
+    Tell whether a path points to a Parquet file or partitioned Parquet dataset.
+
+    Parameters:
+        path (str): The file or directory path.
+
+    Returns:
+        bool: True for a *.parquet path or a directory, False for a CSV file.
+    """
+    return str(path).endswith(".parquet") or os.path.isdir(path)
+
+
+def _stable_arrow_schema(table):
+    """Cast chunk-dependent Arrow types to fixed ones so every file of a dataset shares one schema."""
+    fields = []
+    for field in table.schema:
+        if pa.types.is_null(field.type):
+            # A column that is entirely null in this chunk
+            field = field.with_type(pa.string())
+        elif pa.types.is_dictionary(field.type):
+            # Categorical codes are int8 or int16 depending on how many categories a chunk has
+            value_type = pa.string() if pa.types.is_null(field.type.value_type) else field.type.value_type
+            field = field.with_type(pa.dictionary(pa.int32(), value_type))
+        fields.append(field)
+    return table.cast(pa.schema(fields, metadata=table.schema.metadata))
+
+
+def write_parquet_dataset(data, root_path, partition_columns=PARTITION_COLUMNS, basename_template="part-{i}.parquet",
+                          existing_data_behavior="delete_matching"):
+    """
+    Write a DataFrame as a compressed Parquet dataset partitioned by crash year and month.
+
+    By default, existing partitions that receive new rows are replaced, so rerunning the
+    transform for the same data overwrites its output instead of duplicating it. Chunked
+    writers pass a distinct basename_template per chunk with 'overwrite_or_ignore' so
+    later chunks add files next to the earlier ones.
+
+    Parameters:
+        data (pd.DataFrame): The data to write. Must contain crash_date.
+        root_path (str): The dataset directory.
+        partition_columns (list): The partition columns; crash_year and crash_month are
+            derived from crash_date.
+        basename_template (str): The file name pattern inside each partition.
+        existing_data_behavior (str): 'delete_matching' or 'overwrite_or_ignore'.
+
+    Returns:
+        int: The number of rows written.
+    """
+    crash_dates = pd.to_datetime(data['crash_date'], errors='coerce')
+    data = data.assign(
+        crash_year=crash_dates.dt.year.astype("Int16"),
+        crash_month=crash_dates.dt.month.astype("Int8"),
+    )
+
+    table = _stable_arrow_schema(pa.Table.from_pandas(data, preserve_index=False))
+    pq.write_to_dataset(
+        table,
+        root_path,
+        partition_cols=partition_columns,
+        compression=COMPRESSION,
+        existing_data_behavior=existing_data_behavior,
+        basename_template=basename_template,
+    )
+    logger.info(f"Wrote {len(data)} rows to Parquet dataset {root_path} partitioned by {partition_columns}.")
+    return len(data)
+
+
+def open_dataset(path):
+    """
+    Open a Parquet file or hive-partitioned Parquet dataset.
+
+    Parameters:
+        path (str): The file or dataset directory.
+
+    Returns:
+        pyarrow.dataset.Dataset: The dataset.
+    """
+    return ds.dataset(path, format="parquet", partitioning="hive")
+
+
+def parquet_columns(path):
+    """
+    List the columns of a Parquet file or dataset, partition columns included.
+
+    Parameters:
+        path (str): The file or dataset directory.
+
+    Returns:
+        list: The column names.
+    """
+    return open_dataset(path).schema.names
+
+
+def read_parquet(path, columns=None, filter=None):
+    """
+    Read a Parquet file or dataset into a DataFrame, decoding only the requested columns.
+
+    Parameters:
+        path (str): The file or dataset directory.
+        columns (list): The columns to read. Columns missing from the dataset are skipped.
+            All columns are read when omitted.
+        filter (pyarrow.dataset.Expression): An optional row filter, e.g.
+            ds.field('crash_year') == 2024, which prunes whole partitions.
+
+    Returns:
+        pd.DataFrame: The projected rows.
+    """
+    dataset = open_dataset(path)
+    if columns is not None:
+        columns = [column for column in columns if column in dataset.schema.names]
+    return dataset.to_table(columns=columns, filter=filter).to_pandas()
+
+
+def parquet_chunk_size_for_memory(path, memory_limit_mb, columns=None):
+    """
+    Pick the largest chunk size whose working set fits within a memory ceiling.
+
+    Parameters:
+        path (str): The file or dataset directory.
+        memory_limit_mb (float): The memory ceiling for in-flight data, in megabytes.
+        columns (list): The columns that will be read.
+
+    Returns:
+        int: The number of rows per chunk (at least 1).
+    """
+    dataset = open_dataset(path)
+    if columns is not None:
+        columns = [column for column in columns if column in dataset.schema.names]
+    sample = dataset.head(SAMPLE_ROWS, columns=columns).to_pandas()
+    row_bytes = max(1.0, sample.memory_usage(deep=True).sum() / len(sample)) if len(sample) else 1.0
+    return max(1, int(memory_limit_mb * 1024 * 1024 / (row_bytes * WORKING_COPIES)))
+
+
+def iter_parquet_chunks(path, columns=None, chunk_size=None, memory_limit_mb=None):
+    """
+    Read a Parquet file or dataset as a stream of DataFrame chunks, with column projection.
+
+    Mirrors iter_csv_chunks: without chunk_size or memory_limit_mb the whole dataset is
+    yielded as a single chunk, and when both are given the smaller chunk size wins.
+
+    Parameters:
+        path (str): The file or dataset directory.
+        columns (list): The columns to read. Columns missing from the dataset are skipped.
+        chunk_size (int): The number of rows per chunk.
+        memory_limit_mb (float): A memory ceiling used to derive the chunk size.
+
+    Yields:
+        pd.DataFrame: The next chunk of rows.
+    """
+    if memory_limit_mb is not None:
+        budget_rows = parquet_chunk_size_for_memory(path, memory_limit_mb, columns)
+        chunk_size = min(chunk_size, budget_rows) if chunk_size else budget_rows
+        logger.info(f"Streaming {path} in chunks of {chunk_size} rows ({memory_limit_mb} MB ceiling).")
+
+    if not chunk_size:
+        yield read_parquet(path, columns)
+        return
+
+    dataset = open_dataset(path)
+    if columns is not None:
+        columns = [column for column in columns if column in dataset.schema.names]
+
+    # Record batches never span files, so regroup them into chunks of exactly chunk_size rows
+    pending, pending_rows = [], 0
+    for batch in dataset.to_batches(columns=columns, batch_size=chunk_size):
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= chunk_size:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunk_size).to_pandas()
+            rest = table.slice(chunk_size)
+            pending, pending_rows = rest.to_batches(), rest.num_rows
+    if pending_rows:
+        yield pa.Table.from_batches(pending).to_pandas()
@@ -0,0 +1,175 @@
+import os
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+from config.db_config import database_identity
+
+logger = logging.getLogger("DEDUP_INDEX")
+
+# One sorted .npy array of collision_ids per table, in a subdirectory per database
+INDEX_DIR = "./data/index"
+
+EMPTY_INDEX = np.empty(0, dtype=np.int64)
+
+
+def index_path(table_name, index_dir=None):
+    """
+    Locate the seen-ID index of a table in the configured database.
+
+    The database (see db_config.database_identity) is part of the path: the IDs loaded
+    into one database must not drop rows bound for another, e.g. after switching
+    DB_BACKEND or SQLITE_PATH.
+
+    Parameters:
+        table_name (str): The table whose committed collision_ids are indexed.
+        index_dir (str): The directory holding the indexes. Defaults to INDEX_DIR.
+
+    Returns:
+        str: The path of the .npy file, '<sha256 of the database>/<table>_collision_ids.npy'.
+    """
+    database = hashlib.sha256(database_identity().encode()).hexdigest()[:16]
+    return os.path.join(index_dir or INDEX_DIR, database, f"{table_name}_collision_ids.npy")
+
+
+def load_index(path, mmap=True):
+    """
+    Open a seen-ID index.
+
+    The index is a sorted array of unique int64 collision_ids (8 bytes per ID, so
+    8 MB per million IDs). By default it is memory-mapped, so lookups only touch the
+    pages they need instead of loading the whole array.
+
+    Parameters:
+        path (str): The .npy file.
+        mmap (bool): Memory-map the file read-only instead of reading it.
+
+    Returns:
+        np.ndarray: The sorted IDs; empty if the index does not exist yet.
+    """
+    if not os.path.exists(path):
+        return EMPTY_INDEX
+    return np.load(path, mmap_mode="r" if mmap else None)
+
+
+def contains(index, ids):
+    """
+    Test which IDs are in a sorted index, by binary search.
+
+    Parameters:
+        index (np.ndarray): A sorted array of unique IDs.
+        ids (np.ndarray): The IDs to look up.
+
+    Returns:
+        np.ndarray: A boolean mask aligned with ids.
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    if len(index) == 0:
+        return np.zeros(len(ids), dtype=bool)
+    positions = np.searchsorted(index, ids)
+    found = np.zeros(len(ids), dtype=bool)
+    in_range = positions < len(index)
+    found[in_range] = index[positions[in_range]] == ids[in_range]
+    return found
+
+
+def add_ids(index, ids):
+    """
+    Merge IDs into a sorted index.
+
+    Parameters:
+        index (np.ndarray): A sorted array of unique IDs.
+        ids (np.ndarray): The IDs to add.
+
+    Returns:
+        np.ndarray: A new sorted array of unique IDs.
+    """
+    return np.union1d(np.asarray(index, dtype=np.int64), np.asarray(ids, dtype=np.int64))
+
+
+def save_index(path, index):
+    """
+    Write a seen-ID index atomically.
+
+    Parameters:
+        path (str): The .npy file.
+        index (np.ndarray): A sorted array of unique IDs.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.tmp.npy"
+    np.save(temp_path, np.asarray(index, dtype=np.int64))
+    os.replace(temp_path, path)
+
+
+def record_ids(path, ids):
+    """
+    Add newly committed IDs to the persisted index of a table.
+
+    Parameters:
+        path (str): The .npy file.
+        ids (np.ndarray): The IDs that were committed.
+
+    Returns:
+        int: The number of IDs in the index afterwards.
+    """
+    index = add_ids(load_index(path, mmap=False), ids)
+    save_index(path, index)
+    logger.info(f"Seen-ID index {path} now holds {len(index)} collision_ids.")
+    return len(index)
+
+
+def filter_unseen(data, index, run_ids=EMPTY_INDEX):
+    """
+    Drop rows whose collision_id is in the index, was seen earlier in the run, or
+    repeats within the chunk (the first occurrence is kept).
+
+    Parameters:
+        data (pd.DataFrame): A chunk with a collision_id column.
+        index (np.ndarray): The persisted index of IDs already in the target.
+        run_ids (np.ndarray): A sorted array of IDs kept earlier in this run.
+
+    Returns:
+        tuple: The rows to keep, and run_ids extended with their IDs.
+    """
+    # Rows without an ID cannot be matched; they are kept and left to validation
+    present = data['collision_id'].notna().to_numpy()
+    ids = data['collision_id'].to_numpy(dtype=np.int64, na_value=0)
+    seen = contains(index, ids) | contains(run_ids, ids) | pd.Series(ids).duplicated().to_numpy()
+    keep = ~(seen & present)
+    dropped = int(len(ids) - keep.sum())
+    if dropped:
+        logger.info(f"Dropped {dropped} rows with collision_ids that were already seen.")
+    return data[keep], add_ids(run_ids, ids[keep & present])
+
+
+def rebuild_index(connection, table_name, path=None, fetch_size=100000):
+    """
+    Rebuild the index of a table from the collision_ids it actually holds.
+
+    Use this after the table was truncated or loaded outside the pipeline.
+
+    Parameters:
+        connection (mysql.connector.connection.MySQLConnection): An open database connection.
+        table_name (str): The table to index.
+        path (str): The .npy file. Defaults to index_path(table_name).
+        fetch_size (int): The number of IDs fetched per round trip.
+
+    Returns:
+        int: The number of IDs in the index.
+    """
+    path = path or index_path(table_name)
+    parts = []
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SELECT collision_id FROM {table_name} ORDER BY collision_id")
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            parts.append(np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)))
+    finally:
+        cursor.close()
+    index = np.unique(np.concatenate(parts)) if parts else EMPTY_INDEX
+    save_index(path, index)
+    logger.info(f"Rebuilt seen-ID index {path} from {table_name} ({len(index)} collision_ids).")
+    return len(index)
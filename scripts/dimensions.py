@@ -0,0 +1,143 @@
+import logging
+import numpy as np
+import pandas as pd
+from scripts.bulk_load import bulk_insert
+from scripts.schema import DIMENSIONS, DIMENSION_KEY_COLUMNS
+
+logger = logging.getLogger("DIMENSIONS")
+
+# Dtype of the encoded key columns (nullable: a null text value has no key)
+KEY_DTYPE = 'Int32'
+
+
+def empty_dictionary(table_name):
+    """
+    Create an empty dictionary for a dimension table.
+
+    A dictionary is a Series of surrogate keys indexed by the text value they encode.
+
+    Parameters:
+        table_name (str): The dimension table (see DIMENSIONS).
+
+    Returns:
+        pd.Series: An empty value -> key mapping.
+    """
+    return pd.Series([], index=pd.Index([], dtype=object), dtype='int64', name=DIMENSIONS[table_name]['key'])
+
+
+def load_dictionaries(connection):
+    """
+    Read every dimension table into memory.
+
+    Parameters:
+        connection (mysql.connector.connection.MySQLConnection): An open database connection.
+
+    Returns:
+        dict: Dimension table name to its dictionary (value -> key).
+    """
+    dictionaries = {}
+    cursor = connection.cursor()
+    try:
+        for table_name, spec in DIMENSIONS.items():
+            cursor.execute(f"SELECT {spec['key']}, {spec['value']} FROM {table_name}")
+            rows = cursor.fetchall()
+            dictionary = empty_dictionary(table_name)
+            if rows:
+                keys, values = zip(*rows)
+                dictionary = pd.Series(keys, index=pd.Index(values, dtype=object), dtype='int64', name=spec['key'])
+            dictionaries[table_name] = dictionary
+            logger.info(f"Loaded {len(dictionary)} members of {table_name}.")
+    finally:
+        cursor.close()
+    return dictionaries
+
+
+def extend_dictionary(dictionary, values):
+    """
+    Assign surrogate keys to the values a dictionary does not know yet.
+
+    New keys continue after the highest existing key, in order of first appearance.
+
+    Parameters:
+        dictionary (pd.Series): The value -> key mapping.
+        values (pd.Index): Distinct non-null values to encode.
+
+    Returns:
+        tuple: The extended dictionary, and the new members alone (value -> key).
+    """
+    new_values = values[dictionary.index.get_indexer(values) == -1]
+    next_key = int(dictionary.max()) + 1 if len(dictionary) else 1
+    new_members = pd.Series(
+        np.arange(next_key, next_key + len(new_values), dtype=np.int64),
+        index=pd.Index(new_values, dtype=object), name=dictionary.name
+    )
+    return pd.concat([dictionary, new_members]), new_members
+
+
+def encode_codes(codes, uniques, dictionary):
+    """
+    Translate a factorized column into surrogate keys.
+
+    Only the distinct values are looked up in the dictionary; the rows are then mapped
+    through their factor codes, so the work on strings does not grow with the row count.
+
+    Parameters:
+        codes (np.ndarray): The factor code of every row (-1 for nulls), as from pd.factorize.
+        uniques (array-like): The distinct values the codes point to.
+        dictionary (pd.Series): A value -> key mapping holding every value in uniques.
+
+    Returns:
+        pd.arrays.IntegerArray: The key of every row, null where the value was null.
+    """
+    unique_keys = dictionary.to_numpy()[dictionary.index.get_indexer(uniques)]
+    keys = np.append(unique_keys, 0)[codes]
+    return pd.arrays.IntegerArray(keys.astype(np.int32), codes == -1)
+
+
+def encode_dimensions(connection, data, dictionaries):
+    """
+    Replace the dimension text columns of a batch with their surrogate keys.
+
+    Values not yet in a dimension are given the next keys and inserted into the dimension
+    table through the same connection, so they commit (or roll back) together with the
+    batch that introduced them. The dictionaries are extended in place. Keys are assigned
+    on the client, so only one process should load entities at a time.
+
+    Parameters:
+        connection (mysql.connector.connection.MySQLConnection): An open database connection.
+        data (pd.DataFrame): Staging rows.
+        dictionaries (dict): Dimension table name to its dictionary, as from load_dictionaries.
+
+    Returns:
+        pd.DataFrame: The batch with '<column>_id' key columns in place of the text columns.
+    """
+    data = data.copy()
+    for table_name, spec in DIMENSIONS.items():
+        columns = [column for column in spec['columns'] if column in data.columns]
+        if not columns:
+            continue
+
+        # Factorize each column once and collect the distinct values across them
+        factorized = {column: pd.factorize(data[column]) for column in columns}
+        values = pd.Index(
+            pd.unique(np.concatenate([np.asarray(uniques, dtype=object) for _, uniques in factorized.values()])),
+            dtype=object
+        )
+
+        # Register the new values in the dimension table
+        dictionary, new_members = extend_dictionary(dictionaries[table_name], values)
+        if len(new_members):
+            bulk_insert(
+                connection, table_name,
+                pd.DataFrame({spec['key']: new_members.to_numpy(), spec['value']: new_members.index}),
+                [spec['key'], spec['value']]
+            )
+            logger.info(f"Added {len(new_members)} new members to {table_name}.")
+        dictionaries[table_name] = dictionary
+
+        # Swap every text column for its keys
+        for column in columns:
+            codes, uniques = factorized[column]
+            data[DIMENSION_KEY_COLUMNS[column]] = encode_codes(codes, uniques, dictionary)
+        data = data.drop(columns=columns)
+    return data
@@ -0,0 +1,258 @@
+import os
+import json
+import time
+import logging
+import requests
+import pandas as pd
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from config.stage_logging import configure_stage_logging
+from scripts.schema import RAW_COLUMNS
+
+# Log file of the command-line runs (see config/stage_logging.py)
+log_file = os.path.join("logs", "extract_pipeline.log")
+
+logger = logging.getLogger("EXTRACT_PIPELINE")
+
+# NYC Open Data (Socrata) endpoint for Motor Vehicle Collisions - Crashes
+API_URL = "https://data.cityofnewyork.us/resource/h9gi-nx95.json"
+
+# Rows requested per page ($limit); Socrata serves up to 50,000 rows per request
+DEFAULT_PAGE_SIZE = 50000
+
+# Pages fetched concurrently
+DEFAULT_WORKERS = 4
+
+# Retry policy for throttled (429), unavailable (5xx) or dropped requests
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 1.0
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+REQUEST_TIMEOUT_SECONDS = 60
+
+def date_window(start_date, end_date):
+    """
+    Build a $where clause selecting crashes in a date window.
+
+    Parameters:
+        start_date (str): The first crash date to include (YYYY-MM-DD).
+        end_date (str): The first crash date to exclude (YYYY-MM-DD).
+
+    Returns:
+        str: The SoQL condition.
+    """
+    return f"crash_date >= '{start_date}T00:00:00' AND crash_date < '{end_date}T00:00:00'"
+
+
+def create_session():
+    """
+    Create an HTTP session for the API, authenticated with SOCRATA_APP_TOKEN when set.
+
+    Returns:
+        requests.Session: The session shared by all page requests.
+    """
+    session = requests.Session()
+    app_token = os.getenv("SOCRATA_APP_TOKEN")
+    if app_token:
+        session.headers["X-App-Token"] = app_token
+    return session
+
+
+def request_json(session, url, params):
+    """
+    GET a JSON document, retrying throttled, failed or dropped requests with exponential backoff.
+
+    Parameters:
+        session (requests.Session): The HTTP session.
+        url (str): The endpoint URL.
+        params (dict): The query string parameters.
+
+    Returns:
+        list: The decoded JSON records.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            response = session.get(url, params=params, timeout=REQUEST_TIMEOUT_SECONDS)
+            if response.status_code not in RETRY_STATUS_CODES:
+                response.raise_for_status()
+                return response.json()
+            error = requests.HTTPError(f"{response.status_code} for {response.url}", response=response)
+            retry_after = response.headers.get("Retry-After")
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error, retry_after = e, None
+
+        if attempt == MAX_RETRIES:
+            raise error
+        delay = float(retry_after) if retry_after and retry_after.isdigit() else BACKOFF_SECONDS * 2 ** attempt
+        logger.warning(f"Request {params} failed ({error}); retrying in {delay:.1f}s.")
+        time.sleep(delay)
+
+
+def count_rows(session, url, where=None):
+    """
+    Count the rows the endpoint holds for a filter.
+
+    Parameters:
+        session (requests.Session): The HTTP session.
+        url (str): The endpoint URL.
+        where (str): An optional SoQL $where condition.
+
+    Returns:
+        int: The number of matching rows.
+    """
+    params = {"$select": "count(*) AS row_count"}
+    if where:
+        params["$where"] = where
+    return int(request_json(session, url, params)[0]["row_count"])
+
+
+def fetch_page(session, url, offset, limit, where=None):
+    """
+    Fetch one page of records ordered by collision_id.
+
+    Parameters:
+        session (requests.Session): The HTTP session.
+        url (str): The endpoint URL.
+        offset (int): The number of rows to skip ($offset).
+        limit (int): The number of rows to return ($limit).
+        where (str): An optional SoQL $where condition.
+
+    Returns:
+        list: The page's records.
+    """
+    params = {"$limit": limit, "$offset": offset, "$order": "collision_id"}
+    if where:
+        params["$where"] = where
+    return request_json(session, url, params)
+
+
+def iter_pages(url=API_URL, page_size=DEFAULT_PAGE_SIZE, workers=DEFAULT_WORKERS, where=None, session=None):
+    """
+    Fetch every page of the endpoint concurrently, yielding them in offset order.
+
+    At most two pages per worker are in flight or buffered at any time, so memory stays
+    bounded however many rows the endpoint holds.
+
+    Parameters:
+        url (str): The endpoint URL.
+        page_size (int): The number of rows per page.
+        workers (int): The number of pages fetched concurrently.
+        where (str): An optional SoQL $where condition, e.g. from date_window.
+        session (requests.Session): The HTTP session. Created when omitted.
+
+    Yields:
+        list: The records of the next page.
+    """
+    session = session or create_session()
+    total = count_rows(session, url, where)
+    offsets = iter(range(0, total, page_size))
+    logger.info(f"Extracting {total} rows from {url} in pages of {page_size} with {workers} workers.")
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="extract") as executor:
+        in_flight = deque()
+        for offset in offsets:
+            in_flight.append(executor.submit(fetch_page, session, url, offset, page_size, where))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def records_to_frame(records, columns=RAW_COLUMNS):
+    """
+    Convert API records to a DataFrame laid out like raw_api_data.csv.
+
+    Nested objects (the 'location' point) are serialized as JSON strings.
+
+    Parameters:
+        records (list): The records of a page.
+        columns (list): The output columns, in order.
+
+    Returns:
+        pd.DataFrame: One row per record.
+    """
+    data = pd.DataFrame.from_records(records, columns=columns)
+    if 'location' in data.columns:
+        data['location'] = data['location'].map(
+            lambda value: json.dumps(value) if isinstance(value, dict) else value
+        )
+    return data
+
+
+def extract_to_csv(output_path, url=API_URL, page_size=DEFAULT_PAGE_SIZE, workers=DEFAULT_WORKERS,
+                   where=None, session=None):
+    """
+    Stream every page of the endpoint straight to a CSV file.
+
+    Pages are written as soon as they arrive (in offset order), so only the in-flight
+    pages are ever held in memory. The file is written under a temporary name and
+    renamed when complete, so a failed extraction never leaves a truncated file behind.
+
+    Parameters:
+        output_path (str): The CSV file to write.
+        url (str): The endpoint URL.
+        page_size (int): The number of rows per page.
+        workers (int): The number of pages fetched concurrently.
+        where (str): An optional SoQL $where condition, e.g. from date_window.
+        session (requests.Session): The HTTP session. Created when omitted.
+
+    Returns:
+        int: The number of rows written.
+    """
+    temp_path = f"{output_path}.part"
+    rows = 0
+    start = time.perf_counter()
+    try:
+        with open(temp_path, "w", encoding="utf-8", newline="") as handle:
+            handle.write(",".join(RAW_COLUMNS) + "\n")
+            for records in iter_pages(url, page_size, workers, where, session):
+                records_to_frame(records).to_csv(handle, header=False, index=False)
+                rows += len(records)
+        os.replace(temp_path, output_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    seconds = time.perf_counter() - start
+    logger.info(f"Wrote {rows} rows to {output_path} in {seconds:.1f}s.")
+    return rows
+
+
+def extract_data_from_api(url=API_URL, limit=1000, where=None):
+    """
+    Fetch a single page of records from the API.
+
+    Parameters:
+        url (str): The endpoint URL.
+        limit (int): The number of rows to return.
+        where (str): An optional SoQL $where condition.
+
+    Returns:
+        list: The records, as dictionaries.
+    """
+    return fetch_page(create_session(), url, 0, limit, where)
+
+
+def run_extract(output_path="./data/input/raw_api_data.csv", where=None,
+                page_size=DEFAULT_PAGE_SIZE, workers=DEFAULT_WORKERS):
+    """
+    Run the full extraction from the NYC Open Data API to the raw CSV file.
+
+    Parameters:
+        output_path (str): The CSV file to write.
+        where (str): An optional SoQL $where condition, e.g. from date_window.
+        page_size (int): The number of rows per page.
+        workers (int): The number of pages fetched concurrently.
+    """
+    try:
+        logger.info("Starting extraction...")
+        extract_to_csv(output_path, API_URL, page_size, workers, where)
+        logger.info("Extraction completed successfully.")
+    except Exception as e:
+        logger.error(f"Extraction failed: {e}", exc_info=True)
+        raise
+
+
+if __name__ == "__main__":
+    configure_stage_logging(log_file)
+    run_extract()
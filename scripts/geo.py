@@ -0,0 +1,363 @@
+import math
+import logging
+import numpy as np
+import pandas as pd
+from scripts.bulk_load import dataframe_to_rows
+from scripts.schema import GRID_CELL_COLUMN
+
+logger = logging.getLogger("GEO")
+
+# Box around the five boroughs. Coordinates outside it (the raw export has (0, 0) and
+# swapped or truncated values) get no grid cell.
+MIN_LATITUDE, MAX_LATITUDE = 40.45, 40.95
+MIN_LONGITUDE, MAX_LONGITUDE = -74.30, -73.65
+
+# Local equirectangular projection: metres per degree at the box's central latitude
+METERS_PER_DEGREE_LATITUDE = 111132.0
+METERS_PER_DEGREE_LONGITUDE = 111320.0 * math.cos(math.radians((MIN_LATITUDE + MAX_LATITUDE) / 2))
+
+# Side of a level 0 tile. A tile of level L is 2**L level 0 tiles wide: 25 m, 50 m, 100 m,
+# 200 m, 400 m, 800 m, 1.6 km, ...
+BASE_CELL_METERS = 25.0
+
+# Tiles per axis at level 0 (about 2,200 across the box); each fits in 16 bits
+TILES_PER_AXIS = int(math.ceil(max(
+    (MAX_LATITUDE - MIN_LATITUDE) * METERS_PER_DEGREE_LATITUDE,
+    (MAX_LONGITUDE - MIN_LONGITUDE) * METERS_PER_DEGREE_LONGITUDE,
+) / BASE_CELL_METERS))
+
+# Resolution used for hotspots unless told otherwise (200 m tiles)
+DEFAULT_HOTSPOT_LEVEL = 3
+
+# Per-cell totals, read through idx_grid_cell without touching the table rows
+CELL_TOTALS_QUERY = """
+    SELECT grid_cell,
+        COUNT(*) AS total_collisions,
+        COALESCE(SUM(number_of_persons_injured), 0) AS total_injuries,
+        COALESCE(SUM(number_of_persons_killed), 0) AS total_fatalities
+    FROM entities_collision_data
+    WHERE grid_cell IS NOT NULL{date_filter}
+    GROUP BY grid_cell
+"""
+
+
+def _spread_bits(values):
+    """Insert a zero bit above each of the low 16 bits of values."""
+    values = values.astype(np.uint32) & 0xFFFF
+    values = (values | (values << 8)) & 0x00FF00FF
+    values = (values | (values << 4)) & 0x0F0F0F0F
+    values = (values | (values << 2)) & 0x33333333
+    return (values | (values << 1)) & 0x55555555
+
+
+def _compact_bits(values):
+    """Inverse of _spread_bits: gather every other bit of values."""
+    values = values.astype(np.uint32) & 0x55555555
+    values = (values | (values >> 1)) & 0x33333333
+    values = (values | (values >> 2)) & 0x0F0F0F0F
+    values = (values | (values >> 4)) & 0x00FF00FF
+    return (values | (values >> 8)) & 0xFFFF
+
+
+def encode_tiles(x, y):
+    """
+    Interleave tile coordinates into Morton (Z-order) cell IDs.
+
+    Interleaving keeps nearby tiles close in the ID order, so the grid_cell index
+    stores neighbourhoods together, and the tile of level L containing a cell is the
+    cell ID shifted right by 2 * L bits.
+
+    Parameters:
+        x (np.ndarray): East-west tile numbers (0 to 65535).
+        y (np.ndarray): North-south tile numbers (0 to 65535).
+
+    Returns:
+        np.ndarray: The cell IDs as int64.
+    """
+    return (_spread_bits(x) | (_spread_bits(y) << 1)).astype(np.int64)
+
+
+def decode_tiles(cells):
+    """
+    Split Morton cell IDs back into tile coordinates.
+
+    Parameters:
+        cells (np.ndarray): Cell IDs of one level.
+
+    Returns:
+        tuple: The x and y tile numbers as int64 arrays.
+    """
+    cells = np.asarray(cells, dtype=np.int64)
+    return _compact_bits(cells).astype(np.int64), _compact_bits(cells >> 1).astype(np.int64)
+
+
+def project(latitude, longitude):
+    """
+    Project coordinates to metres east and north of the box's south-west corner.
+
+    Distances between projected points are within 0.5% of the true distance anywhere
+    in the box, which is all the grid and the spatial index need.
+
+    Parameters:
+        latitude (array-like): Latitudes in degrees; text and nulls are accepted.
+        longitude (array-like): Longitudes in degrees, aligned with latitude.
+
+    Returns:
+        tuple: The x and y coordinates in metres as float arrays, NaN where a coordinate
+            is missing or unparseable, and a boolean array of the points inside the box.
+    """
+    latitude = pd.to_numeric(pd.Series(latitude), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    longitude = pd.to_numeric(pd.Series(longitude), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    with np.errstate(invalid='ignore'):
+        inside = (
+            (latitude >= MIN_LATITUDE) & (latitude < MAX_LATITUDE)
+            & (longitude >= MIN_LONGITUDE) & (longitude < MAX_LONGITUDE)
+        )
+    x = (longitude - MIN_LONGITUDE) * METERS_PER_DEGREE_LONGITUDE
+    y = (latitude - MIN_LATITUDE) * METERS_PER_DEGREE_LATITUDE
+    return x, y, inside
+
+
+def cell_ids(latitude, longitude):
+    """
+    Compute the level 0 grid cell of each coordinate.
+
+    Parameters:
+        latitude (pd.Series): Latitudes in degrees; text and nulls are accepted.
+        longitude (pd.Series): Longitudes in degrees, aligned with latitude.
+
+    Returns:
+        pd.Series: The cell IDs (Int64), null where the coordinate is missing or
+            outside the box around New York City.
+    """
+    x, y, valid = project(latitude, longitude)
+    x = (x[valid] // BASE_CELL_METERS).astype(np.int64)
+    y = (y[valid] // BASE_CELL_METERS).astype(np.int64)
+
+    cells = pd.array(np.zeros(len(valid), dtype=np.int64), dtype='Int64')
+    cells[valid] = encode_tiles(x, y)
+    cells[~valid] = pd.NA
+    return pd.Series(cells, name=GRID_CELL_COLUMN)
+
+
+def add_grid_cells(data):
+    """
+    Add the grid_cell column to a chunk of collisions with latitude and longitude.
+
+    Parameters:
+        data (pd.DataFrame): The chunk.
+
+    Returns:
+        pd.DataFrame: The chunk with its GRID_CELL_COLUMN set.
+    """
+    data[GRID_CELL_COLUMN] = cell_ids(data['latitude'], data['longitude']).set_axis(data.index)
+    return data
+
+
+def parent_cells(cells, level):
+    """
+    Find the tile of a coarser level containing each level 0 cell.
+
+    Parameters:
+        cells (np.ndarray): Level 0 cell IDs.
+        level (int): The target level.
+
+    Returns:
+        np.ndarray: Cell IDs of that level.
+    """
+    return np.asarray(cells, dtype=np.int64) >> (2 * level)
+
+
+def cell_centers(cells, level=0):
+    """
+    Locate the centres of grid cells.
+
+    Parameters:
+        cells (np.ndarray): Cell IDs of one level.
+        level (int): Their level.
+
+    Returns:
+        tuple: Latitude and longitude arrays of the cell centres.
+    """
+    size = BASE_CELL_METERS * 2 ** level
+    x, y = decode_tiles(cells)
+    latitude = MIN_LATITUDE + (y + 0.5) * size / METERS_PER_DEGREE_LATITUDE
+    longitude = MIN_LONGITUDE + (x + 0.5) * size / METERS_PER_DEGREE_LONGITUDE
+    return latitude, longitude
+
+
+def neighborhood_sums(grid, radius):
+    """
+    Sum every cell of a dense grid with its neighbours up to radius cells away.
+
+    Uses a summed-area table, so the cost does not depend on the radius.
+
+    Parameters:
+        grid (np.ndarray): A 2-D array of per-cell values.
+        radius (int): The neighbourhood half-width, 1 for the 3x3 block around each cell.
+
+    Returns:
+        np.ndarray: The (2 * radius + 1)-wide block sums, same shape as grid.
+    """
+    if radius <= 0:
+        return grid
+    padded = np.pad(grid, radius + 1)
+    table = padded.cumsum(axis=0).cumsum(axis=1)
+    width = 2 * radius + 1
+    rows, columns = grid.shape
+    return (
+        table[width:width + rows, width:width + columns] - table[:rows, width:width + columns]
+        - table[width:width + rows, :columns] + table[:rows, :columns]
+    )
+
+
+def hotspots(cells, weights=None, level=DEFAULT_HOTSPOT_LEVEL, k=10, radius=1):
+    """
+    Rank the grid cells with the most collisions, smoothed over their neighbours.
+
+    The cells are rolled up to the requested level, totalled with np.bincount and laid
+    out on a dense grid. Each cell is then scored with the total of its (2 * radius + 1)-wide
+    neighbourhood, so a hotspot split across a tile boundary is not missed, and the top
+    k cells holding collisions of their own are returned. Millions of cells take tens
+    of milliseconds.
+
+    Parameters:
+        cells (array-like): Level 0 cell IDs, one per collision or one per pre-aggregated
+            cell; nulls are ignored.
+        weights (array-like): What each cell counts for (e.g. collisions or injuries
+            per cell from CELL_TOTALS_QUERY). 1 per cell when omitted.
+        level (int): The resolution to rank at (tiles of BASE_CELL_METERS * 2**level).
+        k (int): The number of hotspots.
+        radius (int): The smoothing half-width in tiles; 0 ranks the tiles alone.
+
+    Returns:
+        pd.DataFrame: 'grid_cell' (ID at that level), 'latitude' and 'longitude' of its
+            centre, its own 'total' and the smoothed 'score', best first.
+    """
+    # Nulls become -1 and are dropped with the coordinates outside the box
+    cells = pd.array(cells, dtype='Int64').to_numpy(dtype=np.int64, na_value=-1)
+    weights = (
+        pd.to_numeric(pd.Series(weights)).fillna(0).to_numpy(dtype=float)
+        if weights is not None else None
+    )
+    valid = cells >= 0
+    if weights is not None:
+        weights = weights[valid]
+
+    # Total per occupied tile of the level, indexed by its Morton code; only the occupied
+    # tiles are decoded into grid coordinates
+    per_code = np.bincount(parent_cells(cells[valid], level), weights=weights)
+    codes = np.flatnonzero(per_code)
+    x, y = decode_tiles(codes)
+
+    # Dense grid of the level, one row per y tile
+    side = -(-TILES_PER_AXIS // 2 ** level)
+    inside = (x < side) & (y < side)
+    grid = np.zeros((side, side))
+    grid[y[inside], x[inside]] = per_code[codes[inside]]
+    scores = neighborhood_sums(grid, radius)
+
+    # Best k scores among the cells with collisions of their own
+    occupied = np.flatnonzero(grid.ravel() > 0)
+    k = min(k, len(occupied))
+    if not k:
+        return pd.DataFrame(columns=['grid_cell', 'latitude', 'longitude', 'total', 'score'])
+    top = occupied[np.argpartition(-scores.ravel()[occupied], k - 1)[:k]]
+    top = top[np.argsort(-scores.ravel()[top], kind='stable')]
+
+    top_y, top_x = np.divmod(top, side)
+    top_cells = encode_tiles(top_x, top_y)
+    latitude, longitude = cell_centers(top_cells, level)
+    return pd.DataFrame({
+        'grid_cell': top_cells,
+        'latitude': latitude,
+        'longitude': longitude,
+        'total': grid.ravel()[top],
+        'score': scores.ravel()[top],
+    })
+
+
+def fetch_cell_totals(connection, since=None):
+    """
+    Read the per-cell collision, injury and fatality totals of the entities table.
+
+    Parameters:
+        connection (mysql.connector.connection.MySQLConnection): An open database connection.
+        since (str): Only count crashes on or after this date ('YYYY-MM-DD').
+
+    Returns:
+        pd.DataFrame: 'grid_cell' and the three totals, one row per occupied level 0 cell.
+    """
+    query = CELL_TOTALS_QUERY.format(date_filter=" AND crash_date >= %s" if since else "")
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query, (since,) if since else ())
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    return pd.DataFrame.from_records(
+        rows, columns=['grid_cell', 'total_collisions', 'total_injuries', 'total_fatalities']
+    )
+
+
+def top_hotspots(connection, measure='total_collisions', level=DEFAULT_HOTSPOT_LEVEL, k=10, radius=1, since=None):
+    """
+    Rank the collision hotspots of the entities table.
+
+    Parameters:
+        connection (mysql.connector.connection.MySQLConnection): An open database connection.
+        measure (str): 'total_collisions', 'total_injuries' or 'total_fatalities'.
+        level (int): The resolution to rank at.
+        k (int): The number of hotspots.
+        radius (int): The smoothing half-width in tiles.
+        since (str): Only count crashes on or after this date ('YYYY-MM-DD').
+
+    Returns:
+        pd.DataFrame: The hotspots, as from hotspots.
+    """
+    totals = fetch_cell_totals(connection, since)
+    return hotspots(totals['grid_cell'], totals[measure], level, k, radius)
+
+
+def backfill_grid_cells(connection, table_name, fetch_size=100000):
+    """
+    Compute grid_cell for rows loaded before the column existed.
+
+    The caller owns the transaction.
+
+    Parameters:
+        connection (mysql.connector.connection.MySQLConnection): An open database connection.
+        table_name (str): 'staging_collision_data' or 'entities_collision_data'.
+        fetch_size (int): The number of rows read per round trip.
+
+    Returns:
+        int: The number of rows given a grid cell.
+    """
+    # The rows are read in full before the first UPDATE, as an unbuffered MySQL cursor
+    # must be drained before the connection runs another statement
+    read_cursor = connection.cursor()
+    updates = []
+    try:
+        read_cursor.execute(
+            f"SELECT collision_id, latitude, longitude FROM {table_name} "
+            "WHERE grid_cell IS NULL AND latitude IS NOT NULL AND longitude IS NOT NULL"
+        )
+        while True:
+            rows = read_cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            chunk = add_grid_cells(pd.DataFrame.from_records(rows, columns=['collision_id', 'latitude', 'longitude']))
+            updates.extend(dataframe_to_rows(chunk.dropna(subset=[GRID_CELL_COLUMN]), [GRID_CELL_COLUMN, 'collision_id']))
+    finally:
+        read_cursor.close()
+
+    write_cursor = connection.cursor()
+    try:
+        for offset in range(0, len(updates), fetch_size):
+            write_cursor.executemany(
+                f"UPDATE {table_name} SET grid_cell = %s WHERE collision_id = %s", updates[offset:offset + fetch_size]
+            )
+    finally:
+        write_cursor.close()
+    logger.info(f"Backfilled grid cells of {len(updates)} rows of {table_name}.")
+    return len(updates)
@@ -1,61 +1,127 @@
 import mysql.connector
-from dotenv import load_dotenv
 import os
 import logging
+import time
+import pandas as pd
+from config.db_config import get_db_connection
+from config.stage_logging import configure_stage_logging
+from scripts.bulk_load import bulk_insert
+from scripts.dimensions import encode_dimensions, load_dictionaries
+from scripts.schema import DIMENSIONS, ENTITY_COLUMNS, STAGING_TABLE_COLUMNS
+from scripts.query_cache import bump_data_version
+from scripts.summaries import apply_deltas, net_deltas, rebuild_summaries, summary_deltas
 
-# Load environment variables
-load_dotenv()
-
-# Configure logging
+# Log file of the command-line runs (see config/stage_logging.py)
 log_file = os.path.join("logs", "entities_pipeline.log")
 
-logging.basicConfig(
-    filename=log_file,
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger("ENTITIES_PIPELINE")
 
-# Database connection details from .env file
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
+# Rows copied from staging per committed batch
+DEFAULT_TRANSFER_BATCH_SIZE = 10000
+
+# Leaves out staging rows whose collision_id is already in the entities table. Its primary
+# key is (collision_id, crash_date) for partitioning (migration 0002), so a collision
+# re-sent with a corrected crash_date would otherwise be inserted, and summed, twice.
+NOT_IN_ENTITIES = """
+    NOT EXISTS (SELECT 1 FROM entities_collision_data e WHERE e.collision_id = s.collision_id)
+"""
+
+# Temporal columns are compared as values: SQLite keeps them as the text they were
+# loaded with, e.g. '9:15' in staging and '09:15:00' once copied by the batched transfer
+NORMALIZED_COLUMNS = {'crash_date': 'TIMESTAMP', 'crash_time': 'TIME'}
 
 
-def connect_to_db():
+def same_as_staging(entity):
     """
-    Establish a connection to the MySQL database.
+    Build the condition that an entity row holds the values of the staging row s.
+
+    Columns are compared null-safely, the date and time as values and each dimension key
+    against the key of the staging text, so a collision corrected in staging no longer
+    matches its entity row.
+
+    Parameters:
+        entity (str): The alias or name of entities_collision_data in the query.
 
     Returns:
-        mysql.connector.connection.MySQLConnection: A connection object to interact with the database.
+        str: The SQL condition.
     """
-    try:
-        connection = mysql.connector.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            database=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD
-        )
-        logger.info("Database connection successful.")
-        return connection
-    except mysql.connector.Error as err:
-        logger.error(f"Database connection error: {err}", exc_info=True)
-        raise
+    dimensions = {column: (table_name, spec) for table_name, spec in DIMENSIONS.items() for column in spec['columns']}
+    conditions = []
+    for column, entity_column in zip(STAGING_TABLE_COLUMNS[1:], ENTITY_COLUMNS[1:]):
+        entity_value, staging_value = f"{entity}.{entity_column}", f"s.{column}"
+        if column in dimensions:
+            table_name, spec = dimensions[column]
+            staging_value = f"(SELECT {spec['key']} FROM {table_name} WHERE {spec['value']} = s.{column})"
+        elif column in NORMALIZED_COLUMNS:
+            function = NORMALIZED_COLUMNS[column]
+            entity_value, staging_value = f"{function}({entity_value})", f"{function}({staging_value})"
+        conditions.append(f"{entity_value} <=> {staging_value}")
+    return " AND ".join(conditions)
+
+
+# Deletes the entity rows of collisions whose staging row was corrected after they were
+# transferred, e.g. re-loaded with new counters inside the incremental lookback
+DELETE_CHANGED_QUERY = f"""
+    DELETE FROM entities_collision_data
+    WHERE EXISTS (
+        SELECT 1 FROM staging_collision_data s
+        WHERE s.collision_id = entities_collision_data.collision_id
+          AND NOT ({same_as_staging('entities_collision_data')})
+    )
+"""
+
+# Picks the staging rows the batched transfer has to copy: those missing from the
+# entities table and those corrected in staging after they were transferred
+NEW_OR_CHANGED = f"""
+    NOT EXISTS (
+        SELECT 1 FROM entities_collision_data e
+        WHERE e.collision_id = s.collision_id AND {same_as_staging('e')}
+    )
+"""
+
+# Reads one collision_id range (lower bound exclusive, upper bound inclusive) for encoding
+STAGING_BATCH_QUERY = f"""
+    SELECT {', '.join(STAGING_TABLE_COLUMNS)}
+    FROM staging_collision_data s
+    WHERE s.collision_id > %s AND s.collision_id <= %s AND {NEW_OR_CHANGED}
+    ORDER BY s.collision_id
+"""
 
 
 def transfer_data_to_entities_table():
     """
     Transfer data from the staging_collision_data table to the entities_collision_data table.
+
+    The whole transfer runs in the database: new text values are added to the dimension
+    tables first, then the entity rows of collisions corrected in staging are deleted, the
+    staging rows missing from the entities table are copied with their text columns looked
+    up as dimension keys, and the summary tables behind the analysis views are recomputed.
+    Collisions whose staging row is unchanged are left as they are.
     """
+    dimension_queries = [
+        """
+        INSERT IGNORE INTO dim_borough (borough)
+        SELECT DISTINCT borough FROM staging_collision_data WHERE borough IS NOT NULL;
+        """,
+        """
+        INSERT IGNORE INTO dim_contributing_factor (contributing_factor)
+        SELECT contributing_factor_vehicle_1 FROM staging_collision_data WHERE contributing_factor_vehicle_1 IS NOT NULL
+        UNION
+        SELECT contributing_factor_vehicle_2 FROM staging_collision_data WHERE contributing_factor_vehicle_2 IS NOT NULL;
+        """,
+        """
+        INSERT IGNORE INTO dim_vehicle_type (vehicle_type)
+        SELECT vehicle_type_code1 FROM staging_collision_data WHERE vehicle_type_code1 IS NOT NULL
+        UNION
+        SELECT vehicle_type_code2 FROM staging_collision_data WHERE vehicle_type_code2 IS NOT NULL;
+        """,
+    ]
     transfer_query = """
         INSERT INTO entities_collision_data (
             collision_id,
             crash_date,
             crash_time,
-            borough,
+            borough_id,
             zip_code,
             latitude,
             longitude,
@@ -70,61 +136,212 @@ def transfer_data_to_entities_table():
             number_of_cyclist_killed,
             number_of_motorist_injured,
             number_of_motorist_killed,
-            contributing_factor_vehicle_1,
-            contributing_factor_vehicle_2,
-            vehicle_type_code1,
-            vehicle_type_code2
+            contributing_factor_vehicle_1_id,
+            contributing_factor_vehicle_2_id,
+            vehicle_type_code1_id,
+            vehicle_type_code2_id,
+            grid_cell
         )
         SELECT
-            collision_id,
-            crash_date,
-            crash_time,
-            borough,
-            zip_code,
-            latitude,
-            longitude,
-            on_street_name,
-            cross_street_name,
-            off_street_name,
-            number_of_persons_injured,
-            number_of_persons_killed,
-            number_of_pedestrians_injured,
-            number_of_pedestrians_killed,
-            number_of_cyclist_injured,
-            number_of_cyclist_killed,
-            number_of_motorist_injured,
-            number_of_motorist_killed,
-            contributing_factor_vehicle_1,
-            contributing_factor_vehicle_2,
-            vehicle_type_code1,
-            vehicle_type_code2
-        FROM staging_collision_data;
-    """
+            s.collision_id,
+            s.crash_date,
+            s.crash_time,
+            b.borough_id,
+            s.zip_code,
+            s.latitude,
+            s.longitude,
+            s.on_street_name,
+            s.cross_street_name,
+            s.off_street_name,
+            s.number_of_persons_injured,
+            s.number_of_persons_killed,
+            s.number_of_pedestrians_injured,
+            s.number_of_pedestrians_killed,
+            s.number_of_cyclist_injured,
+            s.number_of_cyclist_killed,
+            s.number_of_motorist_injured,
+            s.number_of_motorist_killed,
+            f1.contributing_factor_id,
+            f2.contributing_factor_id,
+            v1.vehicle_type_id,
+            v2.vehicle_type_id,
+            s.grid_cell
+        FROM staging_collision_data s
+        LEFT JOIN dim_borough b ON b.borough = s.borough
+        LEFT JOIN dim_contributing_factor f1 ON f1.contributing_factor = s.contributing_factor_vehicle_1
+        LEFT JOIN dim_contributing_factor f2 ON f2.contributing_factor = s.contributing_factor_vehicle_2
+        LEFT JOIN dim_vehicle_type v1 ON v1.vehicle_type = s.vehicle_type_code1
+        LEFT JOIN dim_vehicle_type v2 ON v2.vehicle_type = s.vehicle_type_code2
+        WHERE {not_in_entities};
+    """.format(not_in_entities=NOT_IN_ENTITIES)
 
     # Establish database connection
-    connection = connect_to_db()
+    connection = get_db_connection()
     cursor = connection.cursor()
 
     try:
         logger.info("Starting data transfer from staging to entities table...")
+        for query in dimension_queries:
+            cursor.execute(query)
+        # Replace corrected collisions: their old rows go, and the insert copies them again
+        cursor.execute(DELETE_CHANGED_QUERY)
+        logger.info(f"Deleted {cursor.rowcount} entity rows corrected in staging.")
         cursor.execute(transfer_query)
+        rebuild_summaries(connection)
         connection.commit()
+        bump_data_version()
         logger.info("Data successfully transferred from staging_collision_data to entities_collision_data.")
     except mysql.connector.Error as err:
+        connection.rollback()
         logger.error(f"Error transferring data: {err}", exc_info=True)
     finally:
-        # Close the cursor and connection
+        # Close the cursor and return the connection to the pool
         cursor.close()
         connection.close()
 
 
-def run_entities():
+def get_next_batch_end(cursor, after_id, batch_size):
+    """
+    Find the upper collision_id of the next keyed batch of staging rows that are new to
+    the entities table or were corrected since their transfer.
+
+    Parameters:
+        cursor (mysql.connector.cursor.MySQLCursor): An open cursor.
+        after_id (int): The last collision_id of the previous batch, or None to start at the beginning.
+        batch_size (int): The number of rows in the batch.
+
+    Returns:
+        int: The highest collision_id of the batch, or None when nothing is left.
+    """
+    cursor.execute(
+        f"""
+        SELECT MAX(collision_id) FROM (
+            SELECT s.collision_id FROM staging_collision_data s
+            WHERE s.collision_id > %s AND {NEW_OR_CHANGED}
+            ORDER BY s.collision_id
+            LIMIT %s
+        ) AS batch
+        """,
+        (after_id if after_id is not None else -1, batch_size)
+    )
+    return cursor.fetchone()[0]
+
+
+def remove_entity_rows(cursor, collision_ids):
+    """
+    Delete the entity rows of the given collisions.
+
+    Parameters:
+        cursor (mysql.connector.cursor.MySQLCursor): An open cursor.
+        collision_ids (list): The collisions to delete.
+
+    Returns:
+        pd.DataFrame: The deleted rows, in ENTITY_COLUMNS order.
+    """
+    placeholders = ", ".join(["%s"] * len(collision_ids))
+    cursor.execute(
+        f"SELECT {', '.join(ENTITY_COLUMNS)} FROM entities_collision_data WHERE collision_id IN ({placeholders})",
+        collision_ids
+    )
+    removed = pd.DataFrame(cursor.fetchall(), columns=ENTITY_COLUMNS)
+    if len(removed):
+        cursor.execute(f"DELETE FROM entities_collision_data WHERE collision_id IN ({placeholders})", collision_ids)
+    return removed
+
+
+def transfer_data_in_batches(batch_size=DEFAULT_TRANSFER_BATCH_SIZE):
+    """
+    Transfer data from staging_collision_data to entities_collision_data in keyed batches.
+
+    The staging rows missing from the entities table or differing from their entity row
+    are walked in collision_id order, batch_size rows at a time. Each batch is read into
+    pandas, its borough, contributing factor and vehicle type columns are encoded as
+    dimension keys (see scripts/dimensions.py), and it is inserted and committed on its
+    own, together with any new dimension members and the batch's totals for the summary
+    tables behind the analysis views (see scripts/summaries.py). Locks and undo log are
+    therefore bounded by one batch, and readers of entities_collision_data are only
+    blocked for the duration of a batch. A collision corrected in staging, e.g. re-loaded
+    with new counters inside the incremental lookback, replaces its entity row in the
+    same transaction: the old row's totals are subtracted from the summaries and the new
+    row's added. Batches are picked by comparison with the entities table rather than
+    from the last transferred collision_id, so an interrupted transfer resumes with the
+    rows it did not commit, and rows arriving with lower IDs or a truncated entities
+    table are caught up.
+
+    Parameters:
+        batch_size (int): The number of staging rows copied per transaction.
+
+    Returns:
+        int: The number of rows transferred.
+    """
+    connection = get_db_connection()
+    cursor = connection.cursor(buffered=True)
+    last_id = None
+
+    try:
+        dictionaries = load_dictionaries(connection)
+
+        cursor.execute(f"SELECT COUNT(*) FROM staging_collision_data s WHERE {NEW_OR_CHANGED}")
+        total = cursor.fetchone()[0]
+        logger.info(f"Transferring {total} new or corrected rows to entities_collision_data "
+                    f"in batches of {batch_size}.")
+
+        transferred = 0
+        start = time.perf_counter()
+        while True:
+            batch_end = get_next_batch_end(cursor, last_id, batch_size)
+            if batch_end is None:
+                break
+
+            # Read the range, encode its dimension columns and insert the keyed rows
+            cursor.execute(STAGING_BATCH_QUERY, (last_id if last_id is not None else -1, batch_end))
+            batch = pd.DataFrame(cursor.fetchall(), columns=STAGING_TABLE_COLUMNS)
+            batch = encode_dimensions(connection, batch, dictionaries)
+            # Corrected collisions replace their entity rows
+            removed = remove_entity_rows(cursor, batch["collision_id"].tolist())
+            transferred += bulk_insert(connection, "entities_collision_data", batch, ENTITY_COLUMNS)["rows"]
+            # Add the batch's totals to the summary tables behind the analysis views,
+            # less those of the rows it replaced
+            deltas = summary_deltas(batch)
+            if len(removed):
+                deltas = net_deltas(deltas, summary_deltas(removed))
+                logger.info(f"Replaced {len(removed)} entity rows corrected in staging.")
+            apply_deltas(connection, deltas)
+            connection.commit()
+            bump_data_version()
+            last_id = batch_end
+
+            elapsed = time.perf_counter() - start
+            logger.info(f"Transferred {transferred}/{total} rows ({transferred / max(total, 1):.1%}, "
+                        f"{transferred / elapsed if elapsed > 0 else 0:,.0f} rows/sec), "
+                        f"committed through collision_id {batch_end}.")
+
+        logger.info(f"Batched transfer complete: {transferred} rows moved to entities_collision_data.")
+        return transferred
+    except mysql.connector.Error as err:
+        connection.rollback()
+        logger.error(f"Error transferring data after collision_id {last_id}: {err}", exc_info=True)
+        raise
+    finally:
+        # Close the cursor and return the connection to the pool
+        cursor.close()
+        connection.close()
+
+
+def run_entities(batch_size=DEFAULT_TRANSFER_BATCH_SIZE):
     """
     Run the ETL process to transfer data from staging to entities table.
+
+    Parameters:
+        batch_size (int): Transfer in keyed batches of this many rows, committing each one.
+            None runs the single INSERT ... SELECT transfer.
     """
     try:
         logger.info("Starting entities data processing...")
-        transfer_data_to_entities_table()
+        if batch_size:
+            transfer_data_in_batches(batch_size)
+        else:
+            transfer_data_to_entities_table()
         logger.info("Entities data processing completed successfully.")
     except Exception as e:
         logger.error(f"Entities data processing failed: {e}", exc_info=True)
@@ -132,5 +349,6 @@ def run_entities():
 
 
 if __name__ == "__main__":
+    configure_stage_logging(log_file)
     run_entities()
 
@@ -0,0 +1,130 @@
+import logging
+from functools import partial
+from config.db_config import get_backend, get_db_connection, get_pool_size
+from scripts.bulk_load import bulk_insert, combine_stats, DEFAULT_BATCH_SIZE
+from scripts.parallel_load import parallel_bulk_insert, partition_by_collision_id
+from scripts.query_cache import bump_data_version
+from scripts.dedup_index import EMPTY_INDEX, filter_unseen, index_path, load_index, record_ids
+from scripts.watermark import (
+    get_watermark, set_watermark, filter_new_rows, advance_watermark, DEFAULT_LOOKBACK_DAYS
+)
+
+logger = logging.getLogger("LOAD_RUNNER")
+
+
+def load_chunks(chunks, table_name, columns, strategy="executemany", batch_size=DEFAULT_BATCH_SIZE,
+                workers=1, split_by_collision_id=False, incremental=False,
+                lookback_days=DEFAULT_LOOKBACK_DAYS, dedup=False):
+    """
+    Insert a stream of preprocessed chunks into a table, sequentially or in parallel.
+
+    Sequential loads run in one transaction on one connection. Parallel loads insert
+    partitions concurrently and commit all workers together (see parallel_bulk_insert).
+
+    In incremental mode only rows above the table's watermark (or within lookback_days
+    of it) are loaded, with upsert semantics so late-arriving corrections overwrite the
+    stored rows. The watermark is then advanced to the highest crash_date and
+    collision_id loaded: in the same transaction for sequential loads, and right after
+    the commit for parallel loads, where a rerun after a failure simply upserts the
+    same rows again.
+
+    With dedup set, rows whose collision_id is in the table's seen-ID index (see
+    scripts/dedup_index.py), or repeats one loaded earlier in the run, are dropped before
+    they reach the database, so overlapping inputs no longer abort the load on a
+    duplicate primary key. The loaded IDs are added to the index after the commit.
+
+    Parameters:
+        chunks (iterable): Preprocessed DataFrames to insert.
+        table_name (str): The name of the database table to insert data into.
+        columns (list): The ordered list of table columns.
+        strategy (str): The bulk load strategy, 'executemany' or 'load_data'.
+        batch_size (int): The number of rows sent to the database per round trip.
+        workers (int): The number of concurrent insert workers, each with its own connection.
+        split_by_collision_id (bool): Split every chunk into one collision_id range per worker.
+        incremental (bool): Load only new rows and upsert them.
+        lookback_days (int): How far behind the watermark date rows are reloaded.
+        dedup (bool): Skip rows whose collision_id was already loaded into the table.
+
+    Returns:
+        dict: Load statistics reported by the bulk load engine.
+    """
+    if dedup and incremental:
+        raise ValueError("dedup cannot be combined with incremental loads, which upsert corrections to existing rows.")
+    if workers > 1 and get_backend() == "sqlite":
+        raise ValueError("SQLite allows one writer at a time; load with workers=1 on the sqlite backend.")
+    if workers > 1 and workers + 1 > get_pool_size():
+        # Extra workers would wait DB_POOL_TIMEOUT for a connection, then fail and roll back the whole load
+        raise ValueError(f"workers={workers} needs {workers + 1} pooled connections (one per worker plus the "
+                         f"caller's), but DB_POOL_SIZE is {get_pool_size()}. Raise DB_POOL_SIZE or use fewer workers.")
+    connect = partial(get_db_connection, allow_local_infile=(strategy == "load_data"))
+
+    watermark = None
+    if incremental:
+        connection = get_db_connection()
+        try:
+            watermark = get_watermark(connection, table_name)
+        finally:
+            connection.close()
+        logger.info(f"Incremental load into {table_name} from watermark {watermark}.")
+
+        # Keep only the delta and record how far it reaches
+        loaded = {"watermark": watermark}
+
+        def observe(chunk):
+            loaded["watermark"] = advance_watermark(loaded["watermark"], chunk)
+            return chunk
+
+        chunks = (observe(filter_new_rows(chunk, watermark, lookback_days)) for chunk in chunks)
+
+    if dedup:
+        # Drop already-loaded collision_ids and remember the ones this run loads
+        dedup_path = index_path(table_name)
+        seen_index = load_index(dedup_path)
+        kept = {"ids": EMPTY_INDEX}
+
+        def drop_seen(chunk):
+            chunk, kept["ids"] = filter_unseen(chunk, seen_index, kept["ids"])
+            return chunk
+
+        chunks = (drop_seen(chunk) for chunk in chunks)
+
+    if workers > 1:
+        if split_by_collision_id:
+            chunks = (part for chunk in chunks for part in partition_by_collision_id(chunk, workers))
+
+        # Insert the partitions concurrently; all workers commit or roll back together
+        stats = parallel_bulk_insert(connect, table_name, chunks, columns, workers, strategy, batch_size,
+                                     upsert=incremental)
+        if incremental:
+            connection = get_db_connection()
+            try:
+                set_watermark(connection, table_name, loaded["watermark"])
+                connection.commit()
+            finally:
+                connection.close()
+    else:
+        # Establish a database connection
+        connection = connect()
+
+        try:
+            # Insert each chunk in batches and commit the transaction
+            stats = combine_stats([
+                bulk_insert(connection, table_name, chunk, columns, strategy, batch_size, upsert=incremental)
+                for chunk in chunks
+            ])
+            if incremental:
+                set_watermark(connection, table_name, loaded["watermark"])
+            connection.commit()
+        except Exception:
+            # Leave nothing half-loaded on the connection handed back to the pool
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    if dedup:
+        record_ids(dedup_path, kept["ids"])
+
+    # Cached analysis results are stale once new rows are committed
+    bump_data_version()
+    return stats
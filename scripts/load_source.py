@@ -1,51 +1,48 @@
 import pandas as pd
-import mysql.connector
-from dotenv import load_dotenv
 import os
-import json
 import logging
-
-# Load environment variables
-load_dotenv()
-
-# Configure logging
+from config.stage_logging import configure_stage_logging
+from scripts.bulk_load import DEFAULT_BATCH_SIZE
+from scripts.streaming import iter_csv_chunks
+from scripts.schema import SOURCE_COLUMNS, cast_integer_columns, dtypes_for
+from scripts.load_runner import load_chunks
+from scripts.watermark import DEFAULT_LOOKBACK_DAYS
+
+# Log file of the command-line runs (see config/stage_logging.py)
 log_file = os.path.join("logs", "source_pipeline.log")
 
-logging.basicConfig(
-    filename=log_file,
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger("SOURCE_PIPELINE")
 
-# Database connection details from .env file
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
+# A serialized location object: '{...}' with nothing but whitespace around the braces
+LOCATION_OBJECT_PATTERN = r"^\s*\{.*\}\s*$"
+
+# Numeric latitude/longitude members, quoted or not. Both JSON ("latitude": "40.1") and
+# the Python-repr form found in the API export ('latitude': '40.1') are accepted.
+COORDINATE_PATTERN = r"""["']{key}["']\s*:\s*["']?(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)["']?\s*[,}}]"""
 
 
-def connect_to_db():
+def extract_coordinates(locations):
     """
-    Establish a connection to the MySQL database.
+    Extract latitude and longitude from a column of serialized location objects.
+
+    The whole column is parsed with vectorized regular expressions instead of decoding
+    each value separately. Null locations, values that are not a serialized object and
+    objects without a numeric latitude/longitude yield NaN.
+
+    Parameters:
+        locations (pd.Series): The 'location' column.
 
     Returns:
-        mysql.connector.connection.MySQLConnection: A connection object to interact with the database.
+        pd.DataFrame: A 'latitude' and a 'longitude' float column aligned with the input.
     """
-    try:
-        connection = mysql.connector.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            database=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD
-        )
-        logger.info("Database connection successful.")
-        return connection
-    except mysql.connector.Error as err:
-        logger.error(f"Database connection error: {err}")
-        raise
+    text = locations.astype("string")
+    is_object = text.str.match(LOCATION_OBJECT_PATTERN).fillna(False).astype(bool)
+
+    coordinates = pd.DataFrame(index=locations.index)
+    for key in ('latitude', 'longitude'):
+        values = text.str.extract(COORDINATE_PATTERN.format(key=key), expand=False)
+        coordinates[key] = pd.to_numeric(values, errors='coerce').where(is_object).astype('float64')
+    return coordinates
 
 
 def preprocess_location(data):
@@ -57,129 +54,85 @@ def preprocess_location(data):
 
     Returns:
         pd.DataFrame: The DataFrame with the 'location' field split into latitude and longitude.
+            Missing or malformed locations give NaN, which is loaded as NULL.
     """
-    def extract_coordinates(location):
-        if pd.isnull(location):
-            return None, None
-        try:
-            location_json = json.loads(location)
-            return location_json.get('latitude'), location_json.get('longitude')
-        except (json.JSONDecodeError, KeyError):
-            return None, None
-
-    # Apply the extraction function to the 'location' column
-    data[['latitude', 'longitude']] = data['location'].apply(
-        lambda loc: pd.Series(extract_coordinates(loc))
-    )
+    coordinates = extract_coordinates(data['location'])
+    data['latitude'] = coordinates['latitude']
+    data['longitude'] = coordinates['longitude']
 
     # Drop the original 'location' field
     data.drop(columns=['location'], inplace=True)
     return data
 
 
-def load_data_to_db(csv_file_path, table_name):
+def load_data_to_db(csv_file_path, table_name, strategy="executemany", batch_size=DEFAULT_BATCH_SIZE,
+                    chunk_size=None, memory_limit_mb=None, workers=1, incremental=False,
+                    lookback_days=DEFAULT_LOOKBACK_DAYS, dedup=False):
     """
     Load data from a CSV file into a MySQL database table.
 
+    With chunk_size or memory_limit_mb set, the file is streamed: each chunk is read,
+    preprocessed and inserted before the next one is read, so peak memory stays bounded
+    regardless of file size. All chunks are committed in a single transaction.
+
+    With workers > 1, partitions (the streamed chunks, or collision_id ranges of the
+    whole file) are inserted concurrently, each worker on its own connection. Either
+    every partition is committed or, if any worker fails, none is.
+
+    With incremental set, only rows newer than the table's watermark in etl_watermarks
+    (plus a lookback window for late corrections) are loaded, using upserts, and the
+    watermark is advanced afterwards.
+
+    With dedup set, rows whose collision_id was already loaded into the table (per its
+    seen-ID index in data/index) are dropped before the insert.
+
     Parameters:
         csv_file_path (str): The path to the CSV file containing the data.
         table_name (str): The name of the database table to insert data into.
+        strategy (str): The bulk load strategy, 'executemany' or 'load_data'.
+        batch_size (int): The number of rows sent to the database per round trip.
+        chunk_size (int): The number of CSV rows read and processed at a time.
+        memory_limit_mb (float): A memory ceiling for in-flight rows, used to derive the chunk size.
+        workers (int): The number of concurrent insert workers, each with its own connection.
+        incremental (bool): Load only rows above the watermark and upsert them.
+        lookback_days (int): How far behind the watermark date rows are reloaded in incremental mode.
+        dedup (bool): Skip rows whose collision_id was already loaded into the table.
+
+    Returns:
+        dict: Load statistics reported by the bulk load engine.
     """
     try:
         logger.info(f"Reading data from {csv_file_path}")
-        data = pd.read_csv(csv_file_path)
-
-        # Replace NaN values with None for database compatibility
-        data = data.where(pd.notnull(data), None)
-
-        # Preprocess the 'location' field
-        data = preprocess_location(data)
-
-        # Establish a database connection
-        connection = connect_to_db()
-        cursor = connection.cursor()
-
-        # Prepare the SQL INSERT statement
-        insert_query = f"""
-            INSERT INTO {table_name} (
-                collision_id,
-                crash_date,
-                crash_time,
-                borough,
-                zip_code,
-                latitude,
-                longitude,
-                on_street_name,
-                cross_street_name,
-                off_street_name,
-                number_of_persons_injured,
-                number_of_persons_killed,
-                number_of_pedestrians_injured,
-                number_of_pedestrians_killed,
-                number_of_cyclist_injured,
-                number_of_cyclist_killed,
-                number_of_motorist_injured,
-                number_of_motorist_killed,
-                contributing_factor_vehicle_1,
-                contributing_factor_vehicle_2,
-                contributing_factor_vehicle_3,
-                contributing_factor_vehicle_4,
-                contributing_factor_vehicle_5,
-                vehicle_type_code1,
-                vehicle_type_code2,
-                vehicle_type_code_3,
-                vehicle_type_code_4,
-                vehicle_type_code_5
-            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-
-        # Iterate through the DataFrame and insert rows into the database
-        for _, row in data.iterrows():
-            cursor.execute(insert_query, (
-                row.get('collision_id'),
-                row.get('crash_date'),
-                row.get('crash_time'),
-                row.get('borough'),
-                row.get('zip_code'),
-                row.get('latitude'),
-                row.get('longitude'),
-                row.get('on_street_name'),
-                row.get('cross_street_name'),
-                row.get('off_street_name'),
-                row.get('number_of_persons_injured'),
-                row.get('number_of_persons_killed'),
-                row.get('number_of_pedestrians_injured'),
-                row.get('number_of_pedestrians_killed'),
-                row.get('number_of_cyclist_injured'),
-                row.get('number_of_cyclist_killed'),
-                row.get('number_of_motorist_injured'),
-                row.get('number_of_motorist_killed'),
-                row.get('contributing_factor_vehicle_1'),
-                row.get('contributing_factor_vehicle_2'),
-                row.get('contributing_factor_vehicle_3'),
-                row.get('contributing_factor_vehicle_4'),
-                row.get('contributing_factor_vehicle_5'),
-                row.get('vehicle_type_code1'),
-                row.get('vehicle_type_code2'),
-                row.get('vehicle_type_code_3'),
-                row.get('vehicle_type_code_4'),
-                row.get('vehicle_type_code_5')
-            ))
-
-        # Commit the transaction and close the connection
-        connection.commit()
-        cursor.close()
-        connection.close()
-        logger.info(f"Data successfully loaded into table {table_name}.")
-    
+
+        # Read -> preprocess pipeline with compact dtypes; NaN values are converted to None by the bulk load engine
+        chunks = iter_csv_chunks(csv_file_path, chunk_size, memory_limit_mb, dtype=dtypes_for())
+        chunks = (preprocess_location(cast_integer_columns(chunk)) for chunk in chunks)
+
+        # Insert the chunks and commit
+        stats = load_chunks(chunks, table_name, SOURCE_COLUMNS, strategy, batch_size, workers,
+                            split_by_collision_id=(chunk_size is None and memory_limit_mb is None),
+                            incremental=incremental, lookback_days=lookback_days, dedup=dedup)
+        logger.info(f"Data successfully loaded into table {table_name} ({stats['rows_per_sec']:,.0f} rows/sec).")
+        return stats
+
     except Exception as e:
         logger.error(f"Error loading data to database: {e}", exc_info=True)
         raise
 
 
-def run_source():
+def run_source(strategy="executemany", batch_size=DEFAULT_BATCH_SIZE, chunk_size=None, memory_limit_mb=None,
+               workers=1, incremental=False, dedup=False):
     """
     Run the full source data extraction and loading process.
+
+    Parameters:
+        strategy (str): The bulk load strategy, 'executemany' or 'load_data'.
+        batch_size (int): The number of rows sent to the database per round trip.
+        chunk_size (int): Stream the CSV in chunks of this many rows.
+        memory_limit_mb (float): Stream the CSV in chunks sized to this memory ceiling.
+        workers (int): Insert partitions concurrently on this many connections.
+        incremental (bool): Load only rows newer than the table's watermark, with upserts.
+        dedup (bool): Skip rows whose collision_id was already loaded, per the table's seen-ID index.
     """
     try:
         logger.info("Starting source data processing...")
@@ -189,7 +142,8 @@ def run_source():
         table_name = "source_collision_data"
 
         # Run the ETL process
-        load_data_to_db(csv_file_path, table_name)
+        load_data_to_db(csv_file_path, table_name, strategy, batch_size, chunk_size, memory_limit_mb, workers,
+                        incremental, dedup=dedup)
 
         logger.info("Source data processing completed successfully.")
     except Exception as e:
@@ -198,6 +152,7 @@ def run_source():
 
 
 if __name__ == "__main__":
+    configure_stage_logging(log_file)
     run_source()
 
 
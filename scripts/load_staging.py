@@ -1,58 +1,29 @@
 import pandas as pd
-import mysql.connector
-from dotenv import load_dotenv
 import os
 import logging
-
-# Load environment variables
-load_dotenv()
-
-# Configure logging
+from config.stage_logging import configure_stage_logging
+from scripts.bulk_load import DEFAULT_BATCH_SIZE
+from scripts.streaming import iter_csv_chunks
+from scripts.columnar import intermediate_format, is_parquet, iter_parquet_chunks
+from scripts.schema import STAGING_COLUMNS, STAGING_TABLE_COLUMNS, cast_integer_columns, dtypes_for
+from scripts.geo import add_grid_cells
+from scripts.load_runner import load_chunks
+from scripts.watermark import DEFAULT_LOOKBACK_DAYS
+
+# Log file of the command-line runs (see config/stage_logging.py)
 log_file = os.path.join("logs", "staging_pipeline.log")
 
-logging.basicConfig(
-    filename=log_file,
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger("STAGING_PIPELINE")
 
-# Database connection details from .env file
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_NAME = os.getenv("DB_NAME")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-
-
-def connect_to_db():
-    """
-    Establish a connection to the MySQL database.
-
-    Returns:
-        mysql.connector.connection.MySQLConnection: A connection object to interact with the database.
-    """
-    try:
-        connection = mysql.connector.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            database=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD
-        )
-        logger.info("Database connection successful.")
-        return connection
-    except mysql.connector.Error as err:
-        logger.error(f"Database connection error: {err}", exc_info=True)
-        raise
-
 
 def preprocess_data(data, columns):
     """
     Preprocess data for MySQL compatibility:
     - Ensures all required columns are present.
-    - Replaces NaN or empty strings with None.
-    - Converts data to Python native types.
+    - Orders the columns to match the table schema.
+
+    NaN values are replaced with None and converted to Python native types batch by
+    batch in the bulk load engine, so no full-frame object copy is made here.
 
     Parameters:
         data (pd.DataFrame): The raw data.
@@ -70,85 +41,106 @@ def preprocess_data(data, columns):
     # Ensure the DataFrame's columns match the table schema order
     data = data[columns]
 
-    # Replace NaN and empty strings with None
-    data = data.where(pd.notnull(data), None)
-
-    # Convert all values to Python native types
-    data = data.astype(object).where(pd.notnull(data), None)
-
     # Debug: Log a sample of the processed data
     logger.info(f"Preprocessed Data Sample:\n{data.head()}")
 
     return data
 
 
-def load_data_to_staging(csv_file_path, table_name):
+def load_data_to_staging(csv_file_path, table_name, strategy="executemany", batch_size=DEFAULT_BATCH_SIZE,
+                         chunk_size=None, memory_limit_mb=None, workers=1, incremental=False,
+                         lookback_days=DEFAULT_LOOKBACK_DAYS, dedup=False):
     """
-    Load data from a CSV file into a MySQL staging table.
+    Load data from a CSV file or Parquet dataset into a MySQL staging table.
+
+    Parquet input (a *.parquet file or a partitioned dataset directory) is read with
+    column projection: only the staging columns are decoded, with their stored dtypes.
+
+    With chunk_size or memory_limit_mb set, the file is streamed: each chunk is read,
+    preprocessed and inserted before the next one is read, so peak memory stays bounded
+    regardless of file size. All chunks are committed in a single transaction.
+
+    With workers > 1, partitions (the streamed chunks, or collision_id ranges of the
+    whole file) are inserted concurrently, each worker on its own connection. Either
+    every partition is committed or, if any worker fails, none is.
+
+    With incremental set, only rows newer than the table's watermark in etl_watermarks
+    (plus a lookback window for late corrections) are loaded, using upserts, and the
+    watermark is advanced afterwards.
+
+    With dedup set, rows whose collision_id was already loaded into the table (per its
+    seen-ID index in data/index) are dropped before the insert.
+
+    Every row gets the grid cell of its latitude/longitude (see scripts/geo.py).
 
     Parameters:
-        csv_file_path (str): The path to the CSV file containing the data.
+        csv_file_path (str): The path to the CSV file or Parquet dataset containing the data.
         table_name (str): The name of the staging database table to insert data into.
+        strategy (str): The bulk load strategy, 'executemany' or 'load_data'.
+        batch_size (int): The number of rows sent to the database per round trip.
+        chunk_size (int): The number of rows read and processed at a time.
+        memory_limit_mb (float): A memory ceiling for in-flight rows, used to derive the chunk size.
+        workers (int): The number of concurrent insert workers, each with its own connection.
+        incremental (bool): Load only rows above the watermark and upsert them.
+        lookback_days (int): How far behind the watermark date rows are reloaded in incremental mode.
+        dedup (bool): Skip rows whose collision_id was already loaded into the table.
+
+    Returns:
+        dict: Load statistics reported by the bulk load engine.
     """
     try:
         logger.info(f"Reading data from {csv_file_path}")
 
-        # Columns expected in the staging table
-        columns = [
-            'collision_id', 'crash_date', 'crash_time', 'borough', 'zip_code',
-            'latitude', 'longitude', 'on_street_name', 'cross_street_name',
-            'off_street_name', 'number_of_persons_injured', 'number_of_persons_killed',
-            'number_of_pedestrians_injured', 'number_of_pedestrians_killed',
-            'number_of_cyclist_injured', 'number_of_cyclist_killed',
-            'number_of_motorist_injured', 'number_of_motorist_killed',
-            'contributing_factor_vehicle_1', 'contributing_factor_vehicle_2',
-            'vehicle_type_code1', 'vehicle_type_code2'
-        ]
-
-        # Read the CSV file
-        data = pd.read_csv(csv_file_path)
-
-        # Preprocess the data
-        data = preprocess_data(data, columns)
-
-        # Establish a database connection
-        connection = connect_to_db()
-        cursor = connection.cursor()
-
-        # Prepare the SQL INSERT statement dynamically
-        insert_query = f"""
-            INSERT INTO {table_name} ({', '.join(columns)})
-            VALUES ({', '.join(['%s'] * len(columns))})
-        """
-
-        # Insert rows into the database
-        for _, row in data.iterrows():
-            cursor.execute(insert_query, tuple(row))
-
-        # Commit the transaction and close the connection
-        connection.commit()
-        cursor.close()
-        connection.close()
-        logger.info(f"Data successfully loaded into table {table_name}.")
-    
+        # Columns expected in the staging table, and the subset read from the cleaned file
+        columns = STAGING_TABLE_COLUMNS
+        file_columns = STAGING_COLUMNS
+
+        # Read -> preprocess pipeline, parsing only the staging columns with compact dtypes
+        if is_parquet(csv_file_path):
+            chunks = iter_parquet_chunks(csv_file_path, file_columns, chunk_size, memory_limit_mb)
+        else:
+            chunks = iter_csv_chunks(csv_file_path, chunk_size, memory_limit_mb,
+                                     usecols=lambda column: column in file_columns, dtype=dtypes_for(file_columns))
+        chunks = (preprocess_data(add_grid_cells(cast_integer_columns(chunk)), columns) for chunk in chunks)
+
+        # Insert the chunks and commit
+        stats = load_chunks(chunks, table_name, columns, strategy, batch_size, workers,
+                            split_by_collision_id=(chunk_size is None and memory_limit_mb is None),
+                            incremental=incremental, lookback_days=lookback_days, dedup=dedup)
+        logger.info(f"Data successfully loaded into table {table_name} ({stats['rows_per_sec']:,.0f} rows/sec).")
+        return stats
+
     except Exception as e:
         logger.error(f"Error loading data to staging: {e}", exc_info=True)
         raise
 
 
-def run_staging():
+def run_staging(strategy="executemany", batch_size=DEFAULT_BATCH_SIZE, chunk_size=None, memory_limit_mb=None,
+                workers=1, incremental=False, dedup=False):
     """
     Run the full staging data extraction and loading process.
+
+    Parameters:
+        strategy (str): The bulk load strategy, 'executemany' or 'load_data'.
+        batch_size (int): The number of rows sent to the database per round trip.
+        chunk_size (int): Stream the input in chunks of this many rows.
+        memory_limit_mb (float): Stream the input in chunks sized to this memory ceiling.
+        workers (int): Insert partitions concurrently on this many connections.
+        incremental (bool): Load only rows newer than the table's watermark, with upserts.
+        dedup (bool): Skip rows whose collision_id was already loaded, per the table's seen-ID index.
     """
     try:
         logger.info("Starting staging data processing...")
 
         # Define file paths and table name
-        csv_file_path = "../data/output/cleaned_api_data.csv"  # Adjust path if needed
+        csv_file_path = "./data/output/cleaned_api_data.csv"
+        if intermediate_format() == "parquet":
+            csv_file_path = "./data/output/cleaned_api_data.parquet"
         table_name = "staging_collision_data"
 
         # Run the ETL process
-        load_data_to_staging(csv_file_path, table_name)
+        load_data_to_staging(csv_file_path, table_name, strategy, batch_size, chunk_size, memory_limit_mb, workers,
+                             incremental, dedup=dedup)
 
         logger.info("Staging data processing completed successfully.")
     except Exception as e:
@@ -157,6 +149,7 @@ def run_staging():
 
 
 if __name__ == "__main__":
+    configure_stage_logging(log_file)
     run_staging()
 
 
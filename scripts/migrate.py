@@ -0,0 +1,265 @@
+import os
+import re
+import hashlib
+import logging
+import argparse
+import mysql.connector
+from config.db_config import get_backend, get_db_connection
+from config.stage_logging import configure_stage_logging
+from scripts.geo import backfill_grid_cells
+from scripts.query_cache import bump_data_version
+from scripts.summaries import rebuild_summaries, summary_for_view, summary_query
+
+# Log file of the command-line runs (see config/stage_logging.py)
+log_file = os.path.join("logs", "migrate.log")
+
+logger = logging.getLogger("MIGRATE")
+
+# Numbered .sql files, applied in file name order
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# Bookkeeping table: one row per applied migration
+MIGRATIONS_TABLE_QUERY = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR(255) PRIMARY KEY,
+        checksum CHAR(64) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# MySQL errors meaning a statement's change is already in place. MySQL has no
+# CREATE INDEX IF NOT EXISTS, and DDL commits implicitly, so a migration interrupted
+# half way is rerun from the top and these errors are skipped.
+ALREADY_APPLIED_ERRORS = {
+    1050: "table already exists",
+    1060: "duplicate column name",
+    1061: "duplicate key name",
+    1091: "column or key to drop does not exist",
+}
+
+# Index the aggregation behind each analysis view is expected to read instead of scanning
+# entities_collision_data. cyclist_pedestrian_safety sums four counters over every row and
+# is left to a full scan.
+VIEW_INDEXES = {
+    "high_risk_areas": ["idx_borough_street"],
+    "collision_severity_trends": ["idx_crash_date", "idx_borough_date"],
+    "contributing_factors_analysis": ["idx_contributing_factor"],
+    "time_based_collision_patterns": ["idx_crash_time"],
+    "policy_effectiveness": ["idx_borough_date"],
+    "weekly_collision_trends": ["idx_borough_date"],
+    "monthly_collision_trends": ["idx_borough_date"],
+}
+
+
+def split_statements(sql):
+    """
+    Split a SQL script into statements.
+
+    '--' line comments and '/* */' block comments are removed, and statements are
+    separated by ';'. Scripts must not contain ';' or '--' inside string literals.
+
+    Parameters:
+        sql (str): The script.
+
+    Returns:
+        list: The non-empty statements, without their trailing ';'.
+    """
+    sql = re.sub(r"/\*.*?\*/", "", sql, flags=re.S)
+    sql = re.sub(r"--[^\n]*", "", sql)
+    return [statement.strip() for statement in sql.split(";") if statement.strip()]
+
+
+def list_migrations(migrations_dir=MIGRATIONS_DIR):
+    """
+    Read the migration scripts.
+
+    Parameters:
+        migrations_dir (str): The directory of numbered .sql files.
+
+    Returns:
+        list: (version, checksum, sql) tuples in apply order. The version is the file
+            name without '.sql', the checksum the sha256 of its content.
+    """
+    migrations = []
+    for name in sorted(os.listdir(migrations_dir)):
+        if name.endswith(".sql"):
+            with open(os.path.join(migrations_dir, name), encoding="utf-8") as handle:
+                sql = handle.read()
+            migrations.append((name[:-len(".sql")], hashlib.sha256(sql.encode()).hexdigest(), sql))
+    return migrations
+
+
+def applied_migrations(connection):
+    """
+    Read the migrations already applied to the database.
+
+    Parameters:
+        connection (mysql.connector.connection.MySQLConnection): An open database connection.
+
+    Returns:
+        dict: Version to the checksum it was applied with.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute(MIGRATIONS_TABLE_QUERY)
+        cursor.execute("SELECT version, checksum FROM schema_migrations")
+        return dict(cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+def apply_migration(connection, version, checksum, sql):
+    """
+    Run the statements of one migration and record it as applied.
+
+    Statements whose change is already in place (see ALREADY_APPLIED_ERRORS) are
+    skipped, so a migration that failed part way can simply be applied again.
+
+    Parameters:
+        connection (mysql.connector.connection.MySQLConnection): An open database connection.
+        version (str): The migration name.
+        checksum (str): The sha256 of the script.
+        sql (str): The script.
+    """
+    cursor = connection.cursor()
+    try:
+        for statement in split_statements(sql):
+            try:
+                cursor.execute(statement)
+            except mysql.connector.Error as err:
+                if err.errno not in ALREADY_APPLIED_ERRORS:
+                    raise
+                logger.info(f"{version}: skipped a statement, {ALREADY_APPLIED_ERRORS[err.errno]} ({err.msg}).")
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, checksum) VALUES (%s, %s)",
+            (version, checksum)
+        )
+        connection.commit()
+    finally:
+        cursor.close()
+
+
+def migrate(connection=None, migrations_dir=MIGRATIONS_DIR):
+    """
+    Apply every migration that has not been applied yet, in order.
+
+    Running it again is a no-op. A migration whose script changed after it was applied
+    is an error: add a new migration instead of editing an applied one.
+
+    Parameters:
+        connection (mysql.connector.connection.MySQLConnection): An open database connection.
+            A new one is opened (and closed) when omitted.
+        migrations_dir (str): The directory of numbered .sql files.
+
+    Returns:
+        list: The versions applied by this run.
+    """
+    owns_connection = connection is None
+    connection = connection or get_db_connection()
+    try:
+        applied = applied_migrations(connection)
+        newly_applied = []
+        for version, checksum, sql in list_migrations(migrations_dir):
+            if version in applied:
+                if applied[version] != checksum:
+                    raise ValueError(f"Migration {version} was changed after it was applied.")
+                continue
+            logger.info(f"Applying migration {version}...")
+            apply_migration(connection, version, checksum, sql)
+            newly_applied.append(version)
+        logger.info(f"Schema is up to date ({len(newly_applied)} migrations applied).")
+        return newly_applied
+    finally:
+        if owns_connection:
+            connection.close()
+
+
+def explain_query(connection, query):
+    """
+    Find how a query reads entities_collision_data.
+
+    Parameters:
+        connection (mysql.connector.connection.MySQLConnection): An open database connection.
+        query (str): A SELECT over entities_collision_data.
+
+    Returns:
+        dict: The 'type' (access type, 'ALL' for a full table scan) and 'key' (index
+            used, or None) of the EXPLAIN row for entities_collision_data.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN {query}")
+        columns = [column[0] for column in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+    for row in rows:
+        if row["table"] == "entities_collision_data":
+            return {"type": row["type"], "key": row["key"]}
+    raise ValueError("The query does not read entities_collision_data.")
+
+
+def check_view_indexes(connection, view_indexes=VIEW_INDEXES):
+    """
+    Check with EXPLAIN that the aggregation behind each analysis view reads its index.
+
+    The views read summary tables; what scans entities_collision_data is the query that
+    rebuilds each summary (see scripts/summaries.py), so that is the query explained.
+
+    Parameters:
+        connection (mysql.connector.connection.MySQLConnection): An open database connection.
+        view_indexes (dict): View name to the indexes it may use.
+
+    Returns:
+        dict: View name to its 'type', 'key' and 'ok' (an expected index is used).
+    """
+    results = {}
+    for view_name, indexes in view_indexes.items():
+        plan = explain_query(connection, summary_query(summary_for_view(view_name)))
+        plan["ok"] = plan["key"] in indexes
+        if not plan["ok"]:
+            logger.warning(f"View {view_name} aggregates entities_collision_data with access type {plan['type']} "
+                           f"and key {plan['key']}, expected one of {indexes}.")
+        results[view_name] = plan
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the database schema migrations.")
+    parser.add_argument("--check", action="store_true",
+                        help="Also EXPLAIN the analysis views and fail if one does not use its index.")
+    parser.add_argument("--rebuild-summaries", action="store_true",
+                        help="Recompute the summary tables behind the views from entities_collision_data.")
+    parser.add_argument("--backfill-grid-cells", action="store_true",
+                        help="Compute the grid cell of staging and entities rows loaded before it existed.")
+    args = parser.parse_args()
+    if args.check and get_backend() != "mysql":
+        parser.error("--check reads MySQL's EXPLAIN output and needs DB_BACKEND=mysql.")
+
+    connection = get_db_connection()
+    try:
+        for version in migrate(connection):
+            print(f"applied {version}")
+        if args.rebuild_summaries:
+            rebuild_summaries(connection)
+            connection.commit()
+            bump_data_version()
+            print("rebuilt the summary tables")
+        if args.backfill_grid_cells:
+            for table_name in ("staging_collision_data", "entities_collision_data"):
+                print(f"backfilled {backfill_grid_cells(connection, table_name)} grid cells of {table_name}")
+            connection.commit()
+            bump_data_version()
+        if args.check:
+            results = check_view_indexes(connection)
+            for view_name, plan in results.items():
+                print(f"{view_name:32} {plan['key'] or plan['type']:24} {'ok' if plan['ok'] else 'NOT INDEXED'}")
+            if not all(plan["ok"] for plan in results.values()):
+                raise SystemExit(1)
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    configure_stage_logging(log_file)
+    main()
@@ -31,7 +31,7 @@ CREATE TABLE IF NOT EXISTS source_collision_data (
 );
 
 -- staging table
-CREATE TABLE staging_collision_data (
+CREATE TABLE IF NOT EXISTS staging_collision_data (
     collision_id BIGINT PRIMARY KEY,                -- Unique identifier for each collision
     crash_date DATETIME NOT NULL,                   -- Date of the crash
     crash_time TIME,                                -- Time of the crash
@@ -56,12 +56,30 @@ CREATE TABLE staging_collision_data (
     vehicle_type_code2 VARCHAR(255)                 -- Type of vehicle 2
 );
 
--- entities_collision_data
-CREATE TABLE staging_collision_data (
+-- dimension tables: one row per distinct text value, referenced by integer key from
+-- entities_collision_data. Values compare byte for byte (utf8mb4_bin), as in pandas, so
+-- 'Sedan' and 'SEDAN' get separate keys.
+CREATE TABLE IF NOT EXISTS dim_borough (
+    borough_id SMALLINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,                 -- Surrogate key
+    borough VARCHAR(50) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL UNIQUE -- Borough name
+);
+
+CREATE TABLE IF NOT EXISTS dim_contributing_factor (
+    contributing_factor_id SMALLINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,                    -- Surrogate key
+    contributing_factor VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL UNIQUE -- Contributing factor
+);
+
+CREATE TABLE IF NOT EXISTS dim_vehicle_type (
+    vehicle_type_id MEDIUMINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,                   -- Surrogate key
+    vehicle_type VARCHAR(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL UNIQUE -- Vehicle type (free text)
+);
+
+-- entities table: the staging columns, with the low-cardinality text stored as dimension keys
+CREATE TABLE IF NOT EXISTS entities_collision_data (
     collision_id BIGINT PRIMARY KEY,                -- Unique identifier for each collision
-    crash_date DATETIME NOT NULL,                       -- Date of the crash
+    crash_date DATETIME NOT NULL,                   -- Date of the crash
     crash_time TIME,                                -- Time of the crash
-    borough VARCHAR(50),                            -- Borough where the crash occurred
+    borough_id SMALLINT UNSIGNED,                   -- Borough (dim_borough)
     zip_code VARCHAR(10),                           -- ZIP code of the crash location
     latitude DECIMAL(10, 7),                        -- Latitude of the crash location
     longitude DECIMAL(10, 7),                       -- Longitude of the crash location
@@ -76,11 +94,16 @@ CREATE TABLE staging_collision_data (
     number_of_cyclist_killed INT DEFAULT 0,         -- Number of cyclists killed
     number_of_motorist_injured INT DEFAULT 0,       -- Number of motorists injured
     number_of_motorist_killed INT DEFAULT 0,        -- Number of motorists killed
-    contributing_factor_vehicle_1 VARCHAR(255),     -- Contributing factor of vehicle 1
-    contributing_factor_vehicle_2 VARCHAR(255),     -- Contributing factor of vehicle 2
-    vehicle_type_code1 VARCHAR(255),                -- Type of vehicle 1
-    vehicle_type_code2 VARCHAR(255)                 -- Type of vehicle 2
+    contributing_factor_vehicle_1_id SMALLINT UNSIGNED, -- Contributing factor of vehicle 1 (dim_contributing_factor)
+    contributing_factor_vehicle_2_id SMALLINT UNSIGNED, -- Contributing factor of vehicle 2 (dim_contributing_factor)
+    vehicle_type_code1_id MEDIUMINT UNSIGNED,       -- Type of vehicle 1 (dim_vehicle_type)
+    vehicle_type_code2_id MEDIUMINT UNSIGNED        -- Type of vehicle 2 (dim_vehicle_type)
 );
 
-
-
+-- high-water marks for incremental loads
+CREATE TABLE IF NOT EXISTS etl_watermarks (
+    stage VARCHAR(64) PRIMARY KEY,                  -- Stage name (the loaded table)
+    last_crash_date DATETIME,                       -- Latest crash date loaded
+    last_collision_id BIGINT,                       -- Highest collision_id loaded
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP -- Last time the mark moved
+);
@@ -0,0 +1,171 @@
+-- High Risk Areas View
+-- Purpose: Identify collision hotspots based on the number of incidents in specific locations (e.g., boroughs, streets).
+CREATE OR REPLACE VIEW high_risk_areas AS
+SELECT 
+    b.borough,
+    totals.on_street_name,
+    totals.total_collisions,
+    totals.total_injuries,
+    totals.total_fatalities
+FROM (
+    -- Aggregate on the integer key, then look up the names of the groups left
+    SELECT 
+        borough_id,
+        on_street_name,
+        COUNT(*) AS total_collisions,
+        SUM(number_of_persons_injured) AS total_injuries,
+        SUM(number_of_persons_killed) AS total_fatalities
+    FROM 
+        entities_collision_data
+    GROUP BY 
+        borough_id, on_street_name
+    HAVING 
+        total_collisions > 10 -- Threshold for identifying a hotspot
+) AS totals
+LEFT JOIN dim_borough b ON b.borough_id = totals.borough_id
+ORDER BY 
+    totals.total_collisions DESC;
+
+-- Collision Severity Trends View
+-- Purpose: Analyze trends in the severity of collisions over time.
+CREATE OR REPLACE VIEW collision_severity_trends AS
+SELECT 
+    DATE(crash_date) AS collision_date,
+    SUM(number_of_persons_injured) AS total_injuries,
+    SUM(number_of_persons_killed) AS total_fatalities,
+    COUNT(*) AS total_collisions
+FROM 
+    entities_collision_data
+GROUP BY 
+    collision_date
+ORDER BY 
+    collision_date ASC;
+
+-- Contributing Factors Analysis View
+-- Purpose: Identify common contributing factors to collisions.
+CREATE OR REPLACE VIEW contributing_factors_analysis AS
+SELECT 
+    f.contributing_factor,
+    totals.total_collisions,
+    totals.total_injuries,
+    totals.total_fatalities
+FROM (
+    SELECT 
+        contributing_factor_vehicle_1_id,
+        COUNT(*) AS total_collisions,
+        SUM(number_of_persons_injured) AS total_injuries,
+        SUM(number_of_persons_killed) AS total_fatalities
+    FROM 
+        entities_collision_data
+    WHERE 
+        contributing_factor_vehicle_1_id IS NOT NULL
+    GROUP BY 
+        contributing_factor_vehicle_1_id
+) AS totals
+JOIN dim_contributing_factor f ON f.contributing_factor_id = totals.contributing_factor_vehicle_1_id
+ORDER BY 
+    totals.total_collisions DESC;
+
+-- Cyclist and Pedestrian Safety View
+-- Purpose: Understand pedestrian and cyclist safety concerns for infrastructure planning.
+CREATE OR REPLACE VIEW cyclist_pedestrian_safety AS
+SELECT 
+    b.borough,
+    totals.pedestrians_injured,
+    totals.pedestrians_killed,
+    totals.cyclists_injured,
+    totals.cyclists_killed
+FROM (
+    SELECT 
+        borough_id,
+        SUM(number_of_pedestrians_injured) AS pedestrians_injured,
+        SUM(number_of_pedestrians_killed) AS pedestrians_killed,
+        SUM(number_of_cyclist_injured) AS cyclists_injured,
+        SUM(number_of_cyclist_killed) AS cyclists_killed
+    FROM 
+        entities_collision_data
+    GROUP BY 
+        borough_id
+    HAVING 
+        pedestrians_injured + cyclists_injured > 5 -- Threshold for identifying safety concerns
+) AS totals
+LEFT JOIN dim_borough b ON b.borough_id = totals.borough_id
+ORDER BY 
+    totals.pedestrians_injured DESC, totals.cyclists_injured DESC;
+
+-- Time-Based Collision Patterns View
+-- Purpose: Identify patterns related to the time of day for collisions.
+CREATE OR REPLACE VIEW time_based_collision_patterns AS
+SELECT 
+    HOUR(crash_time) AS hour_of_day,
+    COUNT(*) AS total_collisions,
+    SUM(number_of_persons_injured) AS total_injuries,
+    SUM(number_of_persons_killed) AS total_fatalities
+FROM 
+    entities_collision_data
+WHERE 
+    crash_time IS NOT NULL
+GROUP BY 
+    hour_of_day
+ORDER BY 
+    total_collisions DESC;
+
+-- Policy Effectiveness View
+-- Purpose: Evaluate the effectiveness of existing traffic laws by borough and time.
+CREATE OR REPLACE VIEW policy_effectiveness AS
+SELECT 
+    b.borough,
+    totals.collision_date,
+    totals.total_collisions,
+    totals.total_injuries,
+    totals.total_fatalities
+FROM (
+    SELECT 
+        borough_id,
+        DATE(crash_date) AS collision_date,
+        COUNT(*) AS total_collisions,
+        SUM(number_of_persons_injured) AS total_injuries,
+        SUM(number_of_persons_killed) AS total_fatalities
+    FROM 
+        entities_collision_data
+    GROUP BY 
+        borough_id, collision_date
+) AS totals
+LEFT JOIN dim_borough b ON b.borough_id = totals.borough_id
+ORDER BY 
+    totals.collision_date DESC;
+
+
+-- Collision Details View
+-- Purpose: The entities table with its dimension keys decoded back to text, for ad-hoc queries.
+CREATE OR REPLACE VIEW collision_details AS
+SELECT 
+    e.collision_id,
+    e.crash_date,
+    e.crash_time,
+    b.borough,
+    e.zip_code,
+    e.latitude,
+    e.longitude,
+    e.on_street_name,
+    e.cross_street_name,
+    e.off_street_name,
+    e.number_of_persons_injured,
+    e.number_of_persons_killed,
+    e.number_of_pedestrians_injured,
+    e.number_of_pedestrians_killed,
+    e.number_of_cyclist_injured,
+    e.number_of_cyclist_killed,
+    e.number_of_motorist_injured,
+    e.number_of_motorist_killed,
+    f1.contributing_factor AS contributing_factor_vehicle_1,
+    f2.contributing_factor AS contributing_factor_vehicle_2,
+    v1.vehicle_type AS vehicle_type_code1,
+    v2.vehicle_type AS vehicle_type_code2
+FROM 
+    entities_collision_data e
+LEFT JOIN dim_borough b ON b.borough_id = e.borough_id
+LEFT JOIN dim_contributing_factor f1 ON f1.contributing_factor_id = e.contributing_factor_vehicle_1_id
+LEFT JOIN dim_contributing_factor f2 ON f2.contributing_factor_id = e.contributing_factor_vehicle_2_id
+LEFT JOIN dim_vehicle_type v1 ON v1.vehicle_type_id = e.vehicle_type_code1_id
+LEFT JOIN dim_vehicle_type v2 ON v2.vehicle_type_id = e.vehicle_type_code2_id;
@@ -0,0 +1,142 @@
+-- Summary tables behind the analysis views. load_entities adds the totals of every
+-- transferred batch in the same transaction as the batch (see scripts/summaries.py), so
+-- the views read a few pre-aggregated rows instead of aggregating the entities table.
+-- Key columns are part of the primary key: a missing borough is stored as 0 and a
+-- missing street as ''. Fill them for existing data with: python -m scripts.migrate --rebuild-summaries
+CREATE TABLE IF NOT EXISTS high_risk_areas_summary (
+    borough_id SMALLINT UNSIGNED NOT NULL,          -- Borough (dim_borough), 0 if unknown
+    on_street_name VARCHAR(255) NOT NULL,           -- Street, '' if unknown
+    total_collisions BIGINT NOT NULL DEFAULT 0,     -- Number of collisions
+    total_injuries BIGINT NOT NULL DEFAULT 0,       -- Persons injured
+    total_fatalities BIGINT NOT NULL DEFAULT 0,     -- Persons killed
+    PRIMARY KEY (borough_id, on_street_name)
+);
+
+CREATE TABLE IF NOT EXISTS collision_severity_summary (
+    collision_date DATE PRIMARY KEY,                -- Day of the crashes
+    total_collisions BIGINT NOT NULL DEFAULT 0,     -- Number of collisions
+    total_injuries BIGINT NOT NULL DEFAULT 0,       -- Persons injured
+    total_fatalities BIGINT NOT NULL DEFAULT 0      -- Persons killed
+);
+
+CREATE TABLE IF NOT EXISTS contributing_factors_summary (
+    contributing_factor_id SMALLINT UNSIGNED PRIMARY KEY, -- Factor of vehicle 1 (dim_contributing_factor)
+    total_collisions BIGINT NOT NULL DEFAULT 0,     -- Number of collisions
+    total_injuries BIGINT NOT NULL DEFAULT 0,       -- Persons injured
+    total_fatalities BIGINT NOT NULL DEFAULT 0      -- Persons killed
+);
+
+CREATE TABLE IF NOT EXISTS cyclist_pedestrian_summary (
+    borough_id SMALLINT UNSIGNED PRIMARY KEY,       -- Borough (dim_borough), 0 if unknown
+    pedestrians_injured BIGINT NOT NULL DEFAULT 0,  -- Pedestrians injured
+    pedestrians_killed BIGINT NOT NULL DEFAULT 0,   -- Pedestrians killed
+    cyclists_injured BIGINT NOT NULL DEFAULT 0,     -- Cyclists injured
+    cyclists_killed BIGINT NOT NULL DEFAULT 0       -- Cyclists killed
+);
+
+CREATE TABLE IF NOT EXISTS time_patterns_summary (
+    hour_of_day TINYINT UNSIGNED PRIMARY KEY,       -- Hour of the crash time
+    total_collisions BIGINT NOT NULL DEFAULT 0,     -- Number of collisions
+    total_injuries BIGINT NOT NULL DEFAULT 0,       -- Persons injured
+    total_fatalities BIGINT NOT NULL DEFAULT 0      -- Persons killed
+);
+
+CREATE TABLE IF NOT EXISTS policy_effectiveness_summary (
+    borough_id SMALLINT UNSIGNED NOT NULL,          -- Borough (dim_borough), 0 if unknown
+    collision_date DATE NOT NULL,                   -- Day of the crashes
+    total_collisions BIGINT NOT NULL DEFAULT 0,     -- Number of collisions
+    total_injuries BIGINT NOT NULL DEFAULT 0,       -- Persons injured
+    total_fatalities BIGINT NOT NULL DEFAULT 0,     -- Persons killed
+    PRIMARY KEY (borough_id, collision_date)
+);
+
+-- The views keep their names and columns, and now read the summary tables
+
+-- High Risk Areas View
+-- Purpose: Identify collision hotspots based on the number of incidents in specific locations (e.g., boroughs, streets).
+CREATE OR REPLACE VIEW high_risk_areas AS
+SELECT
+    b.borough,
+    NULLIF(s.on_street_name, '') AS on_street_name,
+    s.total_collisions,
+    s.total_injuries,
+    s.total_fatalities
+FROM
+    high_risk_areas_summary s
+LEFT JOIN dim_borough b ON b.borough_id = s.borough_id
+WHERE
+    s.total_collisions > 10 -- Threshold for identifying a hotspot
+ORDER BY
+    s.total_collisions DESC;
+
+-- Collision Severity Trends View
+-- Purpose: Analyze trends in the severity of collisions over time.
+CREATE OR REPLACE VIEW collision_severity_trends AS
+SELECT
+    collision_date,
+    total_injuries,
+    total_fatalities,
+    total_collisions
+FROM
+    collision_severity_summary
+ORDER BY
+    collision_date ASC;
+
+-- Contributing Factors Analysis View
+-- Purpose: Identify common contributing factors to collisions.
+CREATE OR REPLACE VIEW contributing_factors_analysis AS
+SELECT
+    f.contributing_factor,
+    s.total_collisions,
+    s.total_injuries,
+    s.total_fatalities
+FROM
+    contributing_factors_summary s
+JOIN dim_contributing_factor f ON f.contributing_factor_id = s.contributing_factor_id
+ORDER BY
+    s.total_collisions DESC;
+
+-- Cyclist and Pedestrian Safety View
+-- Purpose: Understand pedestrian and cyclist safety concerns for infrastructure planning.
+CREATE OR REPLACE VIEW cyclist_pedestrian_safety AS
+SELECT
+    b.borough,
+    s.pedestrians_injured,
+    s.pedestrians_killed,
+    s.cyclists_injured,
+    s.cyclists_killed
+FROM
+    cyclist_pedestrian_summary s
+LEFT JOIN dim_borough b ON b.borough_id = s.borough_id
+WHERE
+    s.pedestrians_injured + s.cyclists_injured > 5 -- Threshold for identifying safety concerns
+ORDER BY
+    s.pedestrians_injured DESC, s.cyclists_injured DESC;
+
+-- Time-Based Collision Patterns View
+-- Purpose: Identify patterns related to the time of day for collisions.
+CREATE OR REPLACE VIEW time_based_collision_patterns AS
+SELECT
+    hour_of_day,
+    total_collisions,
+    total_injuries,
+    total_fatalities
+FROM
+    time_patterns_summary
+ORDER BY
+    total_collisions DESC;
+
+-- Policy Effectiveness View
+-- Purpose: Evaluate the effectiveness of existing traffic laws by borough and time.
+CREATE OR REPLACE VIEW policy_effectiveness AS
+SELECT
+    b.borough,
+    s.collision_date,
+    s.total_collisions,
+    s.total_injuries,
+    s.total_fatalities
+FROM
+    policy_effectiveness_summary s
+LEFT JOIN dim_borough b ON b.borough_id = s.borough_id
+ORDER BY
+    s.collision_date DESC;
@@ -0,0 +1,11 @@
+-- Grid cell of the crash location: a Morton-coded 25 m tile computed from latitude and
+-- longitude by the staging load (see scripts/geo.py). Coarser tiles are the cell ID
+-- shifted right, so one column serves every resolution. Fill it for rows loaded
+-- earlier with: python -m scripts.migrate --backfill-grid-cells
+ALTER TABLE staging_collision_data ADD COLUMN grid_cell BIGINT;
+
+ALTER TABLE entities_collision_data ADD COLUMN grid_cell BIGINT;
+
+-- Per-cell totals for the hotspot engine are read from this index alone
+CREATE INDEX idx_grid_cell
+    ON entities_collision_data (grid_cell, crash_date, number_of_persons_injured, number_of_persons_killed);
@@ -0,0 +1,52 @@
+-- Weekly and monthly rollups of the collisions by borough, next to the daily one behind
+-- policy_effectiveness. Like the other summary tables they are incremented with every
+-- transferred batch (see scripts/summaries.py), so a trend chart reads one row per borough
+-- and period instead of aggregating the entities table or the daily totals.
+-- Weeks start on Monday. Fill them for existing data with: python -m scripts.migrate --rebuild-summaries
+CREATE TABLE IF NOT EXISTS weekly_trends_summary (
+    borough_id SMALLINT UNSIGNED NOT NULL,          -- Borough (dim_borough), 0 if unknown
+    week_start DATE NOT NULL,                       -- Monday of the week of the crashes
+    total_collisions BIGINT NOT NULL DEFAULT 0,     -- Number of collisions
+    total_injuries BIGINT NOT NULL DEFAULT 0,       -- Persons injured
+    total_fatalities BIGINT NOT NULL DEFAULT 0,     -- Persons killed
+    PRIMARY KEY (borough_id, week_start)
+);
+
+CREATE TABLE IF NOT EXISTS monthly_trends_summary (
+    borough_id SMALLINT UNSIGNED NOT NULL,          -- Borough (dim_borough), 0 if unknown
+    month_start DATE NOT NULL,                      -- First day of the month of the crashes
+    total_collisions BIGINT NOT NULL DEFAULT 0,     -- Number of collisions
+    total_injuries BIGINT NOT NULL DEFAULT 0,       -- Persons injured
+    total_fatalities BIGINT NOT NULL DEFAULT 0,     -- Persons killed
+    PRIMARY KEY (borough_id, month_start)
+);
+
+-- Weekly Collision Trends View
+-- Purpose: Follow collisions, injuries and fatalities week by week in each borough.
+CREATE OR REPLACE VIEW weekly_collision_trends AS
+SELECT
+    b.borough,
+    s.week_start,
+    s.total_collisions,
+    s.total_injuries,
+    s.total_fatalities
+FROM
+    weekly_trends_summary s
+LEFT JOIN dim_borough b ON b.borough_id = s.borough_id
+ORDER BY
+    s.week_start ASC;
+
+-- Monthly Collision Trends View
+-- Purpose: Follow collisions, injuries and fatalities month by month in each borough.
+CREATE OR REPLACE VIEW monthly_collision_trends AS
+SELECT
+    b.borough,
+    s.month_start,
+    s.total_collisions,
+    s.total_injuries,
+    s.total_fatalities
+FROM
+    monthly_trends_summary s
+LEFT JOIN dim_borough b ON b.borough_id = s.borough_id
+ORDER BY
+    s.month_start ASC;
@@ -0,0 +1,146 @@
+import queue
+import logging
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from scripts.bulk_load import bulk_insert, combine_stats, DEFAULT_BATCH_SIZE
+
+logger = logging.getLogger("PARALLEL_LOAD")
+
+# Marks the end of the partition stream for a worker
+_END_OF_PARTITIONS = None
+
+# Seconds a blocked queue operation waits before re-checking for failed workers
+_POLL_SECONDS = 0.1
+
+
+def partition_by_collision_id(data, partitions):
+    """
+    Split a DataFrame into contiguous collision_id ranges of roughly equal size.
+
+    Parameters:
+        data (pd.DataFrame): The rows to split.
+        partitions (int): The number of ranges to create.
+
+    Returns:
+        list: The non-empty partitions, in ascending collision_id order.
+    """
+    ordered = data.sort_values("collision_id", kind="stable")
+    bounds = np.linspace(0, len(ordered), partitions + 1).astype(int)
+    return [ordered.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def _load_worker(worker_id, connect, partitions, failed, table_name, columns, strategy, batch_size, upsert):
+    """
+    Insert partitions from the queue on a dedicated connection without committing.
+
+    Returns the open connection and its statistics so the coordinator can commit or
+    roll back every worker together.
+    """
+    connection = None
+    stats = []
+    try:
+        connection = connect()
+        while True:
+            partition = partitions.get()
+            if partition is _END_OF_PARTITIONS:
+                break
+            # Keep draining after another worker failed so the producer never blocks
+            if not failed.is_set():
+                stats.append(bulk_insert(connection, table_name, partition, columns, strategy, batch_size, upsert))
+    except Exception:
+        failed.set()
+        if connection is not None:
+            connection.rollback()
+            connection.close()
+        raise
+    logger.info(f"Worker {worker_id} inserted {sum(s['rows'] for s in stats)} rows in {len(stats)} partitions.")
+    return connection, stats
+
+
+def _put(partitions, item, futures):
+    """Put an item on the queue unless every worker has already stopped."""
+    while True:
+        try:
+            partitions.put(item, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            if all(future.done() for future in futures):
+                return False
+
+
+def parallel_bulk_insert(connect, table_name, partitions, columns, workers=4, strategy="executemany",
+                         batch_size=DEFAULT_BATCH_SIZE, upsert=False):
+    """
+    Insert partitions concurrently, one database connection per worker.
+
+    Each worker keeps a single transaction open for all partitions it inserts.
+    Transactions are committed only once every partition has been inserted; if any
+    worker (or the partition iterable) fails, every worker rolls back and the first
+    error is raised, so a failed run never leaves a partial load behind.
+
+    Parameters:
+        connect (callable): Returns a new database connection; called once per worker.
+        table_name (str): The name of the database table to insert data into.
+        partitions (iterable): DataFrames to insert. Consumed lazily, with at most
+            two partitions per worker buffered at a time.
+        columns (list): The ordered list of table columns.
+        workers (int): The number of concurrent workers and connections.
+        strategy (str): The bulk load strategy, 'executemany' or 'load_data'.
+        batch_size (int): The number of rows sent per round trip.
+        upsert (bool): Overwrite rows whose primary key already exists.
+
+    Returns:
+        dict: Combined load statistics for all workers.
+    """
+    if workers < 1:
+        raise ValueError("workers must be a positive integer.")
+
+    pending = queue.Queue(maxsize=workers * 2)
+    failed = threading.Event()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="load") as executor:
+        futures = [
+            executor.submit(_load_worker, worker_id, connect, pending, failed,
+                            table_name, columns, strategy, batch_size, upsert)
+            for worker_id in range(workers)
+        ]
+
+        # Feed the workers, stopping early once one of them has failed.
+        # An error while producing partitions (e.g. a CSV parse error) fails the load too.
+        errors = []
+        try:
+            for partition in partitions:
+                if failed.is_set() or not _put(pending, partition, futures):
+                    break
+        except Exception as e:
+            failed.set()
+            errors.append(("partition reader", e))
+        finally:
+            for _ in futures:
+                if not _put(pending, _END_OF_PARTITIONS, futures):
+                    break
+
+        results = []
+        for worker_id, future in enumerate(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                errors.append((f"worker {worker_id}", e))
+
+    # Commit or roll back every worker together
+    if errors:
+        for connection, _ in results:
+            connection.rollback()
+            connection.close()
+        source, error = errors[0]
+        logger.error(f"Parallel load into {table_name} rolled back: {source} failed: {error}")
+        raise error
+
+    for connection, _ in results:
+        connection.commit()
+        connection.close()
+
+    stats = combine_stats([s for _, worker_stats in results for s in worker_stats])
+    logger.info(f"Parallel load into {table_name} committed {stats['rows']} rows across {workers} workers.")
+    return stats
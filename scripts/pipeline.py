@@ -0,0 +1,451 @@
+import os
+import ast
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config.stage_logging import configure_stage_logging
+
+# Log file of the command-line runs (see config/stage_logging.py)
+log_file = os.path.join("logs", "pipeline.log")
+
+logger = logging.getLogger("PIPELINE")
+
+RAW_INPUT_FILE = "./data/input/raw_api_data.csv"
+
+# Schema migrations applied by the schema stage (see scripts/migrate.py)
+MIGRATIONS_DIR = os.path.join("scripts", "migrations")
+
+# Data quality report written by the validate stage
+VALIDATION_REPORT_FILE = "./data/output/validation_report.json"
+
+# Fingerprints of the last successful run of every stage
+STATE_FILE = "./data/pipeline_state.json"
+
+# Stages run at the same time
+DEFAULT_WORKERS = 2
+
+# Bytes read at a time when hashing files
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Packages whose modules are fingerprinted with the stages importing them
+PROJECT_PACKAGES = ("scripts", "config")
+
+
+def _cleaned_output():
+    """The intermediate file written by the transform stage, in the configured format."""
+    from scripts.columnar import intermediate_format
+    from scripts.transform import CLEANED_CSV_FILE, CLEANED_PARQUET_DATASET
+    return CLEANED_PARQUET_DATASET if intermediate_format() == "parquet" else CLEANED_CSV_FILE
+
+
+def _intermediate_format():
+    from scripts.columnar import intermediate_format
+    return {"intermediate_format": intermediate_format()}
+
+
+def _database():
+    """The database the stage reads or writes: pointing DB_* or SQLITE_PATH elsewhere reruns it."""
+    from config.db_config import database_identity
+    return {"database": database_identity()}
+
+
+def _database_and_intermediate_format():
+    return _database() | _intermediate_format()
+
+
+def _run_validate():
+    from scripts.validate import validate_file
+    report = validate_file(RAW_INPUT_FILE)
+    with open(VALIDATION_REPORT_FILE, "w") as handle:
+        json.dump(report, handle, indent=2)
+    if not report["valid"]:
+        # transform.py drops or repairs the offending rows; the report is kept for review
+        logger.warning(f"Validation found issues in {RAW_INPUT_FILE}; see {VALIDATION_REPORT_FILE}.")
+
+
+def _run_transform():
+    from scripts.transform import transform_file
+    transform_file(RAW_INPUT_FILE)
+
+
+def _run_schema():
+    from scripts.migrate import migrate
+    migrate()
+
+
+def _run_source():
+    # Reruns see rows that are already loaded: upsert from the watermark instead of
+    # failing on the collision_id primary key
+    from scripts.load_source import run_source
+    run_source(incremental=True)
+
+
+def _run_staging():
+    from scripts.load_staging import load_data_to_staging
+    load_data_to_staging(_cleaned_output(), "staging_collision_data", incremental=True)
+
+
+def _run_entities():
+    from scripts.load_entities import run_entities
+    run_entities()
+
+
+def _run_analysis():
+    from scripts.analysis import build_dashboard
+    timings = build_dashboard()
+    failed = {name: timing["error"] for name, timing in timings.items() if timing.get("error")}
+    if failed:
+        raise RuntimeError(f"Dashboard charts failed: {failed}")
+
+
+# The pipeline DAG. For each stage:
+# - run:        the callable doing the work
+# - depends_on: stages that must succeed first; their fingerprints feed into this one
+# - inputs:     files (or a callable returning them) whose content is fingerprinted
+# - outputs:    files the stage writes; the stage reruns if they are missing or changed
+# - code:       modules whose source is part of the fingerprint, with every project
+#               module they import (see code_modules)
+# - params:     an optional callable returning settings that change the stage's result
+STAGES = {
+    "schema": {
+        "run": _run_schema,
+        "depends_on": [],
+        "inputs": [MIGRATIONS_DIR],
+        "code": ["scripts.migrate"],
+        "params": _database,
+    },
+    "validate": {
+        "run": _run_validate,
+        "depends_on": [],
+        "inputs": [RAW_INPUT_FILE],
+        "outputs": [VALIDATION_REPORT_FILE],
+        "code": ["scripts.validate"],
+    },
+    "source": {
+        "run": _run_source,
+        "depends_on": ["schema"],
+        "inputs": [RAW_INPUT_FILE],
+        "code": ["scripts.load_source"],
+        "params": _database,
+    },
+    "transform": {
+        "run": _run_transform,
+        "depends_on": [],
+        "inputs": [RAW_INPUT_FILE],
+        "outputs": lambda: [_cleaned_output()],
+        "code": ["scripts.transform"],
+        "params": _intermediate_format,
+    },
+    "staging": {
+        "run": _run_staging,
+        "depends_on": ["schema", "transform"],
+        "inputs": lambda: [_cleaned_output()],
+        "code": ["scripts.load_staging"],
+        "params": _database_and_intermediate_format,
+    },
+    "entities": {
+        "run": _run_entities,
+        "depends_on": ["staging"],
+        "code": ["scripts.load_entities"],
+        "params": _database,
+    },
+    "analysis": {
+        "run": _run_analysis,
+        "depends_on": ["entities"],
+        "code": ["scripts.analysis"],
+        "params": _database,
+    },
+}
+
+
+def file_fingerprint(path):
+    """
+    Fingerprint a file or a directory of files (e.g. a Parquet dataset).
+
+    Parameters:
+        path (str): The file or directory.
+
+    Returns:
+        dict: 'sha256' of the content, 'bytes' and 'rows' (line count for files,
+            None for directories), or None if the path does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+
+    digest = hashlib.sha256()
+    size = 0
+    lines = 0
+    if os.path.isdir(path):
+        files = sorted(
+            os.path.join(directory, name)
+            for directory, _, names in os.walk(path) for name in names
+        )
+        lines = None
+    else:
+        files = [path]
+
+    for file_path in files:
+        digest.update(os.path.relpath(file_path, path).encode())
+        with open(file_path, "rb") as handle:
+            for block in iter(lambda: handle.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+                size += len(block)
+                if lines is not None:
+                    lines += block.count(b"\n")
+    return {"sha256": digest.hexdigest(), "bytes": size, "rows": lines}
+
+
+def code_fingerprint(module_name):
+    """
+    Hash the source file of a module without importing it.
+
+    Parameters:
+        module_name (str): The dotted module name.
+
+    Returns:
+        str: The sha256 of the module source.
+    """
+    origin = importlib.util.find_spec(module_name).origin
+    with open(origin, "rb") as handle:
+        return hashlib.sha256(handle.read()).hexdigest()
+
+
+def module_imports(module_name):
+    """
+    Find the project modules a module imports, without importing it.
+
+    Imports inside functions count too: the stages import their dependencies lazily.
+
+    Parameters:
+        module_name (str): The dotted module name.
+
+    Returns:
+        set: The dotted names of the imported modules of PROJECT_PACKAGES.
+    """
+    with open(importlib.util.find_spec(module_name).origin) as handle:
+        tree = ast.parse(handle.read())
+
+    candidates = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            candidates.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            # 'from scripts import geo' names a module, 'from scripts.geo import cell_ids' does not
+            candidates.add(node.module)
+            candidates.update(f"{node.module}.{alias.name}" for alias in node.names)
+
+    imports = set()
+    for name in candidates:
+        package, _, module = name.partition(".")
+        # The packages are flat, so only '<package>.<module>' can name a module
+        if package in PROJECT_PACKAGES and module and "." not in module:
+            spec = importlib.util.find_spec(name)
+            if spec is not None and spec.origin and spec.origin.endswith(".py"):
+                imports.add(name)
+    return imports
+
+
+def code_modules(modules):
+    """
+    Expand a list of modules with every project module they import, transitively.
+
+    Parameters:
+        modules (list): Dotted module names.
+
+    Returns:
+        list: The sorted dotted names of the modules and their project imports.
+    """
+    found, pending = set(), list(modules)
+    while pending:
+        module_name = pending.pop()
+        if module_name not in found:
+            found.add(module_name)
+            pending.extend(module_imports(module_name))
+    return sorted(found)
+
+
+def _resolve(value):
+    """Evaluate a stage attribute that may be given as a callable."""
+    return value() if callable(value) else (value or [])
+
+
+def stage_fingerprint(spec, upstream):
+    """
+    Fingerprint everything a stage's result depends on.
+
+    Parameters:
+        spec (dict): The stage definition.
+        upstream (dict): Fingerprints of the stages it depends on.
+
+    Returns:
+        str: The sha256 of the inputs, code, parameters and upstream fingerprints.
+    """
+    description = {
+        "inputs": {path: file_fingerprint(path) for path in _resolve(spec.get("inputs"))},
+        "code": {module: code_fingerprint(module) for module in code_modules(spec.get("code", []))},
+        "params": spec["params"]() if spec.get("params") else None,
+        "upstream": upstream,
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+def load_state(state_path=STATE_FILE):
+    """
+    Read the fingerprints recorded by earlier runs.
+
+    Parameters:
+        state_path (str): The state file.
+
+    Returns:
+        dict: Stage name to its last successful 'fingerprint' and 'outputs'.
+    """
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path) as handle:
+        return json.load(handle)
+
+
+def save_state(state, state_path=STATE_FILE):
+    """
+    Write the recorded fingerprints atomically.
+
+    Parameters:
+        state (dict): Stage name to its last successful 'fingerprint' and 'outputs'.
+        state_path (str): The state file.
+    """
+    temp_path = f"{state_path}.tmp"
+    with open(temp_path, "w") as handle:
+        json.dump(state, handle, indent=2, sort_keys=True)
+    os.replace(temp_path, state_path)
+
+
+def _outputs_valid(recorded_outputs, outputs):
+    """Check that every output still exists with the content recorded when it was written."""
+    return all(
+        recorded_outputs.get(path) is not None and file_fingerprint(path) == recorded_outputs[path]
+        for path in outputs
+    )
+
+
+def _execute_stage(name, spec, upstream, recorded, force):
+    """
+    Fingerprint a stage and run it unless its recorded outputs are still valid.
+
+    Returns the status ('ran' or 'skipped'), the fingerprint and the output fingerprints.
+    """
+    fingerprint = stage_fingerprint(spec, upstream)
+    outputs = _resolve(spec.get("outputs"))
+    if (not force and recorded and recorded.get("fingerprint") == fingerprint
+            and _outputs_valid(recorded.get("outputs", {}), outputs)):
+        logger.info(f"Stage {name} is up to date; skipping.")
+        return "skipped", fingerprint, recorded.get("outputs", {})
+
+    logger.info(f"Running stage {name}...")
+    start = time.perf_counter()
+    spec["run"]()
+    logger.info(f"Stage {name} finished in {time.perf_counter() - start:.1f}s.")
+    return "ran", fingerprint, {path: file_fingerprint(path) for path in outputs}
+
+
+def run_pipeline(stages=STAGES, targets=None, force=False, workers=DEFAULT_WORKERS, state_path=STATE_FILE):
+    """
+    Run the pipeline stages as a DAG, skipping stages whose inputs have not changed.
+
+    A stage runs once every stage it depends on has succeeded (or been skipped as up to
+    date). Stages that are ready at the same time, such as validation, the source load
+    and the transform, run concurrently. A stage is skipped when the fingerprint of its inputs, code,
+    parameters and upstream stages matches its last successful run and its outputs are
+    unchanged. When a stage fails, the stages that depend on it are not run; unrelated
+    stages still finish.
+
+    Parameters:
+        stages (dict): The stage definitions (see STAGES).
+        targets (list): Run only these stages and what they depend on. All stages when omitted.
+        force (bool): Rerun every selected stage even if it is up to date.
+        workers (int): The number of stages run at the same time.
+        state_path (str): The file recording fingerprints between runs.
+
+    Returns:
+        dict: Stage name to 'ran', 'skipped', 'failed' or 'blocked' (an upstream stage failed).
+    """
+    # Select the targets and everything upstream of them
+    selected = set()
+    pending_targets = list(targets or stages)
+    while pending_targets:
+        name = pending_targets.pop()
+        if name not in stages:
+            raise ValueError(f"Unknown stage '{name}'. Expected one of {sorted(stages)}.")
+        if name not in selected:
+            selected.add(name)
+            pending_targets.extend(stages[name]["depends_on"])
+
+    state = load_state(state_path)
+    state_lock = threading.Lock()
+    statuses = {}
+    fingerprints = {}
+    pending = [name for name in stages if name in selected]
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stage") as executor:
+        running = {}
+        while pending or running:
+            # Block stages downstream of a failure and start every stage that is ready
+            for name in list(pending):
+                depends_on = stages[name]["depends_on"]
+                if any(statuses.get(dependency) in ("failed", "blocked") for dependency in depends_on):
+                    statuses[name] = "blocked"
+                    pending.remove(name)
+                    logger.warning(f"Stage {name} not run: an upstream stage failed.")
+                elif all(statuses.get(dependency) in ("ran", "skipped") for dependency in depends_on):
+                    upstream = {dependency: fingerprints[dependency] for dependency in depends_on}
+                    future = executor.submit(_execute_stage, name, stages[name], upstream, state.get(name), force)
+                    running[future] = name
+                    pending.remove(name)
+
+            if not running:
+                if pending:
+                    raise ValueError(f"Stages {pending} depend on each other in a cycle.")
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    status, fingerprint, outputs = future.result()
+                except Exception as e:
+                    logger.error(f"Stage {name} failed: {e}", exc_info=True)
+                    statuses[name] = "failed"
+                    continue
+                statuses[name] = status
+                fingerprints[name] = fingerprint
+                if status == "ran":
+                    with state_lock:
+                        state[name] = {"fingerprint": fingerprint, "outputs": outputs}
+                        save_state(state, state_path)
+
+    statuses = {name: statuses[name] for name in stages if name in statuses}
+    logger.info(f"Pipeline finished: {statuses}")
+    return statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the NYC collisions ELT pipeline as a DAG.")
+    parser.add_argument("stages", nargs="*", help=f"Stages to run with their dependencies. One of {list(STAGES)}.")
+    parser.add_argument("--force", action="store_true", help="Rerun stages even if their inputs are unchanged.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Stages run at the same time.")
+    args = parser.parse_args()
+
+    statuses = run_pipeline(targets=args.stages or None, force=args.force, workers=args.workers)
+    for name, status in statuses.items():
+        print(f"{name:10} {status}")
+    if any(status in ("failed", "blocked") for status in statuses.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    configure_stage_logging(log_file)
+    main()
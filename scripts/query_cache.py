@@ -0,0 +1,209 @@
+import os
+import re
+import uuid
+import hashlib
+import logging
+import pandas as pd
+from config.db_config import database_identity
+from scripts.columnar import COMPRESSION
+
+logger = logging.getLogger("QUERY_CACHE")
+
+# Cached query results, one Parquet file per query, database and data version
+CACHE_DIR = "./data/cache"
+
+# Token bumped by the load stages whenever they commit new data
+DATA_VERSION_FILE = "data_version"
+
+# Total size of the cached results before the least recently used ones are evicted
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Set QUERY_CACHE=off to always query the database
+QUERY_CACHE_ENV = "QUERY_CACHE"
+
+# Quoted string literals, whose whitespace is significant
+QUOTED_PATTERN = re.compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")""")
+
+
+def cache_enabled():
+    """Whether fetch results may be served from the cache (QUERY_CACHE is not 'off')."""
+    return os.getenv(QUERY_CACHE_ENV, "on").strip().lower() not in ("off", "0", "false", "no")
+
+
+def normalize_sql(query):
+    """
+    Normalize a query so that formatting differences map to the same cache entry.
+
+    Runs of whitespace outside string literals are collapsed to one space, and leading
+    and trailing whitespace and semicolons are removed.
+
+    Parameters:
+        query (str): The SQL query.
+
+    Returns:
+        str: The normalized query.
+    """
+    parts = QUOTED_PATTERN.split(query)
+    # Even parts are outside quotes, odd parts are the literals themselves
+    parts = [part if index % 2 else " ".join(part.split()) for index, part in enumerate(parts)]
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def data_version(cache_dir=None):
+    """
+    Read the current data version stamp.
+
+    Parameters:
+        cache_dir (str): The cache directory. Defaults to CACHE_DIR.
+
+    Returns:
+        str: The stamp written by the last bump_data_version, or 'initial' if the data
+            was never stamped.
+    """
+    path = os.path.join(cache_dir or CACHE_DIR, DATA_VERSION_FILE)
+    if not os.path.exists(path):
+        return "initial"
+    with open(path) as handle:
+        return handle.read().strip() or "initial"
+
+
+def bump_data_version(cache_dir=None):
+    """
+    Record that the loaded data changed, so every cached result becomes stale.
+
+    Called by the load stages after each commit.
+
+    Parameters:
+        cache_dir (str): The cache directory. Defaults to CACHE_DIR.
+
+    Returns:
+        str: The new stamp.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    version = uuid.uuid4().hex
+    path = os.path.join(cache_dir, DATA_VERSION_FILE)
+    temp_path = f"{path}.{version}.tmp"
+    with open(temp_path, "w") as handle:
+        handle.write(version)
+    os.replace(temp_path, path)
+    return version
+
+
+def cache_path(query, version, cache_dir=None):
+    """
+    Locate the cache entry of a query against the configured database at a data version.
+
+    The database (see db_config.database_identity) is part of the key: switching
+    DB_BACKEND or pointing at another database must not serve the other one's results.
+
+    Parameters:
+        query (str): The SQL query.
+        version (str): The data version stamp.
+        cache_dir (str): The cache directory. Defaults to CACHE_DIR.
+
+    Returns:
+        str: The path of the Parquet file, named '<version>-<sha256 of the database and normalized query>.parquet'.
+    """
+    digest = hashlib.sha256(f"{database_identity()}\n{normalize_sql(query)}".encode()).hexdigest()
+    return os.path.join(cache_dir or CACHE_DIR, f"{version}-{digest}.parquet")
+
+
+def evict(cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, version=None):
+    """
+    Remove stale and least recently used cache entries.
+
+    Entries of other data versions can never be hit again and are removed first. Then,
+    while the cache is larger than max_bytes, the entry used longest ago (by modification
+    time, which a hit refreshes) is removed.
+
+    Parameters:
+        cache_dir (str): The cache directory. Defaults to CACHE_DIR.
+        max_bytes (int): The size budget of the cached results.
+        version (str): The current data version. Defaults to data_version().
+
+    Returns:
+        int: The number of entries removed.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    if not os.path.isdir(cache_dir):
+        return 0
+    version = version or data_version(cache_dir)
+
+    entries = []
+    removed = 0
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".parquet"):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            if not name.startswith(f"{version}-"):
+                os.remove(path)
+                removed += 1
+            else:
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        except FileNotFoundError:
+            # Removed concurrently by another process
+            continue
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+
+    if removed:
+        logger.info(f"Evicted {removed} cached query results; {total} bytes remain.")
+    return removed
+
+
+def cached_query(query, fetch, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Return the result of a query from the cache, or fetch and cache it.
+
+    Parameters:
+        query (str): The SQL query.
+        fetch (callable): Runs the query and returns a DataFrame; only called on a miss.
+        cache_dir (str): The cache directory. Defaults to CACHE_DIR.
+        max_bytes (int): The size budget of the cached results.
+
+    Returns:
+        pd.DataFrame: The query result.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    version = data_version(cache_dir)
+    path = cache_path(query, version, cache_dir)
+
+    if os.path.exists(path):
+        try:
+            data = pd.read_parquet(path)
+            # Refresh the entry's position in the LRU order
+            os.utime(path)
+            logger.info(f"Query cache hit: {os.path.basename(path)}.")
+            return data
+        except Exception as e:
+            # A damaged or concurrently evicted entry is treated as a miss
+            logger.warning(f"Ignoring unreadable cache entry {path}: {e}")
+
+    data = fetch(query)
+
+    # Write atomically, so a concurrent reader never sees a partial file
+    os.makedirs(cache_dir, exist_ok=True)
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        data.to_parquet(temp_path, compression=COMPRESSION, index=False)
+        os.replace(temp_path, path)
+    except Exception as e:
+        # Results pyarrow cannot store are simply not cached
+        logger.warning(f"Could not cache the result of a query: {e}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return data
+    evict(cache_dir, max_bytes, version)
+    return data
@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+
+# Columns of raw_api_data.csv, in file order (the order written by the extractor)
+RAW_COLUMNS = [
+    'crash_date', 'crash_time', 'on_street_name', 'off_street_name',
+    'number_of_persons_injured', 'number_of_persons_killed',
+    'number_of_pedestrians_injured', 'number_of_pedestrians_killed',
+    'number_of_cyclist_injured', 'number_of_cyclist_killed',
+    'number_of_motorist_injured', 'number_of_motorist_killed',
+    'contributing_factor_vehicle_1', 'contributing_factor_vehicle_2',
+    'collision_id', 'vehicle_type_code1', 'vehicle_type_code2', 'borough',
+    'zip_code', 'latitude', 'longitude', 'location', 'cross_street_name',
+    'contributing_factor_vehicle_3', 'vehicle_type_code_3',
+    'contributing_factor_vehicle_4', 'vehicle_type_code_4',
+    'contributing_factor_vehicle_5', 'vehicle_type_code_5'
+]
+
+# Columns of the source_collision_data table, in insert order
+SOURCE_COLUMNS = [
+    'collision_id', 'crash_date', 'crash_time', 'borough', 'zip_code',
+    'latitude', 'longitude', 'on_street_name', 'cross_street_name',
+    'off_street_name', 'number_of_persons_injured', 'number_of_persons_killed',
+    'number_of_pedestrians_injured', 'number_of_pedestrians_killed',
+    'number_of_cyclist_injured', 'number_of_cyclist_killed',
+    'number_of_motorist_injured', 'number_of_motorist_killed',
+    'contributing_factor_vehicle_1', 'contributing_factor_vehicle_2',
+    'contributing_factor_vehicle_3', 'contributing_factor_vehicle_4',
+    'contributing_factor_vehicle_5', 'vehicle_type_code1', 'vehicle_type_code2',
+    'vehicle_type_code_3', 'vehicle_type_code_4', 'vehicle_type_code_5'
+]
+
+# Columns of the cleaned file and of the staging_collision_data table, in insert order
+STAGING_COLUMNS = [
+    'collision_id', 'crash_date', 'crash_time', 'borough', 'zip_code',
+    'latitude', 'longitude', 'on_street_name', 'cross_street_name',
+    'off_street_name', 'number_of_persons_injured', 'number_of_persons_killed',
+    'number_of_pedestrians_injured', 'number_of_pedestrians_killed',
+    'number_of_cyclist_injured', 'number_of_cyclist_killed',
+    'number_of_motorist_injured', 'number_of_motorist_killed',
+    'contributing_factor_vehicle_1', 'contributing_factor_vehicle_2',
+    'vehicle_type_code1', 'vehicle_type_code2'
+]
+
+# Level 0 grid cell of the crash location (see scripts/geo.py), computed by the staging load
+GRID_CELL_COLUMN = 'grid_cell'
+
+# Columns of the staging_collision_data table: the cleaned file's columns plus the derived grid cell
+STAGING_TABLE_COLUMNS = STAGING_COLUMNS + [GRID_CELL_COLUMN]
+
+# Dimension tables of entities_collision_data. Each maps a distinct text value to an
+# integer surrogate key, and the entity table stores only the keys:
+# - key:     the surrogate key column of the dimension
+# - value:   the text column of the dimension
+# - columns: the staging columns encoded with it, stored as '<column>_id'
+DIMENSIONS = {
+    'dim_borough': {
+        'key': 'borough_id', 'value': 'borough',
+        'columns': ['borough'],
+    },
+    'dim_contributing_factor': {
+        'key': 'contributing_factor_id', 'value': 'contributing_factor',
+        'columns': ['contributing_factor_vehicle_1', 'contributing_factor_vehicle_2'],
+    },
+    'dim_vehicle_type': {
+        'key': 'vehicle_type_id', 'value': 'vehicle_type',
+        'columns': ['vehicle_type_code1', 'vehicle_type_code2'],
+    },
+}
+
+# Staging column -> the key column replacing it in entities_collision_data
+DIMENSION_KEY_COLUMNS = {
+    column: f'{column}_id' for spec in DIMENSIONS.values() for column in spec['columns']
+}
+
+# Columns of the entities_collision_data table: the staging table columns, with the
+# dimension-encoded text columns replaced by their keys
+ENTITY_COLUMNS = [DIMENSION_KEY_COLUMNS.get(column, column) for column in STAGING_TABLE_COLUMNS]
+
+# Injury/fatality counters: small non-negative counts, nullable in the raw export.
+# Int16 keeps a sign so validate.py can still report negative values.
+COUNTER_COLUMNS = [column for column in SOURCE_COLUMNS if column.startswith('number_of_')]
+
+# Low-cardinality text columns (a few dozen distinct values across millions of rows).
+# zip_code is kept as text: the raw export has blank and non-numeric ZIP codes.
+CATEGORICAL_COLUMNS = [
+    'borough', 'zip_code',
+    'contributing_factor_vehicle_1', 'contributing_factor_vehicle_2',
+    'contributing_factor_vehicle_3', 'contributing_factor_vehicle_4',
+    'contributing_factor_vehicle_5', 'vehicle_type_code1', 'vehicle_type_code2',
+    'vehicle_type_code_3', 'vehicle_type_code_4', 'vehicle_type_code_5'
+]
+
+# Dtype of the counters once loaded
+COUNTER_DTYPE = 'Int16'
+
+# Dtypes applied while parsing. Columns not listed are left to inference: collision_id and
+# the counters (int64, or float64/object when a value is blank or malformed) are cast after
+# parsing by cast_integer_columns, which is much faster than nullable integer parsing and
+# can report the offending column; latitude/longitude are float64 and the free-text
+# dates, times, street names and location object stay object.
+DTYPES = {column: 'category' for column in CATEGORICAL_COLUMNS}
+
+# Integer columns and their nullable dtypes once loaded
+INTEGER_DTYPES = {'collision_id': 'Int64', **{column: COUNTER_DTYPE for column in COUNTER_COLUMNS}}
+
+# Non-null values reported in a cast error
+MAX_REPORTED_VALUES = 5
+
+
+def dtypes_for(columns=None):
+    """
+    Look up the parse-time dtypes of a set of columns.
+
+    Parameters:
+        columns (list): The columns being read. All known columns when omitted.
+
+    Returns:
+        dict: Column name to dtype, for the columns that have one.
+    """
+    if columns is None:
+        return dict(DTYPES)
+    return {column: DTYPES[column] for column in columns if column in DTYPES}
+
+
+def invalid_integers(values, dtype='Int64'):
+    """
+    Flag the non-null values that are not whole numbers in the range of an integer dtype.
+
+    Parameters:
+        values (pd.Series): The parsed values, numeric or text.
+        dtype (str): The nullable integer dtype the values are meant for.
+
+    Returns:
+        pd.Series: True where a value is present but not a valid integer.
+    """
+    numbers = values if pd.api.types.is_numeric_dtype(values) else pd.to_numeric(values, errors='coerce')
+    limits = np.iinfo(dtype.lower())
+    whole = numbers.between(limits.min, limits.max)
+    if not pd.api.types.is_integer_dtype(numbers):
+        whole &= numbers % 1 == 0
+    return values.notna() & ~whole.fillna(False).astype(bool)
+
+
+def cast_integer_columns(data, strict=True):
+    """
+    Cast collision_id and the injury/fatality counters to their nullable integer dtypes.
+
+    A column is only cast when every non-null value is a whole number in the dtype's
+    range; a blank value becomes a null.
+
+    Parameters:
+        data (pd.DataFrame): The parsed data.
+        strict (bool): Raise on a column that cannot be cast. Otherwise it is left as
+            parsed, so validate.py's rules can report its values.
+
+    Returns:
+        pd.DataFrame: The data with its integer columns cast.
+
+    Raises:
+        ValueError: In strict mode, naming the column and some of its invalid values.
+    """
+    for column, dtype in INTEGER_DTYPES.items():
+        if column not in data.columns or data[column].dtype == dtype:
+            continue
+        invalid = invalid_integers(data[column], dtype)
+        if invalid.any():
+            if strict:
+                examples = data[column][invalid].unique()[:MAX_REPORTED_VALUES].tolist()
+                raise ValueError(f"Column '{column}' has {int(invalid.sum())} values that are not {dtype} "
+                                 f"integers, e.g. {examples}.")
+            continue
+        data[column] = pd.to_numeric(data[column]).astype(dtype)
+    return data
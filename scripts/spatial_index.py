@@ -0,0 +1,384 @@
+import os
+import uuid
+import pickle
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from config.db_config import database_identity, get_db_connection
+from scripts.columnar import is_parquet, read_parquet
+from scripts.geo import BASE_CELL_METERS, encode_tiles, project
+from scripts.query_cache import data_version
+
+logger = logging.getLogger("SPATIAL_INDEX")
+
+# The persisted index of the entities table
+INDEX_PATH = "./data/index/collision_points.pkl"
+
+# Columns the index keeps for every collision
+POINT_COLUMNS = [
+    'collision_id',
+    'crash_date',
+    'latitude',
+    'longitude',
+    'number_of_persons_injured',
+    'number_of_persons_killed',
+]
+
+POINTS_QUERY = (
+    f"SELECT {', '.join(POINT_COLUMNS)} FROM entities_collision_data "
+    "WHERE latitude IS NOT NULL AND longitude IS NOT NULL"
+)
+
+# Entity rows fetched per round trip when building from the database
+DEFAULT_FETCH_SIZE = 100000
+
+# Columns of every match returned by the queries
+MATCH_COLUMNS = ['query', 'collision_id', 'crash_date', 'injured', 'killed', 'distance_m']
+
+
+def read_points(source=None, connection=None, fetch_size=DEFAULT_FETCH_SIZE):
+    """
+    Read the collision coordinates to index.
+
+    Parameters:
+        source (str): A cleaned CSV file or Parquet dataset (e.g. the transform output).
+            The entities table is read when omitted.
+        connection (mysql.connector.connection.MySQLConnection): An open database
+            connection for the entities table. One is borrowed from the pool when omitted.
+        fetch_size (int): The number of entity rows fetched per round trip.
+
+    Returns:
+        pd.DataFrame: The POINT_COLUMNS of every collision.
+    """
+    if source is not None:
+        if is_parquet(source):
+            return read_parquet(source, POINT_COLUMNS)
+        return pd.read_csv(source, usecols=lambda column: column in POINT_COLUMNS)
+
+    owns_connection = connection is None
+    connection = connection or get_db_connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute(POINTS_QUERY)
+        chunks = []
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            chunks.append(pd.DataFrame.from_records(rows, columns=POINT_COLUMNS))
+    finally:
+        cursor.close()
+        if owns_connection:
+            connection.close()
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=POINT_COLUMNS)
+
+
+def build_index(points, version=None):
+    """
+    Build the spatial index of a set of collisions.
+
+    The coordinates are projected to metres (see geo.project), so radii and distances
+    are in metres, and indexed with a KD-tree. Collisions outside the box around
+    New York City are left out.
+
+    Parameters:
+        points (pd.DataFrame): The POINT_COLUMNS of the collisions, as from read_points.
+        version (str): What the index was built from, checked by get_index.
+
+    Returns:
+        dict: The KD-tree ('tree') and, aligned with its points, the 'collision_id',
+            'crash_date', 'injured' and 'killed' arrays.
+    """
+    x, y, inside = project(points['latitude'], points['longitude'])
+    # Points are stored in the Morton order of their grid cells, so the neighbours a query
+    # gathers sit close together in memory
+    inside = np.flatnonzero(inside)
+    inside = inside[np.argsort(
+        encode_tiles(x[inside] // BASE_CELL_METERS, y[inside] // BASE_CELL_METERS), kind='stable'
+    )]
+    counters = {
+        name: pd.to_numeric(points[column], errors='coerce').fillna(0).to_numpy(dtype=np.int16)[inside]
+        for name, column in (('injured', 'number_of_persons_injured'), ('killed', 'number_of_persons_killed'))
+    }
+    index = {
+        'version': version,
+        # Leaves split at the midpoint instead of the median: faster to build, as fast to query
+        'tree': cKDTree(np.column_stack([x[inside], y[inside]]), balanced_tree=False),
+        'collision_id': pd.to_numeric(points['collision_id']).to_numpy(dtype=np.int64)[inside],
+        'crash_date': pd.to_datetime(points['crash_date'], errors='coerce').to_numpy(dtype='datetime64[ns]')[inside],
+        **counters,
+    }
+    logger.info(f"Indexed {len(index['collision_id'])} of {len(points)} collisions.")
+    return index
+
+
+def save_index(index, path=INDEX_PATH):
+    """
+    Persist an index, so it reloads without rebuilding the tree.
+
+    Parameters:
+        index (dict): The index from build_index.
+        path (str): The file to write.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Write atomically, so a concurrent reader never sees a partial file
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "wb") as handle:
+        pickle.dump(index, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+
+def load_index(path=INDEX_PATH):
+    """
+    Load a persisted index.
+
+    The file is a pickle written by save_index; only load indexes this pipeline wrote.
+
+    Parameters:
+        path (str): The file to read.
+
+    Returns:
+        dict: The index, or None if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as handle:
+        return pickle.load(handle)
+
+
+def get_index(source=None, path=None, rebuild=False):
+    """
+    Load the persisted index of a source, rebuilding it when the data changed.
+
+    The index of the entities table is stale once a load stage bumps the query cache's
+    data version or the database settings point at another database; the index of a
+    file is stale once the file is modified.
+
+    Parameters:
+        source (str): A cleaned CSV file or Parquet dataset; the entities table when omitted.
+        path (str): The index file. Defaults to INDEX_PATH for the entities table and to
+            '<source>.points.pkl' for a file.
+        rebuild (bool): Rebuild even if the persisted index is current.
+
+    Returns:
+        dict: The index.
+    """
+    if source is None:
+        path = path or INDEX_PATH
+        version = f"{database_identity()}@{data_version()}"
+    else:
+        path = path or f"{source.rstrip('/')}.points.pkl"
+        version = str(os.path.getmtime(source))
+
+    index = None if rebuild else load_index(path)
+    if index is not None and index['version'] == version:
+        return index
+
+    index = build_index(read_points(source), version)
+    save_index(index, path)
+    logger.info(f"Saved the spatial index to {path}.")
+    return index
+
+
+def _selected(index, since=None, until=None, min_injured=0, min_killed=0):
+    """The mask of the indexed collisions passing the filters, or None without filters."""
+    mask = None
+    conditions = (
+        (since is not None, lambda: index['crash_date'] >= np.datetime64(since, 'ns')),
+        (until is not None, lambda: index['crash_date'] < np.datetime64(until, 'D') + np.timedelta64(1, 'D')),
+        (min_injured > 0, lambda: index['injured'] >= min_injured),
+        (min_killed > 0, lambda: index['killed'] >= min_killed),
+    )
+    for applies, condition in conditions:
+        if applies:
+            mask = condition() if mask is None else mask & condition()
+    return mask
+
+
+def _query_points(latitude, longitude):
+    """Project query coordinates; points outside the box are kept and simply match less."""
+    x, y, _ = project(np.atleast_1d(latitude), np.atleast_1d(longitude))
+    if np.isnan(x).any() or np.isnan(y).any():
+        raise ValueError("Query coordinates must be numbers.")
+    return np.column_stack([x, y])
+
+
+def _matches(index, queries, positions, distances):
+    """Assemble the matches of a batch of queries into one DataFrame."""
+    return pd.DataFrame({
+        'query': queries,
+        'collision_id': index['collision_id'][positions],
+        'crash_date': index['crash_date'][positions],
+        'injured': index['injured'][positions],
+        'killed': index['killed'][positions],
+        'distance_m': distances,
+    }, columns=MATCH_COLUMNS)
+
+
+def _ball_matches(index, centers, radius, p=2.0):
+    """Query numbers and positions of the indexed points within radius (a scalar or one per centre) of each centre."""
+    neighbours = index['tree'].query_ball_point(centers, radius, p=p, return_sorted=False)
+    lengths = np.fromiter((len(found) for found in neighbours), dtype=np.int64, count=len(neighbours))
+    queries = np.repeat(np.arange(len(centers)), lengths)
+    positions = np.concatenate(neighbours).astype(np.int64) if lengths.sum() else np.empty(0, dtype=np.int64)
+    return queries, positions
+
+
+def query_radius(index, latitude, longitude, meters, since=None, until=None, min_injured=0, min_killed=0):
+    """
+    Find the collisions within a distance of one or many points.
+
+    Parameters:
+        index (dict): The index from get_index or build_index.
+        latitude (float or array-like): The latitude of each query point.
+        longitude (float or array-like): The longitude of each query point.
+        meters (float): The search radius in metres.
+        since (str): Only collisions on or after this date ('YYYY-MM-DD').
+        until (str): Only collisions on or before this date.
+        min_injured (int): Only collisions with at least this many persons injured.
+        min_killed (int): Only collisions with at least this many persons killed.
+
+    Returns:
+        pd.DataFrame: One row per match with the MATCH_COLUMNS, 'query' being the
+            position of the query point; nearest first within each query.
+    """
+    centers = _query_points(latitude, longitude)
+    queries, positions = _ball_matches(index, centers, meters)
+    mask = _selected(index, since, until, min_injured, min_killed)
+    if mask is not None:
+        keep = mask[positions]
+        queries, positions = queries[keep], positions[keep]
+
+    distances = np.hypot(*(index['tree'].data[positions] - centers[queries]).T)
+    order = np.lexsort((distances, queries))
+    return _matches(index, queries[order], positions[order], distances[order])
+
+
+def radius_totals(index, latitude, longitude, meters, since=None, until=None, min_injured=0, min_killed=0):
+    """
+    Count the collisions, injuries and fatalities within a distance of one or many points.
+
+    Takes the same arguments as query_radius, e.g. the injuries within 250 m of
+    thousands of intersections since 2020 in one call.
+
+    Returns:
+        pd.DataFrame: 'collisions', 'injuries' and 'fatalities', one row per query point.
+    """
+    centers = _query_points(latitude, longitude)
+    queries, positions = _ball_matches(index, centers, meters)
+    mask = _selected(index, since, until, min_injured, min_killed)
+    if mask is not None:
+        keep = mask[positions]
+        queries, positions = queries[keep], positions[keep]
+
+    count = len(centers)
+    return pd.DataFrame({
+        'collisions': np.bincount(queries, minlength=count),
+        'injuries': np.bincount(queries, weights=index['injured'][positions], minlength=count).astype(np.int64),
+        'fatalities': np.bincount(queries, weights=index['killed'][positions], minlength=count).astype(np.int64),
+    })
+
+
+def query_nearest(index, latitude, longitude, k=1, max_meters=np.inf, since=None, until=None, min_injured=0,
+                  min_killed=0):
+    """
+    Find the k collisions nearest to one or many points.
+
+    With filters, a tree over the matching collisions is built for the call, so the
+    k nearest matching collisions are found rather than the matches among the k nearest.
+
+    Parameters:
+        index (dict): The index from get_index or build_index.
+        latitude (float or array-like): The latitude of each query point.
+        longitude (float or array-like): The longitude of each query point.
+        k (int): The number of collisions per query point.
+        max_meters (float): Ignore collisions farther than this.
+        since, until, min_injured, min_killed: Filters, as for query_radius.
+
+    Returns:
+        pd.DataFrame: Up to k rows per query point with the MATCH_COLUMNS, nearest first.
+    """
+    centers = _query_points(latitude, longitude)
+    tree, subset = index['tree'], None
+    mask = _selected(index, since, until, min_injured, min_killed)
+    if mask is not None:
+        subset = np.flatnonzero(mask)
+        tree = cKDTree(index['tree'].data[subset], balanced_tree=False)
+    if tree.n == 0:
+        return _matches(index, [], np.empty(0, dtype=np.int64), [])
+
+    # A list of ranks keeps the results two-dimensional for k=1
+    ranks = list(range(1, min(k, tree.n) + 1))
+    distances, found = tree.query(centers, k=ranks, distance_upper_bound=max_meters)
+    # Missing neighbours (beyond max_meters) are reported as position tree.n
+    queries = np.repeat(np.arange(len(centers)), distances.shape[1])
+    distances, found = distances.ravel(), found.ravel()
+    keep = found < tree.n
+    positions = found[keep] if subset is None else subset[found[keep]]
+    return _matches(index, queries[keep], positions, distances[keep])
+
+
+def query_bbox(index, south, west, north, east, since=None, until=None, min_injured=0, min_killed=0):
+    """
+    Find the collisions inside one or many latitude/longitude boxes.
+
+    Parameters:
+        index (dict): The index from get_index or build_index.
+        south, west, north, east (float or array-like): The bounds of each box in degrees.
+        since, until, min_injured, min_killed: Filters, as for query_radius.
+
+    Returns:
+        pd.DataFrame: One row per match with the MATCH_COLUMNS, 'distance_m' being the
+            distance from the box centre.
+    """
+    south, west, north, east = (np.atleast_1d(np.asarray(bound, dtype=float)) for bound in (south, west, north, east))
+    lower, upper = _query_points(south, west), _query_points(north, east)
+    centers = (lower + upper) / 2
+    # A square of the larger half-side around each centre (Chebyshev distance), cut to the box
+    half_sides = (upper - lower).max(axis=1) / 2
+    queries, positions = _ball_matches(index, centers, half_sides, p=np.inf)
+
+    points = index['tree'].data[positions]
+    keep = ((points >= lower[queries]) & (points <= upper[queries])).all(axis=1)
+    mask = _selected(index, since, until, min_injured, min_killed)
+    if mask is not None:
+        keep &= mask[positions]
+    queries, positions = queries[keep], positions[keep]
+    distances = np.hypot(*(index['tree'].data[positions] - centers[queries]).T)
+    return _matches(index, queries, positions, distances)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Radius, nearest and bounding box queries over the collisions.")
+    parser.add_argument("--source", help="Index a cleaned CSV file or Parquet dataset instead of the entities table.")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the persisted index.")
+    parser.add_argument("--near", nargs=2, type=float, metavar=("LATITUDE", "LONGITUDE"), help="The query point.")
+    parser.add_argument("--radius", type=float, default=250, help="Radius around --near in metres.")
+    parser.add_argument("--nearest", type=int, help="List the K collisions nearest to --near instead.")
+    parser.add_argument("--since", help="Only collisions on or after this date (YYYY-MM-DD).")
+    parser.add_argument("--until", help="Only collisions on or before this date (YYYY-MM-DD).")
+    parser.add_argument("--min-injured", type=int, default=0, help="Only collisions with this many injured.")
+    parser.add_argument("--min-killed", type=int, default=0, help="Only collisions with this many killed.")
+    args = parser.parse_args()
+
+    index = get_index(args.source, rebuild=args.rebuild)
+    print(f"Spatial index of {len(index['collision_id'])} collisions.")
+    if args.near is None:
+        return
+
+    filters = dict(since=args.since, until=args.until, min_injured=args.min_injured, min_killed=args.min_killed)
+    latitude, longitude = args.near
+    if args.nearest:
+        print(query_nearest(index, latitude, longitude, k=args.nearest, **filters).to_string(index=False))
+    else:
+        totals = radius_totals(index, latitude, longitude, args.radius, **filters).iloc[0]
+        print(
+            f"Within {args.radius:g} m of ({latitude}, {longitude}): {totals['collisions']} collisions, "
+            f"{totals['injuries']} injured, {totals['fatalities']} killed."
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import logging
+import pandas as pd
+
+logger = logging.getLogger("STREAMING")
+
+# Rows sampled from the head of a file to estimate the in-memory size of a row
+SAMPLE_ROWS = 1000
+
+# Copies of a chunk alive at the same time while it moves through the pipeline:
+# the parsed chunk, the preprocessed frame, the batch being converted to Python
+# objects and the parser buffer for the next chunk
+WORKING_COPIES = 4
+
+
+def estimate_row_bytes(csv_file_path, **read_csv_kwargs):
+    """
+    Estimate the in-memory size of one parsed row of a CSV file.
+
+    Parameters:
+        csv_file_path (str): The path to the CSV file.
+        **read_csv_kwargs: Extra arguments passed to pd.read_csv.
+
+    Returns:
+        float: The average number of bytes per row in a DataFrame.
+    """
+    sample = pd.read_csv(csv_file_path, nrows=SAMPLE_ROWS, **read_csv_kwargs)
+    if sample.empty:
+        return 1.0
+    return max(1.0, sample.memory_usage(deep=True).sum() / len(sample))
+
+
+def chunk_size_for_memory(csv_file_path, memory_limit_mb, **read_csv_kwargs):
+    """
+    Pick the largest chunk size whose working set fits within a memory ceiling.
+
+    Parameters:
+        csv_file_path (str): The path to the CSV file.
+        memory_limit_mb (float): The memory ceiling for in-flight data, in megabytes.
+        **read_csv_kwargs: Extra arguments passed to pd.read_csv.
+
+    Returns:
+        int: The number of rows per chunk (at least 1).
+    """
+    row_bytes = estimate_row_bytes(csv_file_path, **read_csv_kwargs)
+    return max(1, int(memory_limit_mb * 1024 * 1024 / (row_bytes * WORKING_COPIES)))
+
+
+def iter_csv_chunks(csv_file_path, chunk_size=None, memory_limit_mb=None, **read_csv_kwargs):
+    """
+    Read a CSV file as a stream of DataFrame chunks.
+
+    Without chunk_size or memory_limit_mb the whole file is yielded as a single chunk.
+    When both are given, the smaller of the two resulting chunk sizes wins.
+
+    Parameters:
+        csv_file_path (str): The path to the CSV file.
+        chunk_size (int): The number of rows per chunk.
+        memory_limit_mb (float): A memory ceiling used to derive the chunk size.
+        **read_csv_kwargs: Extra arguments passed to pd.read_csv.
+
+    Yields:
+        pd.DataFrame: The next chunk of rows.
+    """
+    if memory_limit_mb is not None:
+        budget_rows = chunk_size_for_memory(csv_file_path, memory_limit_mb, **read_csv_kwargs)
+        chunk_size = min(chunk_size, budget_rows) if chunk_size else budget_rows
+        logger.info(f"Streaming {csv_file_path} in chunks of {chunk_size} rows ({memory_limit_mb} MB ceiling).")
+
+    if not chunk_size:
+        yield pd.read_csv(csv_file_path, **read_csv_kwargs)
+        return
+
+    with pd.read_csv(csv_file_path, chunksize=chunk_size, **read_csv_kwargs) as reader:
+        for chunk in reader:
+            yield chunk
@@ -0,0 +1,285 @@
+import logging
+import numpy as np
+import pandas as pd
+from scripts.bulk_load import dataframe_to_rows
+
+logger = logging.getLogger("SUMMARIES")
+
+
+def _borough_key(rows):
+    return pd.to_numeric(rows['borough_id']).fillna(0).astype('int64')
+
+
+def _street_key(rows):
+    return rows['on_street_name'].fillna('').astype(object)
+
+
+def _days(rows):
+    return pd.to_datetime(rows['crash_date'], cache=False).to_numpy(dtype='datetime64[D]')
+
+
+def _as_dates(days, index):
+    """Python dates of a datetime64[D] array, converting each distinct day once."""
+    distinct, positions = np.unique(days, return_inverse=True)
+    return pd.Series(distinct.astype(object)[positions], index=index)
+
+
+def _date_key(rows):
+    return _as_dates(_days(rows), rows.index)
+
+
+def _week_key(rows):
+    days = _days(rows)
+    # 1970-01-01, day 0, was a Thursday: weekday() is 3
+    return _as_dates(days - (days.astype('int64') + 3) % 7, rows.index)
+
+
+def _month_key(rows):
+    return _as_dates(_days(rows).astype('datetime64[M]').astype('datetime64[D]'), rows.index)
+
+
+def _hour_key(rows):
+    return pd.to_timedelta(rows['crash_time'], errors='coerce').dt.components['hours'].astype('Int64')
+
+
+def _factor_key(rows):
+    return pd.to_numeric(rows['contributing_factor_vehicle_1_id']).astype('Int64')
+
+
+# Group keys of the summary tables, computed from entities_collision_data rows:
+# - sql:      the SQL expression over the entities table
+# - required: a condition rows must meet to be counted (the views ignore the others)
+# - compute:  the pandas equivalent over a batch of entity rows; a null result drops the row
+# Keys are part of the primary key, so a missing borough is stored as 0 and a missing street as ''.
+KEYS = {
+    'borough_id': {'sql': "COALESCE(borough_id, 0)", 'required': None, 'compute': _borough_key},
+    'on_street_name': {'sql': "COALESCE(on_street_name, '')", 'required': None, 'compute': _street_key},
+    'collision_date': {'sql': "DATE(crash_date)", 'required': None, 'compute': _date_key},
+    # Weeks start on Monday and are keyed by that day; months by their first day
+    'week_start': {'sql': "SUBDATE(DATE(crash_date), WEEKDAY(crash_date))", 'required': None, 'compute': _week_key},
+    'month_start': {
+        'sql': "SUBDATE(DATE(crash_date), DAYOFMONTH(crash_date) - 1)", 'required': None, 'compute': _month_key,
+    },
+    'hour_of_day': {'sql': "HOUR(crash_time)", 'required': "crash_time IS NOT NULL", 'compute': _hour_key},
+    'contributing_factor_id': {
+        'sql': "contributing_factor_vehicle_1_id",
+        'required': "contributing_factor_vehicle_1_id IS NOT NULL",
+        'compute': _factor_key,
+    },
+}
+
+# Measure column -> the entities counter it sums (None counts the rows)
+TOTALS = {
+    'total_collisions': None,
+    'total_injuries': 'number_of_persons_injured',
+    'total_fatalities': 'number_of_persons_killed',
+}
+SAFETY = {
+    'pedestrians_injured': 'number_of_pedestrians_injured',
+    'pedestrians_killed': 'number_of_pedestrians_killed',
+    'cyclists_injured': 'number_of_cyclist_injured',
+    'cyclists_killed': 'number_of_cyclist_killed',
+}
+
+# Summary tables behind the analysis views (see migrations/0004_summary_tables.sql). The
+# daily, weekly and monthly borough totals are the time-series rollups behind the trend
+# charts (migrations/0006_trend_rollups.sql).
+SUMMARIES = {
+    'high_risk_areas_summary': {
+        'view': 'high_risk_areas', 'keys': ['borough_id', 'on_street_name'], 'measures': TOTALS,
+    },
+    'collision_severity_summary': {
+        'view': 'collision_severity_trends', 'keys': ['collision_date'], 'measures': TOTALS,
+    },
+    'contributing_factors_summary': {
+        'view': 'contributing_factors_analysis', 'keys': ['contributing_factor_id'], 'measures': TOTALS,
+    },
+    'cyclist_pedestrian_summary': {
+        'view': 'cyclist_pedestrian_safety', 'keys': ['borough_id'], 'measures': SAFETY,
+    },
+    'time_patterns_summary': {
+        'view': 'time_based_collision_patterns', 'keys': ['hour_of_day'], 'measures': TOTALS,
+    },
+    'policy_effectiveness_summary': {
+        'view': 'policy_effectiveness', 'keys': ['borough_id', 'collision_date'], 'measures': TOTALS,
+    },
+    'weekly_trends_summary': {
+        'view': 'weekly_collision_trends', 'keys': ['borough_id', 'week_start'], 'measures': TOTALS,
+    },
+    'monthly_trends_summary': {
+        'view': 'monthly_collision_trends', 'keys': ['borough_id', 'month_start'], 'measures': TOTALS,
+    },
+}
+
+
+def summary_for_view(view_name):
+    """
+    Find the summary table behind an analysis view.
+
+    Parameters:
+        view_name (str): The view.
+
+    Returns:
+        str: The summary table name.
+    """
+    for table_name, spec in SUMMARIES.items():
+        if spec['view'] == view_name:
+            return table_name
+    raise ValueError(f"No summary table backs view '{view_name}'.")
+
+
+def summary_query(table_name):
+    """
+    Build the SELECT aggregating entities_collision_data into a summary table.
+
+    Parameters:
+        table_name (str): The summary table (see SUMMARIES).
+
+    Returns:
+        str: The aggregate query, with one column per key and measure.
+    """
+    spec = SUMMARIES[table_name]
+    selects = [f"{KEYS[key]['sql']} AS {key}" for key in spec['keys']]
+    selects += [
+        f"COALESCE(SUM({column}), 0) AS {measure}" if column else f"COUNT(*) AS {measure}"
+        for measure, column in spec['measures'].items()
+    ]
+    required = [KEYS[key]['required'] for key in spec['keys'] if KEYS[key]['required']]
+    return (
+        f"SELECT {', '.join(selects)} FROM entities_collision_data"
+        + (f" WHERE {' AND '.join(required)}" if required else "")
+        # Group by the expressions: GROUP BY borough_id would mean the column, not the alias
+        + f" GROUP BY {', '.join(KEYS[key]['sql'] for key in spec['keys'])}"
+    )
+
+
+def summary_deltas(rows, tables=None):
+    """
+    Aggregate a batch of newly transferred entity rows into per-summary deltas.
+
+    Parameters:
+        rows (pd.DataFrame): Entity rows (dimension keys, not text), as inserted into
+            entities_collision_data.
+        tables (list): The summary tables to compute. All of SUMMARIES when omitted.
+
+    Returns:
+        dict: Summary table name to a DataFrame of its key and measure columns.
+    """
+    deltas = {}
+    for table_name in tables or SUMMARIES:
+        spec = SUMMARIES[table_name]
+        frame = pd.DataFrame({key: KEYS[key]['compute'](rows) for key in spec['keys']}, index=rows.index)
+        for measure, column in spec['measures'].items():
+            frame[measure] = pd.to_numeric(rows[column]).fillna(0).astype('int64') if column else 1
+        frame = frame.dropna(subset=spec['keys'])
+        deltas[table_name] = frame.groupby(spec['keys'], sort=False).sum().reset_index()
+    return deltas
+
+
+def net_deltas(added, removed):
+    """
+    Net the deltas of entity rows added with those of the rows they replace.
+
+    A corrected collision is removed with its old values and added with its new ones,
+    so its old groups lose what its new groups gain. Groups whose measures cancel out
+    are left out.
+
+    Parameters:
+        added (dict): Deltas of the inserted rows, as from summary_deltas.
+        removed (dict): Deltas of the deleted rows, as from summary_deltas.
+
+    Returns:
+        dict: Summary table name to the net delta rows, negative where groups shrink.
+    """
+    deltas = {}
+    for table_name, delta in added.items():
+        spec = SUMMARIES[table_name]
+        measures = list(spec['measures'])
+        negated = removed[table_name].copy()
+        negated[measures] = -negated[measures]
+        frames = [frame for frame in (delta, negated) if len(frame)]
+        if not frames:
+            deltas[table_name] = delta
+            continue
+        combined = pd.concat(frames, ignore_index=True).groupby(spec['keys'], sort=False).sum().reset_index()
+        deltas[table_name] = combined[(combined[measures] != 0).any(axis=1)].reset_index(drop=True)
+    return deltas
+
+
+def build_increment_query(table_name):
+    """
+    Build the INSERT adding delta rows to a summary table.
+
+    Parameters:
+        table_name (str): The summary table (see SUMMARIES).
+
+    Returns:
+        str: An INSERT that creates missing groups and adds the measures of existing ones.
+    """
+    spec = SUMMARIES[table_name]
+    columns = spec['keys'] + list(spec['measures'])
+    return (
+        f"INSERT INTO {table_name} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))}) "
+        "ON DUPLICATE KEY UPDATE "
+        + ", ".join(f"{measure} = {measure} + VALUES({measure})" for measure in spec['measures'])
+    )
+
+
+def apply_deltas(connection, deltas):
+    """
+    Add per-summary deltas to the summary tables.
+
+    The caller owns the transaction: committing the deltas with the entity rows they
+    were computed from keeps the summaries exactly in step with the entities table.
+    Groups that negative deltas (see net_deltas) leave without collisions are deleted,
+    as rebuilding the table would not produce them.
+
+    Parameters:
+        connection (mysql.connector.connection.MySQLConnection): An open database connection.
+        deltas (dict): Summary table name to delta rows, as from summary_deltas.
+
+    Returns:
+        int: The number of summary rows touched.
+    """
+    touched = 0
+    cursor = connection.cursor()
+    try:
+        for table_name, delta in deltas.items():
+            if len(delta):
+                spec = SUMMARIES[table_name]
+                cursor.executemany(
+                    build_increment_query(table_name),
+                    dataframe_to_rows(delta, spec['keys'] + list(spec['measures']))
+                )
+                touched += len(delta)
+                if 'total_collisions' in spec['measures'] and (delta['total_collisions'] < 0).any():
+                    cursor.execute(f"DELETE FROM {table_name} WHERE total_collisions = 0")
+    finally:
+        cursor.close()
+    return touched
+
+
+def rebuild_summaries(connection):
+    """
+    Recompute every summary table from the whole entities table.
+
+    Use this after entities_collision_data was loaded or changed outside the batched
+    transfer, e.g. by the single INSERT ... SELECT or a manual fix. The caller owns
+    the transaction.
+
+    Parameters:
+        connection (mysql.connector.connection.MySQLConnection): An open database connection.
+    """
+    cursor = connection.cursor()
+    try:
+        for table_name, spec in SUMMARIES.items():
+            cursor.execute(f"DELETE FROM {table_name}")
+            cursor.execute(
+                f"INSERT INTO {table_name} ({', '.join(spec['keys'] + list(spec['measures']))}) "
+                + summary_query(table_name)
+            )
+            logger.info(f"Rebuilt {table_name}.")
+    finally:
+        cursor.close()
+
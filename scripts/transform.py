@@ -1,48 +1,167 @@
+import os
+import shutil
 import pandas as pd
 import numpy as np
+from scripts.columnar import intermediate_format, write_parquet_dataset
+from scripts.dedup_index import EMPTY_INDEX, filter_unseen, index_path, load_index
+from scripts.schema import STAGING_COLUMNS, cast_integer_columns, dtypes_for
+from scripts.streaming import iter_csv_chunks
 
-# Load raw data
-data = pd.read_csv("data/input/raw_api_data.csv")
-
-# Drop irrelevant columns
-columns_to_keep = [
-    'collision_id', 'crash_date', 'crash_time', 'borough', 'zip_code',
-    'latitude', 'longitude', 'on_street_name', 'cross_street_name',
-    'off_street_name', 'number_of_persons_injured', 'number_of_persons_killed',
-    'number_of_pedestrians_injured', 'number_of_pedestrians_killed',
-    'number_of_cyclist_injured', 'number_of_cyclist_killed',
-    'number_of_motorist_injured', 'number_of_motorist_killed',
-    'contributing_factor_vehicle_1', 'contributing_factor_vehicle_2',
-    'vehicle_type_code1', 'vehicle_type_code2'
-]
-data = data[columns_to_keep]
-
-# Handle missing data
-data['latitude'] = pd.to_numeric(data['latitude'], errors='coerce')
-data['longitude'] = pd.to_numeric(data['longitude'], errors='coerce')
-data.dropna(subset=['latitude', 'longitude', 'crash_date'], inplace=True)
+RAW_INPUT_FILE = "data/input/raw_api_data.csv"
+CLEANED_CSV_FILE = "data/output/cleaned_api_data.csv"
+CLEANED_PARQUET_DATASET = "data/output/cleaned_api_data.parquet"
 
-# Standardize text fields
-# Remove any leading/trailing spaces and replace multiple spaces with a single space
-text_fields = [
+# Free-text fields normalized by clean_data
+TEXT_FIELDS = [
     'borough', 'on_street_name', 'cross_street_name', 'off_street_name',
     'contributing_factor_vehicle_1', 'contributing_factor_vehicle_2',
     'vehicle_type_code1', 'vehicle_type_code2'
 ]
 
-for field in text_fields:
-    data[field] = data[field].astype(str).str.strip()  # Remove leading/trailing spaces
-    data[field] = data[field].str.replace(r'\s+', ' ', regex=True)  # Replace multiple spaces with one
-    data[field] = data[field].replace('nan', None)  # Handle string 'nan' as None for consistency
+# Rows without these are dropped
+REQUIRED_FIELDS = ['latitude', 'longitude', 'crash_date']
+
+# Any run of whitespace, collapsed to a single space
+WHITESPACE_PATTERN = r'\s+'
+
+
+def normalize_text(values):
+    """
+    Strip a text column and collapse inner runs of whitespace to a single space.
+
+    The column is factorized first and only its distinct values are normalized, then
+    mapped back through the codes, so the string work is proportional to the number of
+    distinct values rather than the number of rows. Nulls stay null (they are never
+    turned into the string 'nan'), and values that are blank after stripping become null.
+    Categorical columns stay categorical.
+
+    Parameters:
+        values (pd.Series): The text column.
+
+    Returns:
+        pd.Series: The normalized column, aligned with the input.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+
+    # Normalize each distinct value once
+    cleaned = pd.Series(uniques, dtype=object).astype(str)
+    cleaned = cleaned.str.replace(WHITESPACE_PATTERN, ' ', regex=True).str.strip()
+    cleaned = cleaned.where(cleaned != '')
+
+    # Normalizing can merge distinct raw values ('QUEENS ' and 'QUEENS'), so re-code them
+    categories = pd.Index(cleaned.dropna().unique())
+    new_codes = np.append(categories.get_indexer(cleaned), -1)[codes]
+    normalized = pd.Categorical.from_codes(new_codes, categories)
+
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return pd.Series(normalized, index=values.index, name=values.name)
+    return pd.Series(np.asarray(normalized, dtype=object), index=values.index, name=values.name).where(
+        new_codes != -1, None
+    )
+
+
+def clean_data(data):
+    """
+    Clean raw collision records for the staging table.
+
+    - Keeps the staging columns that are present, in staging order.
+    - Coerces latitude/longitude to numbers and drops rows without coordinates or a crash date.
+    - Normalizes the text fields (see normalize_text).
+    - Drops repeated collision_ids, keeping the first.
+
+    The input is not modified, and every step is row-local apart from deduplication, so
+    a large file can be cleaned chunk by chunk (see clean_chunks).
+
+    Parameters:
+        data (pd.DataFrame): Raw records, e.g. read from raw_api_data.csv.
+
+    Returns:
+        pd.DataFrame: The cleaned records.
+    """
+    # Drop irrelevant columns
+    data = data[[column for column in STAGING_COLUMNS if column in data.columns]].copy()
+
+    # Handle missing data
+    for column in ('latitude', 'longitude'):
+        if column in data.columns:
+            data[column] = pd.to_numeric(data[column], errors='coerce')
+    data = data.dropna(subset=[column for column in REQUIRED_FIELDS if column in data.columns])
+
+    # Standardize text fields in one pass over their distinct values
+    for field in TEXT_FIELDS:
+        if field in data.columns:
+            data[field] = normalize_text(data[field])
+
+    # Deduplicate
+    return data.drop_duplicates(subset=['collision_id'])
+
+
+def clean_chunks(chunks, seen_index=EMPTY_INDEX):
+    """
+    Clean a stream of raw chunks, dropping collision_ids already seen in earlier chunks
+    or present in a persisted seen-ID index.
+
+    Parameters:
+        chunks (iterable): Raw DataFrames.
+        seen_index (np.ndarray): A sorted array of collision_ids to drop (see scripts/dedup_index.py).
+
+    Yields:
+        pd.DataFrame: The cleaned rows of each chunk.
+    """
+    run_ids = EMPTY_INDEX
+    for chunk in chunks:
+        cleaned, run_ids = filter_unseen(clean_data(chunk), seen_index, run_ids)
+        yield cleaned
+
+
+def transform_file(input_path=RAW_INPUT_FILE, output_format=None, chunk_size=None, memory_limit_mb=None,
+                   skip_loaded=False):
+    """
+    Clean the raw CSV file and write the intermediate file read by the staging loader.
+
+    Parameters:
+        input_path (str): The raw CSV file.
+        output_format (str): 'csv' or 'parquet'. Defaults to the INTERMEDIATE_FORMAT setting.
+        chunk_size (int): Clean the file in chunks of this many rows.
+        memory_limit_mb (float): Clean the file in chunks sized to this memory ceiling.
+        skip_loaded (bool): Leave out collision_ids already loaded into the staging table,
+            per its seen-ID index, so overlapping API windows only carry new rows forward.
+
+    Returns:
+        tuple: The output path and the number of rows written.
+    """
+    output_format = output_format or intermediate_format()
+    output_path = CLEANED_PARQUET_DATASET if output_format == "parquet" else CLEANED_CSV_FILE
+
+    # Load raw data with compact dtypes
+    chunks = iter_csv_chunks(input_path, chunk_size, memory_limit_mb, dtype=dtypes_for())
+    seen_index = load_index(index_path("staging_collision_data")) if skip_loaded else EMPTY_INDEX
+    chunks = clean_chunks((cast_integer_columns(chunk) for chunk in chunks), seen_index)
+
+    # Save cleaned data as CSV, or as Parquet partitioned by crash year/month
+    if output_format == "parquet" and os.path.isdir(output_path):
+        shutil.rmtree(output_path)
+    rows = 0
+    for index, chunk in enumerate(chunks):
+        if output_format == "parquet":
+            write_parquet_dataset(chunk, output_path, basename_template=f"part-{index}-{{i}}.parquet",
+                                  existing_data_behavior="overwrite_or_ignore")
+        else:
+            chunk.to_csv(output_path, mode="w" if index == 0 else "a", header=(index == 0), index=False)
+        rows += len(chunk)
+    return output_path, rows
 
-# Deduplicate
-data.drop_duplicates(subset=['collision_id'], inplace=True)
 
-# Save cleaned data
-output_file_path = "data/output/cleaned_api_data.csv"
-data.to_csv(output_file_path, index=False)
+def main():
+    """Run the transform stage."""
+    output_path, rows = transform_file()
 
-# Print success message
-print(f"Cleaned CSV loaded to output folder: {output_file_path}")
+    # Print success message
+    print(f"Cleaned data ({rows} rows) loaded to output folder: {output_path}")
 
 
+if __name__ == "__main__":
+    main()
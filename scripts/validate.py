@@ -1,72 +1,236 @@
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+from scripts.columnar import is_parquet, iter_parquet_chunks, parquet_columns
+from scripts.schema import INTEGER_DTYPES, dtypes_for, invalid_integers
+from scripts.streaming import iter_csv_chunks
 
 INPUT_FILE = './data/input/raw_api_data.csv'
 
-def validate_data(file_path):
+# Mandatory columns
+REQUIRED_COLUMNS = ['collision_id', 'crash_date', 'vehicle_type_code1',
+                    'number_of_persons_injured', 'number_of_persons_killed']
+
+# Counters that must not be negative
+NON_NEGATIVE_COLUMNS = ['number_of_persons_injured', 'number_of_persons_killed']
+
+# Columns the loaders cast to integers, which fail the load if a value is not a whole number in range
+INTEGER_COLUMNS = ['collision_id'] + NON_NEGATIVE_COLUMNS
+
+# Rows validated at a time when no chunk size or memory ceiling is given
+DEFAULT_VALIDATION_CHUNK_SIZE = 100000
+
+# Row offsets kept per violated rule
+MAX_SAMPLE_OFFSETS = 10
+
+
+def rule_masks(chunk):
     """
-    Validate the quality of data in the provided CSV file.
+    Evaluate every validation rule over a chunk.
 
     Parameters:
-        file_path (str): The path to the CSV file.
+        chunk (pd.DataFrame): Rows holding (a subset of) the mandatory columns.
 
     Returns:
-        bool: True if all validation checks pass, False otherwise.
+        dict: Rule name to a boolean Series marking the rows that violate it. Rules
+            whose column is absent from the chunk are skipped.
+    """
+    masks = {}
 
-    Rules:
-        1. The file exists and is not empty.
-        2. Mandatory columns are present.
-        3. No null values in mandatory columns.
-        4. Logical integrity checks on numeric fields.
-        5. Date columns are in a valid format.
+    # Rule 3: No null values in mandatory columns
+    for column in REQUIRED_COLUMNS:
+        if column in chunk.columns:
+            masks[f"null_{column}"] = chunk[column].isna()
+
+    # Rule 4: Logical integrity checks on numeric fields
+    for column in INTEGER_COLUMNS:
+        if column in chunk.columns:
+            masks[f"non_integer_{column}"] = invalid_integers(chunk[column], INTEGER_DTYPES[column])
+    for column in NON_NEGATIVE_COLUMNS:
+        if column in chunk.columns:
+            numbers = pd.to_numeric(chunk[column], errors='coerce')
+            masks[f"negative_{column}"] = (numbers < 0).fillna(False).astype(bool)
+
+    # Rule 5: 'crash_date' is in a valid date format (nulls are reported by null_crash_date)
+    if 'crash_date' in chunk.columns:
+        crash_dates = pd.to_datetime(chunk['crash_date'], format='ISO8601', errors='coerce')
+        masks["invalid_crash_date"] = crash_dates.isna() & chunk['crash_date'].notna()
+
+    return masks
+
+
+def check_chunk(chunk, offset):
+    """
+    Count the violations of every rule in one chunk.
+
+    Parameters:
+        chunk (pd.DataFrame): The rows to check.
+        offset (int): The row offset of the chunk's first row in the file.
+
+    Returns:
+        dict: 'rows' and 'violations' (rule name to 'count' and 'sample_offsets').
+    """
+    violations = {}
+    for rule, mask in rule_masks(chunk).items():
+        positions = mask.to_numpy().nonzero()[0]
+        if len(positions):
+            violations[rule] = {
+                "count": int(len(positions)),
+                "sample_offsets": [int(offset + position) for position in positions[:MAX_SAMPLE_OFFSETS]],
+            }
+    return {"rows": len(chunk), "violations": violations}
+
+
+def merge_reports(report, chunk_report):
+    """
+    Fold the result of one chunk into a running report.
+
+    Chunk reports must be merged in file order so the first sample offsets are kept.
+
+    Parameters:
+        report (dict): The running report, updated in place.
+        chunk_report (dict): The output of check_chunk.
+
+    Returns:
+        dict: The updated report.
+    """
+    report["rows"] += chunk_report["rows"]
+    for rule, found in chunk_report["violations"].items():
+        merged = report["violations"].setdefault(rule, {"count": 0, "sample_offsets": []})
+        merged["count"] += found["count"]
+        room = MAX_SAMPLE_OFFSETS - len(merged["sample_offsets"])
+        merged["sample_offsets"].extend(found["sample_offsets"][:room])
+    return report
+
+
+def _file_columns(file_path):
+    """List the columns of a CSV file or Parquet dataset without reading its rows."""
+    if is_parquet(file_path):
+        return parquet_columns(file_path)
+    return list(pd.read_csv(file_path, nrows=0).columns)
+
+
+def _iter_required_chunks(file_path, chunk_size, memory_limit_mb):
     """
-    # Check if file exists
+    Stream the mandatory columns of a CSV file or Parquet dataset.
+
+    collision_id and the counters are left as parsed (int64, float64 or object) rather
+    than cast like the loaders do, so a malformed value is reported by the rules instead
+    of failing the read.
+    """
+    if is_parquet(file_path):
+        return iter_parquet_chunks(file_path, REQUIRED_COLUMNS, chunk_size, memory_limit_mb)
+    return iter_csv_chunks(file_path, chunk_size, memory_limit_mb,
+                           usecols=lambda column: column in REQUIRED_COLUMNS,
+                           dtype=dtypes_for(REQUIRED_COLUMNS))
+
+
+def validate_file(file_path, chunk_size=DEFAULT_VALIDATION_CHUNK_SIZE, memory_limit_mb=None, workers=1):
+    """
+    Validate a CSV file or Parquet dataset in one streaming pass and report every violation.
+
+    Only the mandatory columns are read, chunk by chunk, and every rule is evaluated on
+    each chunk before the next one is read, so memory stays bounded by the chunk size.
+    With workers > 1 the chunks are checked on a process pool while the main process
+    keeps reading; at most two chunks per worker are in flight.
+
+    Parameters:
+        file_path (str): The path to the CSV file or Parquet dataset.
+        chunk_size (int): The number of rows checked at a time.
+        memory_limit_mb (float): A memory ceiling used to derive the chunk size.
+        workers (int): The number of processes checking chunks.
+
+    Returns:
+        dict: The validation report:
+            - 'valid' (bool): True when the file exists, has rows, has every mandatory
+              column and no rule is violated.
+            - 'rows' (int): The number of rows checked.
+            - 'missing_file' (bool), 'missing_columns' (list), 'empty' (bool).
+            - 'violations' (dict): Rule name to 'count' and up to MAX_SAMPLE_OFFSETS
+              'sample_offsets' (0-based data row offsets in the file).
+    """
+    report = {"valid": False, "rows": 0, "missing_file": False, "missing_columns": [],
+              "empty": False, "violations": {}}
+
+    # Rule 1: The file exists and is not empty
     if not os.path.exists(file_path):
-        print(f"Validation failed: File {file_path} does not exist.")
-        return False
+        report["missing_file"] = True
+        return report
+
+    # Rule 2: Mandatory columns are present
+    columns = _file_columns(file_path)
+    report["missing_columns"] = [column for column in REQUIRED_COLUMNS if column not in columns]
 
-    # Load the data
-    data = pd.read_csv(file_path)
+    chunks = _iter_required_chunks(file_path, chunk_size, memory_limit_mb)
+    offset = 0
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = deque()
+            for chunk in chunks:
+                in_flight.append(executor.submit(check_chunk, chunk, offset))
+                offset += len(chunk)
+                if len(in_flight) >= workers * 2:
+                    merge_reports(report, in_flight.popleft().result())
+            while in_flight:
+                merge_reports(report, in_flight.popleft().result())
+    else:
+        for chunk in chunks:
+            merge_reports(report, check_chunk(chunk, offset))
+            offset += len(chunk)
+
+    report["empty"] = report["rows"] == 0
+    report["valid"] = not (report["empty"] or report["missing_columns"] or report["violations"])
+    return report
+
+
+def print_report(file_path, report):
+    """
+    Print a validation report.
 
-    # Rule 1: Check if the file is empty
-    if data.empty:
+    Parameters:
+        file_path (str): The validated file.
+        report (dict): The output of validate_file.
+    """
+    if report["missing_file"]:
+        print(f"Validation failed: File {file_path} does not exist.")
+        return
+    if report["empty"]:
         print("Validation failed: The file is empty.")
-        return False
+    if report["missing_columns"]:
+        print(f"Validation failed: Missing columns - {report['missing_columns']}")
+    for rule, found in report["violations"].items():
+        print(f"Validation failed: {rule} - {found['count']} of {report['rows']} rows "
+              f"(first offsets: {found['sample_offsets']})")
+    if report["valid"]:
+        print(f"Validation passed: All checks passed successfully ({report['rows']} rows).")
 
-    # Rule 2: Mandatory columns are present
-    required_columns = ['collision_id', 'crash_date', 'vehicle_type_code1', 
-                        'number_of_persons_injured', 'number_of_persons_killed']
-    missing_columns = [col for col in required_columns if col not in data.columns]
-    if missing_columns:
-        print(f"Validation failed: Missing columns - {missing_columns}")
-        return False
 
-    # Rule 3: No null values in mandatory columns
-    for col in required_columns:
-        if data[col].isnull().any():
-            print(f"Validation failed: Null values found in column '{col}'")
-            return False
+def validate_data(file_path, chunk_size=DEFAULT_VALIDATION_CHUNK_SIZE, workers=1):
+    """
+    Validate the quality of data in the provided CSV file or Parquet dataset.
 
-    # Rule 4: Logical integrity checks on numeric fields
-    if (data['number_of_persons_injured'] < 0).any():
-        print("Validation failed: Negative values in 'number_of_persons_injured'")
-        return False
-    if (data['number_of_persons_killed'] < 0).any():
-        print("Validation failed: Negative values in 'number_of_persons_killed'")
-        return False
-
-    # Rule 5: Check if 'crash_date' is in a valid date format
-    try:
-        data['crash_date'] = pd.to_datetime(data['crash_date'], errors='coerce')
-        if data['crash_date'].isnull().any():
-            print("Validation failed: Invalid date format in 'crash_date'")
-            return False
-    except Exception as e:
-        print(f"Validation failed: Error parsing 'crash_date': {e}")
-        return False
-
-    print("Validation passed: All checks passed successfully.")
-    return True
+    Every rule is checked in a single streaming pass (see validate_file) and every
+    violation is printed, rather than stopping at the first one.
+
+    Parameters:
+        file_path (str): The path to the CSV file or Parquet dataset.
+        chunk_size (int): The number of rows checked at a time.
+        workers (int): The number of processes checking chunks.
+
+    Returns:
+        bool: True if all validation checks pass, False otherwise.
+
+    Rules:
+        1. The file exists and is not empty.
+        2. Mandatory columns are present.
+        3. No null values in mandatory columns.
+        4. IDs and counters are whole numbers, and counters are not negative.
+        5. Date columns are in a valid format.
+    """
+    report = validate_file(file_path, chunk_size, workers=workers)
+    print_report(file_path, report)
+    return report["valid"]
 
 # Example usage
 if __name__ == "__main__":
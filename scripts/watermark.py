@@ -0,0 +1,126 @@
+import logging
+import pandas as pd
+
+logger = logging.getLogger("WATERMARK")
+
+# Table holding one high-water mark per stage (see migrations/0001_create_tables.sql)
+WATERMARK_TABLE = "etl_watermarks"
+
+# Rows this many days older than the watermark are reloaded so late corrections are upserted
+DEFAULT_LOOKBACK_DAYS = 7
+
+
+def get_watermark(connection, stage):
+    """
+    Read the high-water mark of a stage.
+
+    Parameters:
+        connection (mysql.connector.connection.MySQLConnection): An open database connection.
+        stage (str): The stage name, usually the target table.
+
+    Returns:
+        dict: 'last_crash_date' (pd.Timestamp or None) and 'last_collision_id' (int or None),
+            or None if the stage has never been loaded.
+    """
+    cursor = connection.cursor(buffered=True)
+    try:
+        cursor.execute(
+            f"SELECT last_crash_date, last_collision_id FROM {WATERMARK_TABLE} WHERE stage = %s",
+            (stage,)
+        )
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+
+    if row is None:
+        return None
+    last_crash_date, last_collision_id = row
+    return {
+        "last_crash_date": pd.Timestamp(last_crash_date) if last_crash_date is not None else None,
+        "last_collision_id": int(last_collision_id) if last_collision_id is not None else None,
+    }
+
+
+def set_watermark(connection, stage, watermark):
+    """
+    Store the high-water mark of a stage. The caller owns the transaction.
+
+    Parameters:
+        connection (mysql.connector.connection.MySQLConnection): An open database connection.
+        stage (str): The stage name, usually the target table.
+        watermark (dict): 'last_crash_date' and 'last_collision_id' to store.
+    """
+    last_crash_date = watermark.get("last_crash_date")
+    last_collision_id = watermark.get("last_collision_id")
+    cursor = connection.cursor()
+    try:
+        cursor.execute(
+            f"""
+            INSERT INTO {WATERMARK_TABLE} (stage, last_crash_date, last_collision_id)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                last_crash_date = VALUES(last_crash_date),
+                last_collision_id = VALUES(last_collision_id)
+            """,
+            (
+                stage,
+                last_crash_date.to_pydatetime() if last_crash_date is not None else None,
+                int(last_collision_id) if last_collision_id is not None else None,
+            )
+        )
+    finally:
+        cursor.close()
+    logger.info(f"Watermark for {stage} advanced to {last_crash_date} / collision {last_collision_id}.")
+
+
+def filter_new_rows(data, watermark, lookback_days=DEFAULT_LOOKBACK_DAYS):
+    """
+    Keep the rows that are new or recent enough to carry late corrections.
+
+    A row is kept when its collision_id is above the watermark, or when its crash_date
+    falls on or after the watermark date minus lookback_days.
+
+    Parameters:
+        data (pd.DataFrame): The rows read from the input.
+        watermark (dict): The stage's high-water mark, or None to keep every row.
+        lookback_days (int): How far behind the watermark date rows are reloaded.
+
+    Returns:
+        pd.DataFrame: The rows to load.
+    """
+    if watermark is None:
+        return data
+
+    keep = pd.Series(False, index=data.index)
+    if watermark["last_collision_id"] is not None:
+        keep |= data["collision_id"] > watermark["last_collision_id"]
+    if watermark["last_crash_date"] is not None:
+        crash_dates = pd.to_datetime(data["crash_date"], errors="coerce")
+        keep |= crash_dates >= watermark["last_crash_date"] - pd.Timedelta(days=lookback_days)
+    return data[keep]
+
+
+def advance_watermark(watermark, data):
+    """
+    Raise a watermark to cover the rows of a chunk.
+
+    Parameters:
+        watermark (dict): The current high-water mark, or None.
+        data (pd.DataFrame): Rows that are being loaded.
+
+    Returns:
+        dict: The new high-water mark.
+    """
+    watermark = dict(watermark or {"last_crash_date": None, "last_collision_id": None})
+    if data.empty:
+        return watermark
+
+    max_crash_date = pd.to_datetime(data["crash_date"], errors="coerce").max()
+    max_collision_id = data["collision_id"].max()
+    if pd.notna(max_crash_date):
+        current = watermark["last_crash_date"]
+        watermark["last_crash_date"] = max_crash_date if current is None else max(current, max_crash_date)
+    if pd.notna(max_collision_id):
+        current = watermark["last_collision_id"]
+        watermark["last_collision_id"] = int(max_collision_id) if current is None else max(current, int(max_collision_id))
+    return watermark
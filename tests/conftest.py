@@ -0,0 +1,8 @@
+import pytest
+from scripts import query_cache
+
+
+@pytest.fixture(autouse=True)
+def isolated_query_cache(tmp_path, monkeypatch):
+    """Keep the data version stamps bumped by the loaders out of the repository's data folder."""
+    monkeypatch.setattr(query_cache, "CACHE_DIR", str(tmp_path / "cache"))
@@ -0,0 +1,86 @@
+import datetime
+import pandas as pd
+from scripts.aggregate import SCAN_COLUMNS, aggregate_chunks, aggregate_dashboard
+from scripts.summaries import SUMMARIES
+
+
+def entity_row(day, hour, borough_id, street, injured, factor_id, pedestrians_injured=0):
+    row = dict.fromkeys(SCAN_COLUMNS, 0)
+    row.update(crash_date=datetime.datetime(2024, 1 + day // 31, 1 + day % 31),
+               crash_time=datetime.timedelta(hours=hour), borough_id=borough_id, on_street_name=street,
+               number_of_persons_injured=injured, number_of_pedestrians_injured=pedestrians_injured,
+               contributing_factor_vehicle_1_id=factor_id)
+    return tuple(row[column] for column in SCAN_COLUMNS)
+
+
+class ScanConnection:
+    """Connection stand-in that serves the dimension tables and streams the entity rows in fetchmany pages."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.scans = 0
+        self.fetches = 0
+        self.dimensions = {
+            "dim_borough": [(1, "BRONX"), (2, "QUEENS")],
+            "dim_contributing_factor": [(1, "Unsafe Speed"), (2, "Glare")],
+            "dim_vehicle_type": [],
+        }
+
+    def cursor(self, **kwargs):
+        return self
+
+    def execute(self, query, params=None):
+        if "FROM dim_" in query:
+            self.result = self.dimensions[query.split("FROM ")[1]]
+        else:
+            self.scans += 1
+            self.pending = list(self.rows)
+
+    def fetchall(self):
+        return self.result
+
+    def fetchmany(self, size):
+        self.fetches += 1
+        page, self.pending = self.pending[:size], self.pending[size:]
+        return page
+
+    def close(self):
+        pass
+
+
+def test_aggregate_dashboard_computes_every_chart_in_one_scan():
+    # 12 crashes on Broadway in the Bronx (a hotspot), 3 elsewhere in Queens, one without a borough
+    rows = [entity_row(day, 8, 1, "BROADWAY", 1, 1, pedestrians_injured=1) for day in range(12)]
+    rows += [entity_row(40 + day, 17, 2, "MAIN ST", 0, 2) for day in range(3)]
+    rows += [entity_row(0, 8, None, None, 2, None)]
+    connection = ScanConnection(rows)
+
+    frames = aggregate_dashboard(connection, chunk_size=4)
+
+    assert connection.scans == 1
+    assert connection.fetches == 5
+    assert frames["high_risk_areas"].to_dict("list") == {"borough": ["BRONX"], "total_collisions": [12]}
+    assert frames["contributing_factors"].to_dict("list") == {
+        "contributing_factor": ["Unsafe Speed", "Glare"], "total_collisions": [12, 3]
+    }
+    assert frames["time_based_patterns"].to_dict("list") == {"hour_of_day": [8, 17], "total_collisions": [13, 3]}
+    assert frames["cyclist_pedestrian_safety"]["borough"].tolist() == ["BRONX"]
+    severity = frames["collision_severity_trends"]
+    assert severity["collision_date"].iloc[0] == datetime.date(2024, 1, 1)
+    assert severity["total_injuries"].iloc[0] == 3
+    assert frames["monthly_dashboard"].to_dict("list") == {
+        "year": [2024, 2024], "month": [1, 2], "total_collisions": [13, 3],
+        "total_injuries": [14, 0], "total_fatalities": [0, 0],
+    }
+
+
+def test_aggregate_chunks_matches_a_single_chunk():
+    rows = pd.DataFrame.from_records(
+        [entity_row(day % 5, day % 24, 1 + day % 2, "BROADWAY", day % 3, 1 + day % 2) for day in range(50)],
+        columns=SCAN_COLUMNS,
+    )
+    whole = aggregate_chunks([rows])
+    chunked = aggregate_chunks([rows.iloc[start:start + 7] for start in range(0, 50, 7)])
+    for table_name, frame in whole.items():
+        keys = SUMMARIES[table_name]["keys"]
+        assert chunked[table_name].set_index(keys).sort_index().equals(frame.set_index(keys).sort_index())
@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+from scripts import analysis
+
+
+def fake_results(query):
+    """Query results for two charts; any other query fails like an unreachable database."""
+    if query == analysis.HIGH_RISK_AREAS_QUERY:
+        return pd.DataFrame({"borough": ["BRONX", "QUEENS"], "total_collisions": [12, 30]})
+    if query == analysis.TIME_BASED_PATTERNS_QUERY:
+        return pd.DataFrame({"hour_of_day": range(24), "total_collisions": range(24)})
+    raise ConnectionError("database unavailable")
+
+
+def test_build_dashboard_renders_in_worker_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(analysis, "fetch_data", fake_results)
+    monkeypatch.setattr(analysis, "output_dir", str(tmp_path))
+
+    timings = analysis.build_dashboard(["high_risk_areas", "time_based_patterns", "monthly_dashboard"], workers=2)
+
+    assert (tmp_path / "collisions_by_borough.png").exists()
+    assert (tmp_path / "time_based_patterns.png").exists()
+    assert timings["high_risk_areas"]["error"] is None
+    assert timings["high_risk_areas"]["render_seconds"] > 0
+    # A failed chart is reported without stopping the others
+    assert timings["monthly_dashboard"]["error"].startswith("fetch failed")
+    assert timings["total"]["wall_seconds"] > 0
+
+
+def test_build_dashboard_rejects_unknown_charts():
+    with pytest.raises(ValueError):
+        analysis.build_dashboard(["nope"])
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scripts.bulk_load import bulk_insert, dataframe_to_rows, dataframe_to_load_data_text
+
+
+class RecordingCursor:
+    """Cursor stand-in that records the statements it receives."""
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def executemany(self, query, rows):
+        self.calls.append((query, list(rows)))
+
+    def execute(self, query, params=None):
+        with open(params[0], encoding="utf-8") as handle:
+            self.calls.append((query, handle.read()))
+
+    def close(self):
+        pass
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.calls = []
+
+    def cursor(self):
+        return RecordingCursor(self.calls)
+
+
+SAMPLE_DATA = pd.DataFrame({
+    "collision_id": [1, 2, 3, 4, 5],
+    "borough": ["BROOKLYN", None, "QUEENS", np.nan, "BRONX"],
+    "number_of_persons_injured": [0, 2, np.nan, 1, 0],
+})
+
+
+def test_dataframe_to_rows_uses_native_types_and_none():
+    """Rows contain Python natives, None for nulls and None for missing columns."""
+    rows = dataframe_to_rows(SAMPLE_DATA, ["collision_id", "borough", "zip_code"])
+    assert rows[1] == (2, None, None)
+    assert type(rows[0][0]) is int
+
+
+def test_bulk_insert_executemany_batches():
+    """Rows are sent in batch_size chunks through executemany."""
+    connection = RecordingConnection()
+    stats = bulk_insert(connection, "staging_collision_data", SAMPLE_DATA, batch_size=2)
+    assert stats["rows"] == 5
+    assert stats["batches"] == 3
+    assert [len(rows) for _, rows in connection.calls] == [2, 2, 1]
+    assert connection.calls[0][0].count("%s") == 3
+
+
+def test_bulk_insert_load_data_writes_escaped_file():
+    """The load_data strategy stages a tab-separated file with \\N for nulls."""
+    connection = RecordingConnection()
+    bulk_insert(connection, "source_collision_data", SAMPLE_DATA, strategy="load_data")
+    query, text = connection.calls[0]
+    assert query.startswith("LOAD DATA LOCAL INFILE")
+    assert text.splitlines()[1] == "2\t\\N\t2"
+    assert text.splitlines()[2] == "3\tQUEENS\t\\N"
+
+
+def test_load_data_text_escapes_special_characters():
+    """Tabs, newlines and backslashes inside values are escaped."""
+    data = pd.DataFrame({"on_street_name": ["A\tB", "C\nD", "E\\F"]})
+    assert dataframe_to_load_data_text(data, ["on_street_name"]).splitlines() == [
+        "A\\tB", "C\\nD", "E\\\\F"
+    ]
+
+
+def test_bulk_insert_rejects_unknown_strategy():
+    with pytest.raises(ValueError):
+        bulk_insert(RecordingConnection(), "t", SAMPLE_DATA, strategy="copy")
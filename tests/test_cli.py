@@ -0,0 +1,118 @@
+import os
+import sys
+import time
+import subprocess
+import pytest
+from scripts import cli
+
+# Wall-clock budget of 'python -m scripts.cli ... --help', interpreter start-up included,
+# e.g. CLI_STARTUP_BUDGET_SECONDS=0.5 (it measures about 0.08 s; importing pandas alone takes
+# about 0.5 s, the plotting libraries another second). Timings flake on loaded machines, so
+# the budget is only checked when set; test_parsing_a_command_imports_no_stage always runs.
+STARTUP_BUDGET_ENV = "CLI_STARTUP_BUDGET_SECONDS"
+
+HEAVY_MODULES = ["pandas", "numpy", "matplotlib", "seaborn", "sqlalchemy", "mysql", "pyarrow", "scipy"]
+
+
+def run_python(*args):
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, check=True)
+
+
+def best_startup_seconds(*args, repeats=3):
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run_python("-m", "scripts.cli", *args)
+        seconds.append(time.perf_counter() - start)
+    return min(seconds)
+
+
+@pytest.mark.skipif(not os.getenv(STARTUP_BUDGET_ENV), reason=f"set {STARTUP_BUDGET_ENV} to check the start-up time")
+@pytest.mark.parametrize("args", [["--help"], ["analyze", "--help"], ["run-all", "--help"]])
+def test_help_starts_within_budget(args):
+    assert best_startup_seconds(*args) < float(os.getenv(STARTUP_BUDGET_ENV))
+
+
+def test_parsing_a_command_imports_no_stage():
+    # Checked in a fresh interpreter: this one already has pandas loaded by other tests
+    script = (
+        "import sys\n"
+        "from scripts import cli\n"
+        "for argv in (['analyze', '--dashboard'], ['source', '--strategy', 'load_data'], ['run-all']):\n"
+        "    cli.build_parser().parse_args(argv)\n"
+        f"print(sorted(name for name in {HEAVY_MODULES!r} if name in sys.modules))\n"
+        "print(sorted(name for name in sys.modules if name.startswith(('scripts.', 'config'))))\n"
+    )
+    heavy, project = run_python("-c", script).stdout.splitlines()
+    assert heavy == "[]"
+    assert project == "['scripts.cli']"
+
+
+def test_analysis_imports_the_plotting_libraries_on_first_render():
+    script = "import sys, scripts.analysis; print('matplotlib' in sys.modules, 'seaborn' in sys.modules)"
+    assert run_python("-c", script).stdout.split() == ["False", "False"]
+
+
+def test_subcommands_pass_only_the_given_options(monkeypatch):
+    from scripts import load_entities, load_source, transform
+    calls = []
+    log_files = []
+    monkeypatch.setattr(cli, "_log_to", log_files.append)
+    monkeypatch.setattr(load_source, "run_source", lambda **kwargs: calls.append(("source", kwargs)))
+    monkeypatch.setattr(load_entities, "run_entities", lambda **kwargs: calls.append(("entities", kwargs)))
+    monkeypatch.setattr(transform, "transform_file",
+                        lambda **kwargs: calls.append(("transform", kwargs)) or ("cleaned.csv", 3))
+
+    cli.main(["source", "--strategy", "load_data", "--workers", "4", "--dedup"])
+    cli.main(["entities", "--batch-size", "0"])
+    cli.main(["entities"])
+    cli.main(["transform", "--format", "parquet"])
+
+    assert calls == [
+        ("source", {"strategy": "load_data", "workers": 4, "incremental": False, "dedup": True}),
+        ("entities", {"batch_size": None}),
+        ("entities", {}),
+        ("transform", {"output_format": "parquet", "skip_loaded": False}),
+    ]
+    assert log_files == [os.path.join("logs", name) for name in
+                         ("source_pipeline.log", "entities_pipeline.log", "entities_pipeline.log")]
+
+
+def test_importing_a_stage_leaves_the_root_logger_alone():
+    script = (
+        "import logging\n"
+        "import scripts.extract, scripts.load_source, scripts.load_staging, scripts.load_entities\n"
+        "import scripts.migrate, scripts.pipeline\n"
+        "print(logging.getLogger().handlers)\n"
+    )
+    assert run_python("-c", script).stdout.strip() == "[]"
+
+
+def test_rebuild_index_indexes_the_chosen_tables(monkeypatch, capsys):
+    from config import db_config
+    from scripts import dedup_index
+    closed = []
+
+    class Connection:
+        def close(self):
+            closed.append(True)
+
+    monkeypatch.setattr(db_config, "get_db_connection", lambda: Connection())
+    monkeypatch.setattr(dedup_index, "rebuild_index", lambda connection, table_name: len(table_name))
+
+    cli.main(["rebuild-index", "--table", "staging_collision_data"])
+    cli.main(["rebuild-index"])
+    assert capsys.readouterr().out.splitlines() == [
+        "staging_collision_data: 22 collision_ids indexed",
+        "source_collision_data: 21 collision_ids indexed",
+        "staging_collision_data: 22 collision_ids indexed",
+    ]
+    assert closed == [True, True]
+
+
+def test_failed_validation_exits_non_zero(tmp_path, capsys):
+    missing = str(tmp_path / "missing.csv")
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(["validate", missing])
+    assert exit_info.value.code == 1
+    assert f"File {missing} does not exist" in capsys.readouterr().out
@@ -0,0 +1,63 @@
+import os
+import pandas as pd
+import pyarrow.dataset as ds
+from scripts.columnar import (
+    is_parquet, iter_parquet_chunks, parquet_columns, read_parquet, write_parquet_dataset
+)
+from scripts.validate import validate_data
+
+RAW_FILE = "data/input/raw_api_data.csv"
+
+
+def write_raw_dataset(tmp_path):
+    data = pd.read_csv(RAW_FILE)
+    root_path = str(tmp_path / "cleaned_api_data.parquet")
+    write_parquet_dataset(data, root_path)
+    return data, root_path
+
+
+def test_write_parquet_dataset_partitions_by_crash_year_and_month(tmp_path):
+    """Every row lands in a crash_year=/crash_month= partition and reads back unchanged."""
+    data, root_path = write_raw_dataset(tmp_path)
+    assert is_parquet(root_path)
+    crash_dates = pd.to_datetime(data["crash_date"])
+    expected = {f"crash_year={d.year}/crash_month={d.month}" for d in crash_dates}
+    written = {
+        os.path.relpath(directory, root_path)
+        for directory, _, files in os.walk(root_path) if files
+    }
+    assert written == expected
+
+    stored = read_parquet(root_path).sort_values("collision_id", ignore_index=True)
+    original = data.sort_values("collision_id", ignore_index=True)
+    assert len(stored) == len(data)
+    assert stored["number_of_persons_injured"].dtype == original["number_of_persons_injured"].dtype
+    assert stored["crash_date"].tolist() == original["crash_date"].tolist()
+
+
+def test_read_parquet_projects_and_prunes(tmp_path):
+    """Only the requested columns are returned and partition filters skip other months."""
+    data, root_path = write_raw_dataset(tmp_path)
+    assert {"crash_year", "crash_month"} <= set(parquet_columns(root_path))
+
+    projected = read_parquet(root_path, columns=["collision_id", "borough", "not_a_column"])
+    assert list(projected.columns) == ["collision_id", "borough"]
+
+    first = pd.to_datetime(data["crash_date"]).iloc[0]
+    month = read_parquet(root_path, columns=["crash_date"],
+                         filter=(ds.field("crash_year") == first.year) & (ds.field("crash_month") == first.month))
+    assert (pd.to_datetime(month["crash_date"]).dt.month == first.month).all()
+
+
+def test_iter_parquet_chunks_fixed_size(tmp_path):
+    """Chunks have the requested size across files and cover every row once."""
+    data, root_path = write_raw_dataset(tmp_path)
+    chunks = list(iter_parquet_chunks(root_path, columns=["collision_id"], chunk_size=120))
+    assert [len(chunk) for chunk in chunks] == [120, 120, 120, 120, 20]
+    assert sorted(pd.concat(chunks)["collision_id"]) == sorted(data["collision_id"])
+
+
+def test_validate_data_reads_parquet(tmp_path):
+    """The validator accepts a Parquet dataset as input."""
+    _, root_path = write_raw_dataset(tmp_path)
+    assert validate_data(root_path) == validate_data(RAW_FILE)
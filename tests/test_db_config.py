@@ -0,0 +1,52 @@
+import mysql.connector
+import pytest
+from config import db_config
+
+
+class FakePool:
+    """Stands in for MySQLConnectionPool: hands out pool_size tokens, then raises PoolError."""
+
+    created = []
+
+    def __init__(self, pool_size, **config):
+        self.config = config
+        self.free = pool_size
+        FakePool.created.append(self)
+
+    def get_connection(self):
+        if not self.free:
+            raise mysql.connector.errors.PoolError("Failed getting connection; pool exhausted")
+        self.free -= 1
+        return self
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    FakePool.created = []
+    monkeypatch.setattr(db_config.pooling, "MySQLConnectionPool", FakePool)
+    monkeypatch.setattr(db_config, "_pools", {})
+    monkeypatch.setenv("DB_POOL_SIZE", "2")
+    monkeypatch.setenv("DB_POOL_TIMEOUT", "0.2")
+    return FakePool
+
+
+def test_pool_is_shared_across_calls(fake_pool):
+    """Every stage in the process borrows from the same pool."""
+    first = db_config.get_db_connection()
+    second = db_config.get_db_connection()
+    assert first is second
+    assert len(fake_pool.created) == 1
+
+
+def test_local_infile_connections_use_their_own_pool(fake_pool):
+    db_config.get_db_connection()
+    infile = db_config.get_db_connection(allow_local_infile=True)
+    assert len(fake_pool.created) == 2
+    assert infile.config["allow_local_infile"] is True
+
+
+def test_exhausted_pool_waits_then_raises(fake_pool):
+    db_config.get_db_connection()
+    db_config.get_db_connection()
+    with pytest.raises(mysql.connector.errors.PoolError):
+        db_config.get_db_connection()
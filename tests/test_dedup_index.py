@@ -0,0 +1,106 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from scripts import dedup_index, load_runner
+from scripts.dedup_index import add_ids, contains, filter_unseen, load_index, record_ids, save_index
+
+
+class InsertConnection:
+    """Connection stand-in that keeps committed rows and rejects duplicate primary keys."""
+
+    def __init__(self, table):
+        self.table = table
+        self.pending = []
+
+    def cursor(self, **kwargs):
+        return self
+
+    def executemany(self, query, rows):
+        ids = [row[0] for row in rows]
+        if set(ids) & set(self.table) or len(set(ids)) != len(ids):
+            raise RuntimeError("Duplicate entry for key 'PRIMARY'")
+        self.pending.extend(ids)
+
+    def commit(self):
+        self.table.extend(self.pending)
+        self.pending = []
+
+    def close(self):
+        pass
+
+
+def test_contains_uses_sorted_index():
+    index = add_ids(dedup_index.EMPTY_INDEX, [30, 10, 20, 10])
+    assert index.tolist() == [10, 20, 30]
+    assert contains(index, [5, 10, 25, 30, 40]).tolist() == [False, True, False, True, False]
+    assert contains(dedup_index.EMPTY_INDEX, [1]).tolist() == [False]
+
+
+def test_index_round_trip_is_memory_mapped_and_compact(tmp_path):
+    path = str(tmp_path / "source_collision_data_collision_ids.npy")
+    assert len(load_index(path)) == 0
+    record_ids(path, np.arange(0, 2_000_000, 2))
+    record_ids(path, [3, 1])
+    index = load_index(path)
+    assert isinstance(index, np.memmap)
+    assert len(index) == 1_000_002
+    assert contains(index, [1, 2, 3, 5]).tolist() == [True, True, True, False]
+    # 8 bytes per collision_id plus the .npy header
+    assert os.path.getsize(path) < 8 * len(index) + 1024
+
+
+def test_filter_unseen_drops_indexed_run_and_chunk_duplicates():
+    chunk = pd.DataFrame({"collision_id": [1, 2, 3, 3, 4], "borough": list("abcde")})
+    kept, run_ids = filter_unseen(chunk, np.array([2]), np.array([4]))
+    assert kept["collision_id"].tolist() == [1, 3]
+    assert run_ids.tolist() == [1, 3, 4]
+
+
+def test_dedup_load_skips_rows_already_loaded(tmp_path, monkeypatch):
+    monkeypatch.setattr(dedup_index, "INDEX_DIR", str(tmp_path))
+    table = []
+    monkeypatch.setattr(load_runner, "get_db_connection", lambda **kwargs: InsertConnection(table))
+    columns = ["collision_id", "borough"]
+
+    first = pd.DataFrame({"collision_id": [1, 2, 3], "borough": ["QUEENS"] * 3})
+    assert load_runner.load_chunks([first], "source_collision_data", columns, dedup=True)["rows"] == 3
+
+    # An overlapping window: only 4 and 5 are new, and 5 repeats across chunks
+    overlap = [pd.DataFrame({"collision_id": [2, 3, 4, 5], "borough": ["BRONX"] * 4}),
+               pd.DataFrame({"collision_id": [5], "borough": ["BRONX"]})]
+    assert load_runner.load_chunks(overlap, "source_collision_data", columns, dedup=True)["rows"] == 2
+    assert table == [1, 2, 3, 4, 5]
+    assert load_index(dedup_index.index_path("source_collision_data")).tolist() == [1, 2, 3, 4, 5]
+
+
+def test_dedup_rejects_incremental_loads():
+    with pytest.raises(ValueError):
+        load_runner.load_chunks([], "source_collision_data", ["collision_id"], dedup=True, incremental=True)
+
+
+def test_save_index_replaces_atomically(tmp_path):
+    path = str(tmp_path / "index.npy")
+    save_index(path, np.array([1, 2]))
+    save_index(path, np.array([1, 2, 3]))
+    assert load_index(path, mmap=False).tolist() == [1, 2, 3]
+    assert os.listdir(tmp_path) == ["index.npy"]
+
+
+def test_filter_unseen_keeps_rows_without_an_id():
+    chunk = pd.DataFrame({"collision_id": pd.array([1, None, 2, None], dtype="Int64")})
+    kept, run_ids = filter_unseen(chunk, np.array([2]))
+    assert kept["collision_id"].isna().tolist() == [False, True, True]
+    assert run_ids.tolist() == [1]
+
+
+def test_index_path_is_keyed_by_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(dedup_index, "INDEX_DIR", str(tmp_path / "index"))
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "first.sqlite3"))
+    first = dedup_index.index_path("staging_collision_data")
+    record_ids(first, [1, 2])
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "second.sqlite3"))
+    second = dedup_index.index_path("staging_collision_data")
+    assert os.path.dirname(first) != os.path.dirname(second)
+    assert len(load_index(second)) == 0
@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pandas as pd
+import pytest
+from scripts import extract
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "h9gi-nx95_records.json")
+
+
+class RecordedPagesHandler(BaseHTTPRequestHandler):
+    """Socrata stand-in that pages through recorded records and fails the first requests on demand."""
+
+    def do_GET(self):
+        server = self.server
+        params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        with server.lock:
+            server.requests.append(params)
+            fail = server.failures > 0
+            server.failures -= fail
+
+        if fail:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+
+        records = server.records
+        if "$select" in params:
+            body = [{"row_count": str(len(records))}]
+        else:
+            records = sorted(records, key=lambda record: int(record["collision_id"]))
+            offset, limit = int(params["$offset"]), int(params["$limit"])
+            body = records[offset:offset + limit]
+
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def api_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RecordedPagesHandler)
+    with open(FIXTURE) as handle:
+        server.records = json.load(handle)
+    server.requests = []
+    server.failures = 0
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def url_of(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/resource/h9gi-nx95.json"
+
+
+def test_iter_pages_yields_every_page_in_order(api_server):
+    pages = list(extract.iter_pages(url_of(api_server), page_size=7, workers=3))
+    assert [len(page) for page in pages] == [7, 7, 7, 7, 2]
+    ids = [int(record["collision_id"]) for page in pages for record in page]
+    assert ids == sorted(int(record["collision_id"]) for record in api_server.records)
+
+
+def test_extract_to_csv_streams_pages_to_raw_layout(api_server, tmp_path):
+    output_path = tmp_path / "raw_api_data.csv"
+    rows = extract.extract_to_csv(str(output_path), url_of(api_server), page_size=8, workers=2)
+    assert rows == 30
+    assert not os.path.exists(f"{output_path}.part")
+
+    data = pd.read_csv(output_path)
+    assert list(data.columns) == extract.RAW_COLUMNS
+    assert data["collision_id"].is_monotonic_increasing
+    located = data["location"].dropna()
+    assert json.loads(located.iloc[0])["latitude"] == str(data.loc[located.index[0], "latitude"])
+
+
+def test_request_json_retries_unavailable_responses(api_server, monkeypatch):
+    monkeypatch.setattr(extract.time, "sleep", lambda seconds: None)
+    api_server.failures = 2
+    page = extract.fetch_page(extract.create_session(), url_of(api_server), 0, 5)
+    assert len(page) == 5
+    assert len(api_server.requests) == 3
+
+
+def test_request_json_gives_up_after_max_retries(api_server, monkeypatch):
+    monkeypatch.setattr(extract.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(extract, "MAX_RETRIES", 1)
+    api_server.failures = 5
+    with pytest.raises(extract.requests.HTTPError):
+        extract.fetch_page(extract.create_session(), url_of(api_server), 0, 5)
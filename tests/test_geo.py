@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from scripts.geo import (
+    BASE_CELL_METERS, METERS_PER_DEGREE_LATITUDE, cell_centers, cell_ids, decode_tiles, encode_tiles,
+    hotspots, neighborhood_sums, parent_cells
+)
+
+# Times Square and a point 10 m north of it
+TIMES_SQUARE = (40.7580, -73.9855)
+
+
+def test_morton_codes_round_trip_and_nest():
+    x, y = np.array([0, 1, 1234, 2200]), np.array([0, 2, 987, 2200])
+    cells = encode_tiles(x, y)
+    decoded_x, decoded_y = decode_tiles(cells)
+    assert decoded_x.tolist() == x.tolist() and decoded_y.tolist() == y.tolist()
+    # The level 2 parent is the tile of the coordinates divided by 4
+    parent_x, parent_y = decode_tiles(parent_cells(cells, 2))
+    assert parent_x.tolist() == (x // 4).tolist() and parent_y.tolist() == (y // 4).tolist()
+
+
+def test_cell_ids_of_coordinates():
+    latitude = pd.Series([TIMES_SQUARE[0], TIMES_SQUARE[0] + 10 / METERS_PER_DEGREE_LATITUDE, 0.0, None, "n/a"])
+    longitude = pd.Series([TIMES_SQUARE[1], TIMES_SQUARE[1], 0.0, -73.9, -73.9])
+    cells = cell_ids(latitude, longitude)
+    assert cells.dtype == "Int64"
+    # (0, 0), missing and unparseable coordinates get no cell
+    assert cells.isna().tolist() == [False, False, True, True, True]
+    # Points 10 m apart share their 100 m tile, and the tile centre is within 100 m
+    tiles = parent_cells(cells[:2].to_numpy(dtype=np.int64), 2)
+    assert tiles[0] == tiles[1]
+    center_latitude, _ = cell_centers(tiles[:1], 2)
+    assert abs(center_latitude[0] - TIMES_SQUARE[0]) * METERS_PER_DEGREE_LATITUDE < 4 * BASE_CELL_METERS
+
+
+def test_neighborhood_sums():
+    grid = np.arange(16, dtype=float).reshape(4, 4)
+    sums = neighborhood_sums(grid, 1)
+    assert sums[0, 0] == grid[:2, :2].sum()
+    assert sums[2, 1] == grid[1:4, 0:3].sum()
+
+
+def test_hotspots_prefer_clusters_over_single_busy_tiles():
+    rng = np.random.default_rng(0)
+    # A cluster of 3x3 tiles with 10 crashes each, and a lone tile with 40
+    cluster_x, cluster_y = np.meshgrid(np.arange(100, 103), np.arange(200, 203))
+    cells = np.concatenate([
+        np.repeat(encode_tiles(cluster_x.ravel(), cluster_y.ravel()), 10),
+        np.repeat(encode_tiles(np.array([500]), np.array([500])), 40),
+    ])
+    cells = pd.array(rng.permutation(cells), dtype="Int64")
+
+    smoothed = hotspots(cells, level=0, k=2, radius=1)
+    assert decode_tiles(smoothed["grid_cell"].to_numpy())[0].tolist()[0] == 101
+    assert smoothed["score"].tolist() == [90, 60]
+
+    unsmoothed = hotspots(cells, level=0, k=1, radius=0)
+    assert unsmoothed["total"].tolist() == [40]
+
+    # Pre-aggregated totals give the same ranking as one cell per collision
+    totals = pd.Series(cells).value_counts()
+    assert hotspots(totals.index, totals.to_numpy(), level=0, k=2)["score"].tolist() == [90, 60]
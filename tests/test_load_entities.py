@@ -0,0 +1,212 @@
+import pandas as pd
+import pytest
+from scripts import load_entities
+from scripts.dimensions import empty_dictionary, encode_dimensions
+from scripts.schema import ENTITY_COLUMNS, STAGING_TABLE_COLUMNS
+
+
+INJURED = ENTITY_COLUMNS.index("number_of_persons_injured")
+
+
+def staging_row(collision_id, injured=1):
+    """A staging row with alternating boroughs and a repeated factor and vehicle type."""
+    row = dict.fromkeys(STAGING_TABLE_COLUMNS)
+    row.update(collision_id=collision_id, crash_date="2024-01-01",
+               borough="QUEENS" if collision_id % 2 else "BRONX", number_of_persons_injured=injured,
+               contributing_factor_vehicle_1="Unsafe Speed", vehicle_type_code1="Sedan")
+    return tuple(row[column] for column in STAGING_TABLE_COLUMNS)
+
+
+class StagingTransferConnection:
+    """
+    Connection stand-in that answers the batched transfer statements from an in-memory
+    staging table (collision_id -> persons injured) and records commits and the
+    transferred entity rows.
+    """
+
+    def __init__(self, staging_ids, fail_after_commits=None):
+        self.staging = dict.fromkeys(staging_ids, 1)
+        self.fail_after_commits = fail_after_commits
+        self.entities = {}
+        self.pending = []
+        self.pending_deletes = []
+        self.dimensions = {"dim_borough": [], "dim_contributing_factor": [], "dim_vehicle_type": []}
+        self.pending_dimensions = []
+        self.summaries = {}
+        self.pending_summaries = []
+        self.commits = 0
+        self.rowcount = 0
+
+    def new_or_changed(self):
+        return [i for i in sorted(self.staging)
+                if i not in self.entities or self.entities[i][INJURED] != self.staging[i]]
+
+    def cursor(self, **kwargs):
+        return self
+
+    def execute(self, query, params=None):
+        query = " ".join(query.split())
+        if query.startswith("SELECT COUNT(*)"):
+            self.result = (len(self.new_or_changed()),)
+        elif query.startswith("SELECT MAX(collision_id)"):
+            batch = [i for i in self.new_or_changed() if i > params[0]][:params[1]]
+            self.result = (max(batch) if batch else None,)
+        elif query.startswith("SELECT collision_id,") and "FROM staging_collision_data" in query:
+            self.result = [staging_row(i, self.staging[i]) for i in self.new_or_changed() if params[0] < i <= params[1]]
+        elif query.startswith("SELECT collision_id,"):
+            self.result = [self.entities[i] for i in params if i in self.entities]
+        elif query.startswith("SELECT") and "FROM dim_" in query:
+            self.result = list(self.dimensions[query.split("FROM ")[1]])
+        elif query.startswith("DELETE FROM entities_collision_data"):
+            self.pending_deletes.extend(params)
+
+    def executemany(self, query, rows):
+        table = query.split()[2]
+        if table == "entities_collision_data":
+            if self.fail_after_commits is not None and self.commits >= self.fail_after_commits:
+                raise load_entities.mysql.connector.Error("lock wait timeout")
+            self.pending.extend(rows)
+        elif table.startswith("dim_"):
+            self.pending_dimensions.extend((table, row) for row in rows)
+        else:
+            self.pending_summaries.extend((table, row) for row in rows)
+
+    def fetchone(self):
+        return self.result
+
+    def fetchall(self):
+        return self.result
+
+    def commit(self):
+        for i in self.pending_deletes:
+            self.entities.pop(i, None)
+        self.pending_deletes = []
+        for row in self.pending:
+            assert row[0] not in self.entities, f"collision {row[0]} inserted twice"
+            self.entities[row[0]] = row
+        self.pending = []
+        for table, row in self.pending_dimensions:
+            self.dimensions[table].append(row)
+        self.pending_dimensions = []
+        for table, row in self.pending_summaries:
+            self.summaries.setdefault(table, []).append(row)
+        self.pending_summaries = []
+        self.commits += 1
+
+    def rollback(self):
+        self.pending = []
+        self.pending_deletes = []
+        self.pending_dimensions = []
+        self.pending_summaries = []
+
+    def close(self):
+        pass
+
+    def borough_totals(self, measure):
+        """Summed high_risk_areas_summary measure (1: collisions, 2: injuries) per borough key."""
+        totals = {}
+        for row in self.summaries["high_risk_areas_summary"]:
+            totals[row[0]] = totals.get(row[0], 0) + row[measure + 1]
+        return totals
+
+
+def test_batched_transfer_commits_each_batch(monkeypatch):
+    connection = StagingTransferConnection(range(1, 26))
+    monkeypatch.setattr(load_entities, "get_db_connection", lambda: connection)
+    assert load_entities.transfer_data_in_batches(batch_size=10) == 25
+    assert connection.commits == 3
+    assert sorted(connection.entities) == list(range(1, 26))
+    # Every dimension value was registered once, in the batch that first used it
+    assert connection.dimensions == {
+        "dim_borough": [(1, "QUEENS"), (2, "BRONX")],
+        "dim_contributing_factor": [(1, "Unsafe Speed")],
+        "dim_vehicle_type": [(1, "Sedan")],
+    }
+    # Each batch added its collision counts to the summaries: 13 in QUEENS (key 1), 12 in the BRONX
+    assert connection.borough_totals(1) == {1: 13, 2: 12}
+
+
+def test_batched_transfer_resumes_after_last_committed_range(monkeypatch):
+    connection = StagingTransferConnection(range(1, 26), fail_after_commits=1)
+    monkeypatch.setattr(load_entities, "get_db_connection", lambda: connection)
+    with pytest.raises(load_entities.mysql.connector.Error):
+        load_entities.transfer_data_in_batches(batch_size=10)
+    assert sorted(connection.entities) == list(range(1, 11))
+
+    # The second run picks up at collision_id 11 without copying rows twice
+    connection.fail_after_commits = None
+    assert load_entities.transfer_data_in_batches(batch_size=10) == 15
+    assert sorted(connection.entities) == list(range(1, 26))
+
+    # The rerun reloaded the dimensions instead of registering their values again
+    assert len(connection.dimensions["dim_borough"]) == 2
+
+
+def test_batched_transfer_catches_up_rows_below_the_last_transferred_id(monkeypatch):
+    """Late arrivals with lower IDs and a truncated entities table are transferred on the next run."""
+    connection = StagingTransferConnection(range(10, 21))
+    monkeypatch.setattr(load_entities, "get_db_connection", lambda: connection)
+    assert load_entities.transfer_data_in_batches(batch_size=4) == 11
+
+    connection.staging.update({3: 1, 5: 1})
+    assert load_entities.transfer_data_in_batches(batch_size=4) == 2
+    assert sorted(connection.entities) == [3, 5] + list(range(10, 21))
+
+    connection.entities = {}
+    assert load_entities.transfer_data_in_batches(batch_size=4) == 13
+
+
+def test_batched_transfer_replaces_collisions_corrected_in_staging(monkeypatch):
+    """A corrected injury count replaces the entity row, and the summaries move by the difference."""
+    connection = StagingTransferConnection(range(1, 26))
+    monkeypatch.setattr(load_entities, "get_db_connection", lambda: connection)
+    assert load_entities.transfer_data_in_batches(batch_size=10) == 25
+    assert load_entities.transfer_data_in_batches(batch_size=10) == 0
+
+    # Collisions 3 (QUEENS) and 12 (BRONX) are re-loaded into staging with new counts
+    connection.staging.update({3: 4, 12: 0})
+    assert load_entities.transfer_data_in_batches(batch_size=10) == 2
+    assert sorted(connection.entities) == list(range(1, 26))
+    assert connection.entities[3][INJURED] == 4
+    assert connection.entities[12][INJURED] == 0
+    assert connection.borough_totals(1) == {1: 13, 2: 12}
+    assert connection.borough_totals(2) == {1: 13 + 3, 2: 12 - 1}
+    # The replacement only sent the net change of each group
+    assert connection.summaries["high_risk_areas_summary"][-2:] == [(1, "", 0, 3, 0), (2, "", 0, -1, 0)]
+
+
+def test_encode_dimensions_replaces_text_with_keys():
+    inserted = []
+
+    class DimensionConnection:
+        def cursor(self, **kwargs):
+            return self
+
+        def executemany(self, query, rows):
+            inserted.append((query.split()[2], rows))
+
+        def close(self):
+            pass
+
+    dictionaries = {table: empty_dictionary(table) for table in ("dim_contributing_factor", "dim_vehicle_type")}
+    dictionaries["dim_borough"] = pd.Series([7], index=["BRONX"], name="borough_id")
+    batch = pd.DataFrame({
+        "collision_id": [1, 2, 3],
+        "borough": pd.Categorical(["BRONX", None, "QUEENS"]),
+        "contributing_factor_vehicle_1": ["Unsafe Speed", "Driver Inattention/Distraction", None],
+        "contributing_factor_vehicle_2": ["Unsafe Speed", None, "Glare"],
+    })
+
+    encoded = encode_dimensions(DimensionConnection(), batch, dictionaries)
+    assert list(encoded.columns) == [
+        "collision_id", "borough_id", "contributing_factor_vehicle_1_id", "contributing_factor_vehicle_2_id"
+    ]
+    assert encoded["borough_id"].tolist() == [7, pd.NA, 8]
+    assert encoded["contributing_factor_vehicle_1_id"].tolist() == [1, 2, pd.NA]
+    assert encoded["contributing_factor_vehicle_2_id"].tolist() == [1, pd.NA, 3]
+    # Only values new to each dimension are inserted, once even when shared by two columns
+    assert inserted == [
+        ("dim_borough", [(8, "QUEENS")]),
+        ("dim_contributing_factor", [(1, "Unsafe Speed"), (2, "Driver Inattention/Distraction"), (3, "Glare")]),
+    ]
+    assert dictionaries["dim_borough"].to_dict() == {"BRONX": 7, "QUEENS": 8}
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+from scripts.load_source import extract_coordinates, preprocess_location
+
+
+def test_extract_coordinates_json_and_api_export_forms():
+    """Both JSON objects and the Python-repr objects of the API export are parsed."""
+    locations = pd.Series([
+        '{"latitude": "40.5", "longitude": "-73.9"}',
+        "{'latitude': '40.667202', 'longitude': '-73.8665', 'human_address': '{\"zip\": \"\"}'}",
+        '{"longitude": -73.1, "latitude": 40}',
+    ])
+    coordinates = extract_coordinates(locations)
+    assert coordinates["latitude"].tolist() == [40.5, 40.667202, 40.0]
+    assert coordinates["longitude"].tolist() == [-73.9, -73.8665, -73.1]
+
+
+def test_extract_coordinates_null_and_malformed_give_nan():
+    """Null, truncated and non-numeric locations give NaN like the per-row parser gave None."""
+    locations = pd.Series([None, np.nan, "garbage", '{"latitude": "40.1"', '{"latitude": null}'])
+    coordinates = extract_coordinates(locations)
+    assert coordinates.isna().all().all()
+
+
+def test_preprocess_location_replaces_location_column():
+    data = pd.DataFrame({"collision_id": [1, 2], "location": ['{"latitude": "40.5", "longitude": "-73.9"}', None]})
+    data = preprocess_location(data)
+    assert list(data.columns) == ["collision_id", "latitude", "longitude"]
+    assert data.loc[0, "latitude"] == 40.5
+    assert pd.isna(data.loc[1, "longitude"])
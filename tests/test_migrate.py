@@ -0,0 +1,116 @@
+import pytest
+from scripts import migrate
+from scripts.migrate import check_view_indexes, list_migrations, split_statements
+
+
+class SchemaConnection:
+    """
+    Connection stand-in that records DDL statements, keeps the schema_migrations rows and
+    rejects a second CREATE INDEX with the same name, like MySQL.
+    """
+
+    def __init__(self, plans=None):
+        self.statements = []
+        self.indexes = set()
+        self.migrations = {}
+        self.plans = plans or {}
+        self.fail_on = None
+
+    def cursor(self, **kwargs):
+        return self
+
+    def execute(self, query, params=None):
+        query = " ".join(query.split())
+        if query.startswith("SELECT version"):
+            self.result = list(self.migrations.items())
+        elif query.startswith("INSERT INTO schema_migrations"):
+            self.migrations[params[0]] = params[1]
+        elif query.startswith("EXPLAIN"):
+            plan = next(plan for marker, plan in self.plans.items() if marker in query)
+            self.description = [("id",), ("table",), ("type",), ("key",)]
+            self.result = [(1, "entities_collision_data", *plan)]
+        elif not query.startswith("CREATE TABLE IF NOT EXISTS schema_migrations"):
+            if self.fail_on and self.fail_on in query:
+                raise migrate.mysql.connector.Error(msg="Lost connection", errno=2013)
+            if query.startswith("CREATE INDEX"):
+                name = query.split()[2]
+                if name in self.indexes:
+                    raise migrate.mysql.connector.Error(msg=f"Duplicate key name '{name}'", errno=1061)
+                self.indexes.add(name)
+            self.statements.append(query)
+
+    def fetchall(self):
+        return self.result
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def write_migrations(path):
+    (path / "0001_tables.sql").write_text(
+        "-- the fact table\nCREATE TABLE IF NOT EXISTS facts (id BIGINT PRIMARY KEY);\n"
+    )
+    (path / "0002_indexes.sql").write_text(
+        "/* two indexes */\nCREATE INDEX idx_a ON facts (a); -- first\nCREATE INDEX idx_b ON facts (b);\n"
+    )
+
+
+def test_split_statements_drops_comments():
+    sql = "-- header\nCREATE TABLE t (a INT); /* note; with a semicolon */\n\nSELECT 1 -- trailing\n;"
+    assert split_statements(sql) == ["CREATE TABLE t (a INT)", "SELECT 1"]
+
+
+def test_migrate_applies_each_migration_once(tmp_path):
+    write_migrations(tmp_path)
+    connection = SchemaConnection()
+    assert migrate.migrate(connection, str(tmp_path)) == ["0001_tables", "0002_indexes"]
+    assert connection.statements == [
+        "CREATE TABLE IF NOT EXISTS facts (id BIGINT PRIMARY KEY)",
+        "CREATE INDEX idx_a ON facts (a)",
+        "CREATE INDEX idx_b ON facts (b)",
+    ]
+    assert migrate.migrate(connection, str(tmp_path)) == []
+    assert len(connection.statements) == 3
+
+
+def test_interrupted_migration_is_rerun_idempotently(tmp_path):
+    write_migrations(tmp_path)
+    connection = SchemaConnection()
+    connection.fail_on = "idx_b"
+    with pytest.raises(migrate.mysql.connector.Error):
+        migrate.migrate(connection, str(tmp_path))
+    assert list(connection.migrations) == ["0001_tables"]
+
+    # idx_a already exists: the rerun skips it and finishes the migration
+    connection.fail_on = None
+    assert migrate.migrate(connection, str(tmp_path)) == ["0002_indexes"]
+    assert connection.indexes == {"idx_a", "idx_b"}
+
+
+def test_changed_applied_migration_is_rejected(tmp_path):
+    write_migrations(tmp_path)
+    connection = SchemaConnection()
+    migrate.migrate(connection, str(tmp_path))
+    (tmp_path / "0001_tables.sql").write_text("CREATE TABLE IF NOT EXISTS facts (id INT PRIMARY KEY);")
+    with pytest.raises(ValueError):
+        migrate.migrate(connection, str(tmp_path))
+
+
+def test_check_view_indexes_flags_full_scans():
+    # Plans keyed by a marker of the summary query behind each view
+    connection = SchemaConnection(plans={"on_street_name": ("index", "idx_borough_street"),
+                                         "HOUR(crash_time)": ("ALL", None)})
+    view_names = ["high_risk_areas", "time_based_collision_patterns"]
+    results = check_view_indexes(connection, {view_name: migrate.VIEW_INDEXES[view_name] for view_name in view_names})
+    assert results["high_risk_areas"] == {"type": "index", "key": "idx_borough_street", "ok": True}
+    assert results["time_based_collision_patterns"]["ok"] is False
+
+
+def test_repository_migrations_create_the_expected_indexes():
+    statements = [statement for _, _, sql in list_migrations() for statement in split_statements(sql)]
+    created = {statement.split()[2] for statement in statements if statement.startswith("CREATE INDEX")}
+    assert {index for indexes in migrate.VIEW_INDEXES.values() for index in indexes} <= created
+    assert any("PARTITION BY RANGE (YEAR(crash_date))" in statement for statement in statements)
@@ -0,0 +1,107 @@
+import threading
+import pandas as pd
+import pytest
+from scripts import load_runner
+from scripts.parallel_load import parallel_bulk_insert, partition_by_collision_id
+
+COLUMNS = ["collision_id", "borough"]
+
+
+class TransactionalConnection:
+    """Connection stand-in that keeps inserted rows pending until commit."""
+
+    def __init__(self, table, fail_on=None):
+        self.table = table
+        self.fail_on = fail_on
+        self.pending = []
+        self.closed = False
+
+    def cursor(self):
+        return self
+
+    def executemany(self, query, rows):
+        if any(row[0] == self.fail_on for row in rows):
+            raise RuntimeError(f"insert failed for collision {self.fail_on}")
+        self.pending.extend(rows)
+
+    def commit(self):
+        with self.table["lock"]:
+            self.table["rows"].extend(self.pending)
+        self.pending = []
+
+    def rollback(self):
+        self.pending = []
+
+    def close(self):
+        self.closed = True
+
+
+def make_table():
+    return {"rows": [], "lock": threading.Lock()}
+
+
+def make_partitions(count, size):
+    return [
+        pd.DataFrame({"collision_id": range(i * size, (i + 1) * size), "borough": "QUEENS"})
+        for i in range(count)
+    ]
+
+
+def test_partition_by_collision_id_contiguous_ranges():
+    data = pd.DataFrame({"collision_id": [9, 3, 7, 1, 5, 2, 8]})
+    parts = partition_by_collision_id(data, 3)
+    assert [part["collision_id"].tolist() for part in parts] == [[1, 2], [3, 5], [7, 8, 9]]
+
+
+def test_parallel_bulk_insert_commits_every_partition():
+    table = make_table()
+    stats = parallel_bulk_insert(lambda: TransactionalConnection(table), "staging_collision_data",
+                                 make_partitions(10, 25), COLUMNS, workers=3, batch_size=10)
+    assert stats["rows"] == 250
+    assert sorted(row[0] for row in table["rows"]) == list(range(250))
+
+
+def test_parallel_bulk_insert_worker_failure_commits_nothing():
+    """A failing worker rolls back every worker, whatever was already inserted."""
+    table = make_table()
+    with pytest.raises(RuntimeError):
+        parallel_bulk_insert(lambda: TransactionalConnection(table, fail_on=130), "staging_collision_data",
+                             make_partitions(10, 25), COLUMNS, workers=3)
+    assert table["rows"] == []
+
+
+def test_parallel_bulk_insert_reader_failure_commits_nothing():
+    table = make_table()
+
+    def partitions():
+        yield from make_partitions(3, 25)
+        raise ValueError("corrupt CSV chunk")
+
+    with pytest.raises(ValueError):
+        parallel_bulk_insert(lambda: TransactionalConnection(table), "staging_collision_data",
+                             partitions(), COLUMNS, workers=2)
+    assert table["rows"] == []
+
+
+def test_load_rejects_more_workers_than_the_pool_can_serve(monkeypatch):
+    monkeypatch.setenv("DB_BACKEND", "mysql")
+    monkeypatch.setenv("DB_POOL_SIZE", "4")
+    monkeypatch.setattr(load_runner, "get_db_connection", lambda **kwargs: pytest.fail("connected"))
+    with pytest.raises(ValueError, match="DB_POOL_SIZE is 4"):
+        load_runner.load_chunks(make_partitions(4, 10), "source_collision_data", COLUMNS, workers=4)
+
+    # One connection per worker plus the caller's fits
+    monkeypatch.setattr(load_runner, "parallel_bulk_insert", lambda *args, **kwargs: {"rows": 40})
+    assert load_runner.load_chunks(make_partitions(4, 10), "source_collision_data", COLUMNS, workers=3)["rows"] == 40
+
+
+def test_sequential_load_failure_rolls_back_and_returns_the_connection(monkeypatch):
+    table = make_table()
+    connection = TransactionalConnection(table, fail_on=25)
+    monkeypatch.setattr(load_runner, "get_db_connection", lambda **kwargs: connection)
+    with pytest.raises(RuntimeError, match="collision 25"):
+        load_runner.load_chunks(make_partitions(3, 10), "source_collision_data", COLUMNS)
+    # The first two chunks were inserted, but none of them was committed or left pending
+    assert table["rows"] == []
+    assert connection.pending == []
+    assert connection.closed
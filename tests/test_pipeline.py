@@ -0,0 +1,123 @@
+import threading
+import pytest
+from scripts import pipeline
+from scripts.pipeline import STAGES, code_modules, file_fingerprint, run_pipeline, stage_fingerprint
+
+
+def make_stages(tmp_path, calls, fail=()):
+    """A small DAG: check and load depend on the raw file; clean -> publish depends on check."""
+    raw = tmp_path / "raw.csv"
+    cleaned = tmp_path / "cleaned.csv"
+    if not raw.exists():
+        raw.write_text("collision_id\n1\n2\n")
+    started = threading.Barrier(2, timeout=5)
+
+    def stage(name, action=None):
+        def run():
+            calls.append(name)
+            if name in fail:
+                raise RuntimeError(f"{name} broke")
+            if action:
+                action()
+        return run
+
+    def clean():
+        cleaned.write_text(raw.read_text().upper())
+
+    return {
+        # check and load only finish once both have started, so they must run concurrently
+        "check": {"run": stage("check", started.wait), "depends_on": [], "inputs": [str(raw)],
+                  "code": ["scripts.validate"]},
+        "load": {"run": stage("load", started.wait), "depends_on": [], "inputs": [str(raw)]},
+        "clean": {"run": stage("clean", clean), "depends_on": ["check"], "inputs": [str(raw)],
+                  "outputs": [str(cleaned)], "code": ["scripts.transform"]},
+        "publish": {"run": stage("publish"), "depends_on": ["clean"], "inputs": [str(cleaned)]},
+    }, raw, cleaned
+
+
+def test_pipeline_runs_dag_then_skips_unchanged_stages(tmp_path):
+    state_path = str(tmp_path / "state.json")
+    calls = []
+    stages, raw, cleaned = make_stages(tmp_path, calls)
+    statuses = run_pipeline(stages, state_path=state_path)
+    assert statuses == {"check": "ran", "load": "ran", "clean": "ran", "publish": "ran"}
+    assert calls.index("clean") > calls.index("check")
+    assert calls.index("publish") > calls.index("clean")
+
+    # Nothing changed: every stage is skipped
+    calls.clear()
+    statuses = run_pipeline(make_stages(tmp_path, calls)[0], state_path=state_path, workers=1)
+    assert set(statuses.values()) == {"skipped"} and calls == []
+
+    # A deleted output reruns its stage only; the rewritten file is identical so publish still skips
+    cleaned.unlink()
+    statuses = run_pipeline(make_stages(tmp_path, calls)[0], state_path=state_path, workers=1)
+    assert statuses == {"check": "skipped", "load": "skipped", "clean": "ran", "publish": "skipped"}
+
+
+def test_changed_input_reruns_downstream_stages(tmp_path):
+    state_path = str(tmp_path / "state.json")
+    calls = []
+    stages, raw, _ = make_stages(tmp_path, calls)
+    run_pipeline(stages, state_path=state_path)
+
+    raw.write_text("collision_id\n1\n2\n3\n")
+    calls.clear()
+    statuses = run_pipeline(make_stages(tmp_path, calls)[0], state_path=state_path)
+    assert statuses == {"check": "ran", "load": "ran", "clean": "ran", "publish": "ran"}
+
+
+def test_failed_stage_blocks_only_its_dependents(tmp_path):
+    calls = []
+    stages, _, _ = make_stages(tmp_path, calls, fail=("clean",))
+    statuses = run_pipeline(stages, state_path=str(tmp_path / "state.json"))
+    assert statuses == {"check": "ran", "load": "ran", "clean": "failed", "publish": "blocked"}
+    assert "publish" not in calls
+
+
+def test_targets_select_upstream_stages(tmp_path):
+    calls = []
+    stages, _, _ = make_stages(tmp_path, calls)
+    stages["check"]["run"] = lambda: calls.append("check")
+    statuses = run_pipeline(stages, targets=["clean"], state_path=str(tmp_path / "state.json"))
+    assert statuses == {"check": "ran", "clean": "ran"}
+    with pytest.raises(ValueError):
+        run_pipeline(stages, targets=["nope"], state_path=str(tmp_path / "state.json"))
+
+
+def test_file_fingerprint_counts_rows(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text("a\n1\n2\n")
+    assert file_fingerprint(str(path))["rows"] == 3
+    assert file_fingerprint(str(tmp_path / "missing.csv")) is None
+
+
+def test_stage_code_includes_every_imported_project_module():
+    staging = code_modules(STAGES["staging"]["code"])
+    # Direct imports, imports of those modules, and config
+    assert {"scripts.load_staging", "scripts.geo", "scripts.columnar", "scripts.watermark",
+            "scripts.dedup_index", "config.db_config"} <= set(staging)
+    assert "scripts.analysis" not in staging
+    assert code_modules(["scripts.schema"]) == ["scripts.schema"]
+
+
+def test_load_stages_rerun_as_upserts(monkeypatch):
+    from scripts import load_source, load_staging
+    calls = []
+    monkeypatch.setattr(load_source, "run_source", lambda **kwargs: calls.append(kwargs))
+    monkeypatch.setattr(load_staging, "load_data_to_staging", lambda *args, **kwargs: calls.append(kwargs))
+    pipeline._run_source()
+    pipeline._run_staging()
+    assert calls == [{"incremental": True}, {"incremental": True}]
+
+
+def test_database_stages_rerun_against_another_database(monkeypatch, tmp_path):
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+
+    def fingerprints(database):
+        monkeypatch.setenv("SQLITE_PATH", str(tmp_path / database))
+        return {name: stage_fingerprint(spec, {}) for name, spec in STAGES.items()}
+
+    first, second = fingerprints("first.sqlite3"), fingerprints("second.sqlite3")
+    changed = {name for name in STAGES if first[name] != second[name]}
+    assert changed == {"schema", "source", "staging", "entities", "analysis"}
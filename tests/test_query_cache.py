@@ -0,0 +1,86 @@
+import os
+import time
+import pandas as pd
+from scripts.query_cache import bump_data_version, cache_path, cached_query, data_version, evict, normalize_sql
+
+
+class CountingFetch:
+    """Stands in for the database: returns a fixed result and counts the queries it runs."""
+
+    def __init__(self, rows=3):
+        self.calls = 0
+        self.rows = rows
+
+    def __call__(self, query):
+        self.calls += 1
+        return pd.DataFrame({"borough": ["QUEENS"] * self.rows, "total_collisions": range(self.rows)})
+
+
+def test_normalize_sql_ignores_formatting_but_not_literals():
+    assert normalize_sql("SELECT  borough\n  FROM high_risk_areas ;") == "SELECT borough FROM high_risk_areas"
+    assert normalize_sql("SELECT 'a  b'") != normalize_sql("SELECT 'a b'")
+
+
+def test_repeated_query_is_served_from_the_cache(tmp_path):
+    fetch = CountingFetch()
+    first = cached_query("SELECT * FROM high_risk_areas;", fetch, str(tmp_path))
+    again = cached_query("SELECT *\n  FROM high_risk_areas", fetch, str(tmp_path))
+    assert fetch.calls == 1
+    pd.testing.assert_frame_equal(first, again)
+
+
+def test_results_are_cached_per_database(tmp_path, monkeypatch):
+    fetch = CountingFetch()
+    monkeypatch.setenv("DB_BACKEND", "mysql")
+    cached_query("SELECT * FROM high_risk_areas", fetch, str(tmp_path))
+
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "a.sqlite3"))
+    cached_query("SELECT * FROM high_risk_areas", fetch, str(tmp_path))
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "b.sqlite3"))
+    cached_query("SELECT * FROM high_risk_areas", fetch, str(tmp_path))
+    assert fetch.calls == 3
+
+    # Each database still hits its own entry
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "a.sqlite3"))
+    cached_query("SELECT * FROM high_risk_areas", fetch, str(tmp_path))
+    assert fetch.calls == 3
+
+
+def test_bumped_data_version_invalidates_results(tmp_path):
+    fetch = CountingFetch()
+    cached_query("SELECT 1", fetch, str(tmp_path))
+    old_path = cache_path("SELECT 1", data_version(str(tmp_path)), str(tmp_path))
+
+    bump_data_version(str(tmp_path))
+    cached_query("SELECT 1", fetch, str(tmp_path))
+    assert fetch.calls == 2
+    # The entry of the old version was evicted
+    assert not os.path.exists(old_path)
+
+
+def test_evict_removes_least_recently_used_entries(tmp_path):
+    fetch = CountingFetch(rows=1000)
+    for query in ("SELECT 1", "SELECT 2", "SELECT 3"):
+        cached_query(query, fetch, str(tmp_path))
+    version = data_version(str(tmp_path))
+    paths = {query: cache_path(query, version, str(tmp_path)) for query in ("SELECT 1", "SELECT 2", "SELECT 3")}
+
+    # Use SELECT 1 again so SELECT 2 becomes the least recently used entry
+    now = time.time()
+    for age, query in ((30, "SELECT 2"), (20, "SELECT 3"), (10, "SELECT 1")):
+        os.utime(paths[query], (now - age, now - age))
+    size = os.path.getsize(paths["SELECT 1"])
+    assert evict(str(tmp_path), max_bytes=2 * size + 100) == 1
+    assert not os.path.exists(paths["SELECT 2"])
+    assert os.path.exists(paths["SELECT 1"]) and os.path.exists(paths["SELECT 3"])
+
+
+def test_unreadable_entry_is_refetched(tmp_path):
+    fetch = CountingFetch()
+    path = cache_path("SELECT 1", data_version(str(tmp_path)), str(tmp_path))
+    os.makedirs(tmp_path, exist_ok=True)
+    with open(path, "wb") as handle:
+        handle.write(b"not parquet")
+    assert len(cached_query("SELECT 1", fetch, str(tmp_path))) == 3
+    assert fetch.calls == 1
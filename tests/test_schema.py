@@ -0,0 +1,103 @@
+import pandas as pd
+import pytest
+from scripts import load_source, load_staging
+from scripts.bulk_load import dataframe_to_rows
+from scripts.schema import (
+    CATEGORICAL_COLUMNS, COUNTER_COLUMNS, COUNTER_DTYPE, STAGING_COLUMNS, STAGING_TABLE_COLUMNS,
+    cast_integer_columns, dtypes_for
+)
+
+RAW_FILE = "data/input/raw_api_data.csv"
+CLEANED_FILE = "data/output/cleaned_api_data.csv"
+
+
+def capture_chunks(monkeypatch, module):
+    captured = []
+
+    def fake_load_chunks(chunks, table_name, columns, *args, **kwargs):
+        captured.extend(chunks)
+        return {"rows": sum(len(chunk) for chunk in captured), "rows_per_sec": 0.0}
+
+    monkeypatch.setattr(module, "load_chunks", fake_load_chunks)
+    return captured
+
+
+def test_compact_dtypes_shrink_rows():
+    """Categorical text and small counters at least halve the in-memory size of a row."""
+    inferred = pd.read_csv(RAW_FILE)
+    compact = cast_integer_columns(pd.read_csv(RAW_FILE, dtype=dtypes_for()))
+    assert compact.memory_usage(deep=True).sum() * 1.5 < inferred.memory_usage(deep=True).sum()
+    assert all(compact[column].dtype == "category" for column in CATEGORICAL_COLUMNS)
+    assert all(compact[column].dtype == COUNTER_DTYPE for column in COUNTER_COLUMNS)
+    assert (compact[COUNTER_COLUMNS].astype("int64") == inferred[COUNTER_COLUMNS]).all().all()
+
+
+def test_cast_integer_columns_keeps_nulls():
+    data = cast_integer_columns(pd.DataFrame({"number_of_persons_injured": [1.0, None], "borough": ["QUEENS", None]}))
+    assert data["number_of_persons_injured"].dtype == COUNTER_DTYPE
+    assert data["number_of_persons_injured"].isna().tolist() == [False, True]
+
+
+def test_loaders_read_with_schema_dtypes(monkeypatch):
+    """Source and staging chunks reach the bulk load engine with compact dtypes."""
+    source_chunks = capture_chunks(monkeypatch, load_source)
+    load_source.load_data_to_db(RAW_FILE, "source_collision_data")
+    assert source_chunks[0]["borough"].dtype == "category"
+    assert source_chunks[0]["number_of_persons_killed"].dtype == COUNTER_DTYPE
+
+    staging_chunks = capture_chunks(monkeypatch, load_staging)
+    load_staging.load_data_to_staging(CLEANED_FILE, "staging_collision_data")
+    assert list(staging_chunks[0].columns) == STAGING_TABLE_COLUMNS
+    assert staging_chunks[0]["zip_code"].dtype == "category"
+    assert staging_chunks[0]["grid_cell"].dtype == "Int64"
+
+
+def test_compact_rows_convert_to_native_values():
+    """Categorical and nullable integer values reach the driver as str/int/None."""
+    data = cast_integer_columns(pd.read_csv(CLEANED_FILE, dtype=dtypes_for(STAGING_COLUMNS)))
+    rows = dataframe_to_rows(data, STAGING_COLUMNS)
+    assert {type(value) for row in rows for value in row} <= {int, float, str, type(None)}
+
+
+def test_blank_collision_ids_do_not_fail_the_read(tmp_path, monkeypatch):
+    """A row without a collision_id is read as a null ID rather than failing the whole file."""
+    raw = pd.read_csv(RAW_FILE, dtype=str, nrows=20)
+    raw.loc[3, "collision_id"] = None
+    raw_file = tmp_path / "raw.csv"
+    raw.to_csv(raw_file, index=False)
+
+    source_chunks = capture_chunks(monkeypatch, load_source)
+    load_source.load_data_to_db(str(raw_file), "source_collision_data")
+    ids = source_chunks[0]["collision_id"]
+    assert ids.dtype == "Int64"
+    assert ids.isna().tolist() == [index == 3 for index in range(20)]
+    assert dataframe_to_rows(source_chunks[0], ["collision_id"])[3] == (None,)
+
+
+def test_integer_columns_are_only_cast_when_every_value_fits():
+    data = pd.DataFrame({
+        "collision_id": ["1", "abc", None],
+        "number_of_persons_injured": [1.0, 1.5, None],
+        "number_of_persons_killed": [0.0, None, 40000.0],
+        "number_of_pedestrians_injured": ["2", None, "3"],
+    })
+    with pytest.raises(ValueError, match=r"Column 'collision_id' has 1 values .* e.g. \['abc'\]"):
+        cast_integer_columns(data.copy())
+
+    lenient = cast_integer_columns(data.copy(), strict=False)
+    # Malformed columns keep their parsed values for validate.py to report
+    assert lenient["collision_id"].tolist() == ["1", "abc", None]
+    assert lenient["number_of_persons_injured"].dtype == "float64"
+    assert lenient["number_of_persons_killed"].dtype == "float64"
+    assert lenient["number_of_pedestrians_injured"].dtype == COUNTER_DTYPE
+
+
+def test_loaders_name_the_column_they_cannot_cast(tmp_path, monkeypatch):
+    raw = pd.read_csv(RAW_FILE, dtype=str, nrows=20)
+    raw.loc[3, "number_of_persons_injured"] = "x"
+    raw_file = tmp_path / "raw.csv"
+    raw.to_csv(raw_file, index=False)
+
+    capture_chunks(monkeypatch, load_source)
+    with pytest.raises(ValueError, match="Column 'number_of_persons_injured'"):
+        load_source.load_data_to_db(str(raw_file), "source_collision_data")
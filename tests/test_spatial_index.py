@@ -0,0 +1,119 @@
+import os
+import numpy as np
+import pandas as pd
+from scripts import spatial_index
+from scripts.geo import METERS_PER_DEGREE_LATITUDE, METERS_PER_DEGREE_LONGITUDE, project
+from scripts.spatial_index import build_index, get_index, query_bbox, query_nearest, query_radius, radius_totals
+
+TIMES_SQUARE = (40.7580, -73.9855)
+
+
+def make_points(rows=2000, seed=0):
+    """Collisions scattered over a 2 km square around Times Square, plus one outside the city."""
+    rng = np.random.default_rng(seed)
+    points = pd.DataFrame({
+        'collision_id': np.arange(1, rows + 1),
+        'crash_date': pd.Timestamp("2018-01-01") + pd.to_timedelta(rng.integers(0, 2500, rows), unit="D"),
+        'latitude': TIMES_SQUARE[0] + rng.uniform(-1000, 1000, rows) / METERS_PER_DEGREE_LATITUDE,
+        'longitude': TIMES_SQUARE[1] + rng.uniform(-1000, 1000, rows) / METERS_PER_DEGREE_LONGITUDE,
+        'number_of_persons_injured': rng.integers(0, 3, rows),
+        'number_of_persons_killed': (rng.random(rows) < 0.05).astype(int),
+    })
+    points.loc[0, ['latitude', 'longitude']] = 0.0
+    return points
+
+
+def brute_force_distances(points, latitude, longitude):
+    x, y, _ = project(points['latitude'], points['longitude'])
+    center_x, center_y, _ = project([latitude], [longitude])
+    return np.hypot(x - center_x[0], y - center_y[0])
+
+
+def test_radius_queries_match_a_full_scan():
+    points = make_points()
+    index = build_index(points)
+    assert len(index['collision_id']) == len(points) - 1
+
+    distances = brute_force_distances(points, *TIMES_SQUARE)
+    recent = (points['crash_date'] >= "2020-01-01").to_numpy()
+    expected = points[(distances <= 250) & recent]
+
+    matches = query_radius(index, *TIMES_SQUARE, 250, since="2020-01-01")
+    assert sorted(matches['collision_id']) == sorted(expected['collision_id'])
+    assert matches['distance_m'].is_monotonic_increasing
+    assert (matches['query'] == 0).all()
+
+    # A batch of points: the first is Times Square, the second matches nothing
+    totals = radius_totals(index, [TIMES_SQUARE[0], 40.60], [TIMES_SQUARE[1], -74.10], 250, since="2020-01-01")
+    assert totals.iloc[0].tolist() == [
+        len(expected), expected['number_of_persons_injured'].sum(), expected['number_of_persons_killed'].sum()
+    ]
+    assert totals.iloc[1].tolist() == [0, 0, 0]
+
+
+def test_nearest_applies_filters_before_ranking():
+    points = make_points()
+    index = build_index(points)
+    distances = brute_force_distances(points, *TIMES_SQUARE)
+
+    nearest = query_nearest(index, *TIMES_SQUARE, k=5)
+    assert nearest['collision_id'].tolist() == points['collision_id'].to_numpy()[np.argsort(distances)[:5]].tolist()
+
+    fatal = (points['number_of_persons_killed'] > 0).to_numpy()
+    nearest_fatal = query_nearest(index, *TIMES_SQUARE, k=3, min_killed=1)
+    fatal_order = np.argsort(np.where(fatal, distances, np.inf))[:3]
+    assert nearest_fatal['collision_id'].tolist() == points['collision_id'].to_numpy()[fatal_order].tolist()
+    assert np.allclose(nearest_fatal['distance_m'], distances[fatal_order])
+
+    assert query_nearest(index, *TIMES_SQUARE, k=5, max_meters=1e-3).empty
+
+
+def test_bbox_queries():
+    points = make_points()
+    index = build_index(points)
+    south, west, north, east = 40.755, -73.990, 40.760, -73.980
+    inside = (
+        points['latitude'].between(south, north) & points['longitude'].between(west, east)
+    )
+    matches = query_bbox(index, [south, 40.0], [west, -74.0], [north, 40.1], [east, -73.9], min_injured=1)
+    expected = points[inside & (points['number_of_persons_injured'] >= 1)]
+    assert sorted(matches['collision_id']) == sorted(expected['collision_id'])
+    assert set(matches['query']) == {0}
+
+
+def test_file_index_is_persisted_and_rebuilt_when_the_file_changes(tmp_path):
+    source = tmp_path / "cleaned.csv"
+    make_points(rows=100).to_csv(source, index=False)
+    index_path = str(tmp_path / "points.pkl")
+
+    index = get_index(str(source), path=index_path)
+    assert os.path.exists(index_path)
+    assert len(index['collision_id']) == 99
+    assert get_index(str(source), path=index_path)['version'] == index['version']
+
+    # The same index is reloaded until the source is rewritten
+    make_points(rows=50, seed=1).to_csv(source, index=False)
+    os.utime(source, (os.path.getatime(source), os.path.getmtime(source) + 10))
+    assert len(get_index(str(source), path=index_path)['collision_id']) == 49
+
+    # Parquet outputs are read with the same columns
+    make_points(rows=20).to_parquet(tmp_path / "cleaned.parquet")
+    assert len(get_index(str(tmp_path / "cleaned.parquet"))['collision_id']) == 19
+
+
+def test_entities_index_is_rebuilt_for_another_database(tmp_path, monkeypatch):
+    reads = []
+    monkeypatch.setattr(spatial_index, "read_points", lambda source: reads.append(source) or make_points(rows=10))
+    monkeypatch.setattr(spatial_index, "data_version", lambda: "v1")
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    index_path = str(tmp_path / "points.pkl")
+
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "first.sqlite3"))
+    get_index(path=index_path)
+    get_index(path=index_path)
+    assert len(reads) == 1
+
+    # Same data version, another database: the persisted index is not reused
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "second.sqlite3"))
+    get_index(path=index_path)
+    assert len(reads) == 2
@@ -0,0 +1,174 @@
+import sys
+import subprocess
+import pandas as pd
+import pytest
+from config import db_config
+from config.sqlite_backend import translate_statement
+from scripts import analysis, load_entities, migrate
+from scripts.aggregate import aggregate_dashboard
+from scripts.geo import top_hotspots
+from scripts.spatial_index import get_index, radius_totals
+from scripts.load_staging import load_data_to_staging
+from scripts.schema import STAGING_COLUMNS
+from scripts.summaries import SUMMARIES, summary_query
+
+
+@pytest.fixture
+def sqlite_database(tmp_path, monkeypatch):
+    """Point every stage at a fresh SQLite database file with the migrations applied."""
+    monkeypatch.setenv("DB_BACKEND", "sqlite")
+    monkeypatch.setenv("SQLITE_PATH", str(tmp_path / "collisions.sqlite3"))
+    monkeypatch.setattr(db_config, "_engines", {})
+    assert len(migrate.migrate()) == len(migrate.list_migrations())
+    return tmp_path
+
+
+def write_staging_csv(path, rows=30):
+    """Collisions on two streets of two boroughs, every third one without a crash time."""
+    data = pd.DataFrame({column: [None] * rows for column in STAGING_COLUMNS})
+    data["collision_id"] = range(1, rows + 1)
+    data["crash_date"] = [f"2024-0{1 + i % 2}-{1 + i % 28:02d}T00:00:00.000" for i in range(rows)]
+    data["crash_time"] = [None if i % 3 == 0 else f"{8 + i % 2}:15" for i in range(rows)]
+    data["borough"] = ["BRONX" if i % 2 else "QUEENS" for i in range(rows)]
+    data["on_street_name"] = "BROADWAY"
+    # Ten crashes at Times Square, the others spread a kilometre apart along a meridian
+    data["latitude"] = [40.7580 if i < 10 else 40.60 + i * 0.01 for i in range(rows)]
+    data["longitude"] = -73.9855
+    data["number_of_persons_injured"] = 1
+    data["number_of_persons_killed"] = 0
+    data["number_of_pedestrians_injured"] = 1
+    data["contributing_factor_vehicle_1"] = ["Unsafe Speed" if i % 3 else "Glare" for i in range(rows)]
+    data["vehicle_type_code1"] = "Sedan"
+    data.to_csv(path, index=False)
+    return path
+
+
+def test_translate_statement():
+    assert translate_statement("INSERT IGNORE INTO dim_borough (borough) VALUES (%s)") == [
+        "INSERT OR IGNORE INTO dim_borough (borough) VALUES (?)"
+    ]
+    assert translate_statement(
+        "INSERT INTO t (k, n) VALUES (%s, %s) ON DUPLICATE KEY UPDATE n = n + VALUES(n)"
+    ) == ["INSERT INTO t (k, n) VALUES (?, ?) ON CONFLICT DO UPDATE SET n = n + excluded.n"]
+    assert translate_statement("CREATE OR REPLACE VIEW v AS SELECT '%s' AS a") == [
+        "DROP VIEW IF EXISTS v", "CREATE VIEW v AS SELECT '%s' AS a"
+    ]
+    assert translate_statement(
+        "CREATE TABLE d (id SMALLINT UNSIGNED AUTO_INCREMENT PRIMARY KEY, "
+        "v VARCHAR(50) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL UNIQUE)"
+    ) == ["CREATE TABLE d (id INTEGER PRIMARY KEY, v VARCHAR(50) NOT NULL UNIQUE)"]
+    assert translate_statement("SELECT 1 FROM e WHERE e.zip_code<=>s.zip_code") == [
+        "SELECT 1 FROM e WHERE e.zip_code IS s.zip_code"
+    ]
+    assert translate_statement("ALTER TABLE e PARTITION BY RANGE (YEAR(crash_date)) (PARTITION p VALUES LESS THAN MAXVALUE)") == []
+
+
+def test_pipeline_runs_end_to_end_on_sqlite(sqlite_database):
+    csv_path = write_staging_csv(sqlite_database / "staging.csv")
+    assert load_data_to_staging(str(csv_path), "staging_collision_data", chunk_size=8)["rows"] == 30
+    assert load_entities.transfer_data_in_batches(batch_size=7) == 30
+    # Migrations were recorded, so a second run applies nothing
+    assert migrate.migrate() == []
+
+    high_risk = analysis.fetch_data(analysis.HIGH_RISK_AREAS_QUERY, use_cache=False)
+    assert dict(zip(high_risk["borough"], high_risk["total_collisions"])) == {"BRONX": 15, "QUEENS": 15}
+    hours = analysis.fetch_data(analysis.TIME_BASED_PATTERNS_QUERY, use_cache=False)
+    assert hours["total_collisions"].sum() == 20
+    monthly = analysis.fetch_data(analysis.MONTHLY_DASHBOARD_QUERY, use_cache=False)
+    assert monthly[["year", "month", "total_collisions"]].values.tolist() == [[2024, 1, 15], [2024, 2, 15]]
+
+    # The single-scan engine reads the entities table and agrees with the summary tables
+    frames = aggregate_dashboard()
+    assert frames["time_based_patterns"]["total_collisions"].sum() == 20
+    factors = analysis.fetch_data(analysis.CONTRIBUTING_FACTORS_QUERY, use_cache=False)
+    assert factors.values.tolist() == frames["contributing_factors"].values.tolist()
+
+    # The staging load computed the grid cells, which the entities transfer carried over
+    connection = db_config.get_db_connection()
+    try:
+        hotspot = top_hotspots(connection, k=1)
+    finally:
+        connection.close()
+    assert hotspot["total"].tolist() == [10]
+    assert abs(hotspot["latitude"][0] - 40.7580) < 0.002
+
+    # The spatial index reads the same coordinates from the entities table
+    index = get_index(path=str(sqlite_database / "points.pkl"))
+    assert radius_totals(index, 40.7580, -73.9855, 100)["collisions"].tolist() == [10]
+
+    # Unchanged rows are not transferred again; a corrected one replaces its entity row
+    assert load_entities.transfer_data_in_batches(batch_size=7) == 0
+    connection = db_config.get_db_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("UPDATE staging_collision_data SET borough = %s, number_of_persons_injured = %s "
+                       "WHERE collision_id = %s", ("QUEENS", 5, 2))
+        connection.commit()
+    finally:
+        connection.close()
+    assert load_entities.transfer_data_in_batches(batch_size=7) == 1
+    high_risk = analysis.query_database("SELECT borough, total_collisions, total_injuries FROM high_risk_areas")
+    assert high_risk.values.tolist() == [["QUEENS", 16, 20], ["BRONX", 14, 14]]
+    # The summaries moved by the difference, exactly as a rebuild from the entities table
+    for table_name in SUMMARIES:
+        kept = analysis.query_database(f"SELECT * FROM {table_name}")
+        rebuilt = analysis.query_database(summary_query(table_name))
+        assert sorted(kept.astype(str).values.tolist()) == sorted(rebuilt.astype(str).values.tolist())
+
+
+def test_single_statement_transfer_on_sqlite(sqlite_database):
+    csv_path = write_staging_csv(sqlite_database / "staging.csv")
+    load_data_to_staging(str(csv_path), "staging_collision_data")
+    load_entities.transfer_data_to_entities_table()
+
+    details = analysis.query_database("SELECT borough, vehicle_type_code1 FROM collision_details")
+    assert len(details) == 30
+
+    # A collision re-sent with a corrected crash_date and injury count replaces its first version
+    connection = db_config.get_db_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("UPDATE staging_collision_data SET crash_date = %s, number_of_persons_injured = %s "
+                       "WHERE collision_id = %s", ("2023-06-01", 4, 1))
+        connection.commit()
+    finally:
+        connection.close()
+    load_entities.transfer_data_to_entities_table()
+    corrected = analysis.query_database("SELECT crash_date, number_of_persons_injured FROM entities_collision_data "
+                                        "WHERE collision_id = 1")
+    assert corrected.values.tolist() == [[pd.Timestamp("2023-06-01"), 4]]
+    assert len(analysis.query_database("SELECT collision_id FROM entities_collision_data")) == 30
+    assert set(details["borough"]) == {"BRONX", "QUEENS"}
+    severity = analysis.fetch_data(analysis.COLLISION_SEVERITY_TRENDS_QUERY, use_cache=False)
+    assert severity["total_injuries"].sum() == 33
+    assert severity["collision_date"].astype(str).tolist()[0] == "2023-06-01"
+
+    # The rollups were rebuilt after the single statement: every week is keyed by its Monday
+    weekly = analysis.query_database("SELECT week_start, total_collisions FROM weekly_collision_trends")
+    assert weekly["total_collisions"].sum() == 30
+    assert {pd.Timestamp(week).weekday() for week in weekly["week_start"]} == {0}
+    monthly = analysis.fetch_data(analysis.MONTHLY_DASHBOARD_QUERY, use_cache=False)
+    assert monthly["total_collisions"].tolist() == [1, 14, 15]
+
+
+def test_parallel_loads_are_rejected_on_sqlite(sqlite_database):
+    csv_path = write_staging_csv(sqlite_database / "staging.csv")
+    with pytest.raises(ValueError):
+        load_data_to_staging(str(csv_path), "staging_collision_data", workers=2)
+
+
+def test_sqlite_types_are_registered_only_by_the_sqlite_backend():
+    # Checked in a fresh interpreter: this one already opened SQLite connections
+    script = (
+        "import os, sys, sqlite3, decimal\n"
+        "from config import db_config\n"
+        "registered = lambda: (decimal.Decimal, sqlite3.PrepareProtocol) in sqlite3.adapters\n"
+        "print('config.sqlite_backend' in sys.modules, registered())\n"
+        "os.environ.update(DB_BACKEND='sqlite', SQLITE_PATH=':memory:')\n"
+        "connection = db_config.get_db_connection()\n"
+        "cursor = connection.cursor()\n"
+        "cursor.execute('SELECT %s', (decimal.Decimal('40.123456789012345678'),))\n"
+        "print(registered(), cursor.fetchone()[0])\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    assert result.stdout.split() == ["False", "False", "True", "40.123456789012345678"]
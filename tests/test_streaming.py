@@ -0,0 +1,27 @@
+import pandas as pd
+from scripts.streaming import chunk_size_for_memory, estimate_row_bytes, iter_csv_chunks
+
+RAW_FILE = "data/input/raw_api_data.csv"
+
+
+def test_iter_csv_chunks_whole_file_by_default():
+    """Without a chunk size or memory ceiling the file is one chunk."""
+    chunks = list(iter_csv_chunks(RAW_FILE))
+    assert len(chunks) == 1
+    assert len(chunks[0]) == len(pd.read_csv(RAW_FILE))
+
+
+def test_iter_csv_chunks_fixed_size():
+    """Chunks have the requested size and together cover every row once."""
+    chunks = list(iter_csv_chunks(RAW_FILE, chunk_size=120, usecols=["collision_id"]))
+    assert [len(chunk) for chunk in chunks] == [120, 120, 120, 120, 20]
+    assert pd.concat(chunks)["collision_id"].is_unique
+
+
+def test_memory_limit_bounds_chunk_size():
+    """The derived chunk size keeps the estimated working set under the ceiling."""
+    row_bytes = estimate_row_bytes(RAW_FILE)
+    chunk_size = chunk_size_for_memory(RAW_FILE, memory_limit_mb=0.5)
+    assert chunk_size * row_bytes <= 0.5 * 1024 * 1024
+    chunks = list(iter_csv_chunks(RAW_FILE, chunk_size=10_000, memory_limit_mb=0.5))
+    assert max(len(chunk) for chunk in chunks) == chunk_size
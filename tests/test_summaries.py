@@ -0,0 +1,102 @@
+import datetime
+import pandas as pd
+from scripts.summaries import SUMMARIES, build_increment_query, net_deltas, summary_deltas, summary_query
+
+
+def entity_rows():
+    """Four entity rows as fetched from MySQL: DATETIME dates, TIME as timedelta, nullable keys."""
+    return pd.DataFrame({
+        "collision_id": [1, 2, 3, 4],
+        "crash_date": [datetime.datetime(2024, 1, 1), datetime.datetime(2024, 1, 1),
+                       datetime.datetime(2024, 1, 2), datetime.datetime(2024, 1, 2)],
+        "crash_time": [datetime.timedelta(hours=8, minutes=5), None,
+                       datetime.timedelta(hours=8, minutes=50), datetime.timedelta(hours=17)],
+        "borough_id": [1, 1, None, 2],
+        "on_street_name": ["BROADWAY", "BROADWAY", None, "BROADWAY"],
+        "number_of_persons_injured": [1, 2, None, 0],
+        "number_of_persons_killed": [0, 0, 1, 0],
+        "number_of_pedestrians_injured": [1, 0, 0, 0],
+        "number_of_pedestrians_killed": [0, 0, 0, 0],
+        "number_of_cyclist_injured": [0, 1, 0, 0],
+        "number_of_cyclist_killed": [0, 0, 0, 0],
+        "contributing_factor_vehicle_1_id": [3, None, 3, 4],
+    })
+
+
+def as_dict(delta, keys):
+    return {tuple(row[key] for key in keys): row.drop(keys).tolist() for _, row in delta.iterrows()}
+
+
+def test_summary_deltas_match_the_view_aggregations():
+    deltas = summary_deltas(entity_rows())
+    # Missing boroughs and streets become key 0 and ''; null counters count as 0
+    assert as_dict(deltas["high_risk_areas_summary"], ["borough_id", "on_street_name"]) == {
+        (1, "BROADWAY"): [2, 3, 0], (0, ""): [1, 0, 1], (2, "BROADWAY"): [1, 0, 0],
+    }
+    assert as_dict(deltas["collision_severity_summary"], ["collision_date"]) == {
+        (datetime.date(2024, 1, 1),): [2, 3, 0], (datetime.date(2024, 1, 2),): [2, 0, 1],
+    }
+    # Rows without a crash time or a contributing factor are left out, like in the views
+    assert as_dict(deltas["time_patterns_summary"], ["hour_of_day"]) == {(8,): [2, 1, 1], (17,): [1, 0, 0]}
+    assert as_dict(deltas["contributing_factors_summary"], ["contributing_factor_id"]) == {
+        (3,): [2, 1, 1], (4,): [1, 0, 0],
+    }
+    assert as_dict(deltas["cyclist_pedestrian_summary"], ["borough_id"])[(1,)] == [1, 0, 1, 0]
+    # 2024-01-01 is a Monday, so both days fall in the week keyed by it
+    monday = datetime.date(2024, 1, 1)
+    assert as_dict(deltas["weekly_trends_summary"], ["borough_id", "week_start"]) == {
+        (1, monday): [2, 3, 0], (0, monday): [1, 0, 1], (2, monday): [1, 0, 0],
+    }
+    assert as_dict(deltas["monthly_trends_summary"], ["borough_id", "month_start"])[(1, monday)] == [2, 3, 0]
+
+
+def test_batch_deltas_add_up_to_the_full_aggregate():
+    rows = entity_rows()
+    full = summary_deltas(rows)
+    first, second = summary_deltas(rows.iloc[:2]), summary_deltas(rows.iloc[2:])
+    for table_name, spec in SUMMARIES.items():
+        combined = pd.concat([first[table_name], second[table_name]]).groupby(spec["keys"]).sum()
+        assert combined.sort_index().equals(full[table_name].groupby(spec["keys"]).sum().sort_index())
+
+
+def test_net_deltas_move_a_corrected_collision_between_groups():
+    old = entity_rows().iloc[[0]]
+    # Collision 1 was corrected: it happened in borough 2 and injured three persons
+    new = old.assign(borough_id=[2], number_of_persons_injured=[3])
+    deltas = net_deltas(summary_deltas(new), summary_deltas(old))
+    assert as_dict(deltas["high_risk_areas_summary"], ["borough_id", "on_street_name"]) == {
+        (2, "BROADWAY"): [1, 3, 0], (1, "BROADWAY"): [-1, -1, 0],
+    }
+    assert as_dict(deltas["collision_severity_summary"], ["collision_date"]) == {
+        (datetime.date(2024, 1, 1),): [0, 2, 0],
+    }
+    # Groups whose totals did not change are not sent at all
+    moved = net_deltas(summary_deltas(old.assign(borough_id=[2])), summary_deltas(old))
+    assert moved["collision_severity_summary"].empty
+    assert len(moved["high_risk_areas_summary"]) == 2
+
+
+def test_summary_queries():
+    assert build_increment_query("time_patterns_summary") == (
+        "INSERT INTO time_patterns_summary (hour_of_day, total_collisions, total_injuries, total_fatalities) "
+        "VALUES (%s, %s, %s, %s) ON DUPLICATE KEY UPDATE total_collisions = total_collisions + "
+        "VALUES(total_collisions), total_injuries = total_injuries + VALUES(total_injuries), "
+        "total_fatalities = total_fatalities + VALUES(total_fatalities)"
+    )
+    query = summary_query("time_patterns_summary")
+    assert "WHERE crash_time IS NOT NULL" in query
+    assert query.endswith("GROUP BY HOUR(crash_time)")
+    assert summary_query("monthly_trends_summary").endswith(
+        "GROUP BY COALESCE(borough_id, 0), SUBDATE(DATE(crash_date), DAYOFMONTH(crash_date) - 1)"
+    )
+
+
+def test_week_and_month_keys_of_later_days():
+    rows = entity_rows().assign(crash_date=pd.to_datetime(["2024-02-29 23:10", "2024-03-03 00:00", "2024-03-04 07:30", "2024-12-31 12:00"]))
+    deltas = summary_deltas(rows)
+    assert sorted(set(deltas["weekly_trends_summary"]["week_start"])) == [
+        datetime.date(2024, 2, 26), datetime.date(2024, 3, 4), datetime.date(2024, 12, 30)
+    ]
+    assert sorted(set(deltas["monthly_trends_summary"]["month_start"])) == [
+        datetime.date(2024, 2, 1), datetime.date(2024, 3, 1), datetime.date(2024, 12, 1)
+    ]
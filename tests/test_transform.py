@@ -0,0 +1,46 @@
+import io
+import pandas as pd
+from scripts.schema import STAGING_COLUMNS, dtypes_for
+from scripts.transform import clean_chunks, clean_data, normalize_text
+
+RAW_FILE = "data/input/raw_api_data.csv"
+CLEANED_FILE = "data/output/cleaned_api_data.csv"
+
+
+def test_normalize_text_collapses_whitespace_without_stringifying_nulls():
+    values = pd.Series(["  QUEENS ", "QUEENS", "WEST  34\tSTREET", None, "   ", float("nan")])
+    assert normalize_text(values).tolist() == ["QUEENS", "QUEENS", "WEST 34 STREET", None, None, None]
+
+
+def test_normalize_text_keeps_categoricals_and_merges_categories():
+    values = pd.Series(["BRONX ", "BRONX", None], dtype="category")
+    normalized = normalize_text(values)
+    assert normalized.dtype == "category"
+    assert list(normalized.cat.categories) == ["BRONX"]
+    assert normalized.isna().tolist() == [False, False, True]
+
+
+def test_clean_data_matches_committed_output():
+    """The engine reproduces data/output/cleaned_api_data.csv from the raw file."""
+    cleaned = clean_data(pd.read_csv(RAW_FILE, dtype=dtypes_for()))
+    expected = pd.read_csv(CLEANED_FILE)
+    assert list(cleaned.columns) == STAGING_COLUMNS
+    round_trip = pd.read_csv(io.StringIO(cleaned.to_csv(index=False)))
+    pd.testing.assert_frame_equal(round_trip, expected)
+
+
+def test_clean_data_accepts_partial_frames_and_leaves_input_untouched():
+    raw = pd.DataFrame({"collision_id": [1, 1, 2], "crash_date": ["2024-01-01"] * 3,
+                        "borough": [" Brooklyn", "Brooklyn", None]})
+    cleaned = clean_data(raw)
+    assert cleaned["collision_id"].tolist() == [1, 2]
+    assert cleaned["borough"].tolist() == ["Brooklyn", None]
+    assert raw["borough"].tolist() == [" Brooklyn", "Brooklyn", None]
+
+
+def test_clean_chunks_deduplicates_across_chunks():
+    raw = pd.read_csv(RAW_FILE, dtype=dtypes_for())
+    chunks = list(clean_chunks([raw.iloc[:300], raw.iloc[200:]]))
+    combined = pd.concat(chunks)
+    assert combined["collision_id"].is_unique
+    assert len(combined) == len(clean_data(raw))
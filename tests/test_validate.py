@@ -0,0 +1,84 @@
+import pandas as pd
+from scripts.validate import MAX_SAMPLE_OFFSETS, validate_data, validate_file
+
+
+def write_dirty_csv(tmp_path, rows=250):
+    """Write a CSV with known violations spread over several chunks."""
+    data = pd.DataFrame({
+        "collision_id": range(rows),
+        "crash_date": ["2024-01-01T00:00:00.000"] * rows,
+        "vehicle_type_code1": ["Sedan"] * rows,
+        "number_of_persons_injured": [0] * rows,
+        "number_of_persons_killed": [0] * rows,
+    })
+    data.loc[[3, 120, 240], "vehicle_type_code1"] = None
+    data.loc[[7, 130], "number_of_persons_injured"] = -1
+    data.loc[[50], "crash_date"] = "not a date"
+    data.loc[range(100, 115), "number_of_persons_killed"] = -2
+    file_path = tmp_path / "dirty.csv"
+    data.to_csv(file_path, index=False)
+    return str(file_path)
+
+
+def test_validate_file_reports_every_rule_in_one_pass(tmp_path):
+    report = validate_file(write_dirty_csv(tmp_path), chunk_size=40)
+    assert report["rows"] == 250
+    assert not report["valid"]
+    violations = report["violations"]
+    assert violations["null_vehicle_type_code1"] == {"count": 3, "sample_offsets": [3, 120, 240]}
+    assert violations["negative_number_of_persons_injured"] == {"count": 2, "sample_offsets": [7, 130]}
+    assert violations["invalid_crash_date"] == {"count": 1, "sample_offsets": [50]}
+    assert violations["negative_number_of_persons_killed"]["count"] == 15
+    assert violations["negative_number_of_persons_killed"]["sample_offsets"] == list(range(100, 100 + MAX_SAMPLE_OFFSETS))
+    assert "null_crash_date" not in violations
+
+
+def test_validate_file_reports_blank_collision_ids(tmp_path, capsys):
+    file_path = write_dirty_csv(tmp_path)
+    data = pd.read_csv(file_path, dtype=str)
+    data.loc[[5, 200], "collision_id"] = None
+    data.to_csv(file_path, index=False)
+
+    report = validate_file(file_path, chunk_size=40)
+    assert report["violations"]["null_collision_id"] == {"count": 2, "sample_offsets": [5, 200]}
+    assert validate_data(file_path, chunk_size=40) is False
+    assert "Validation failed: null_collision_id - 2 of 250 rows" in capsys.readouterr().out
+
+
+def test_validate_file_reports_malformed_ids_and_counters(tmp_path):
+    file_path = write_dirty_csv(tmp_path)
+    data = pd.read_csv(file_path, dtype=str)
+    data.loc[[9], "collision_id"] = "abc"
+    data.loc[[20], "number_of_persons_injured"] = "1.5"
+    data.loc[[30, 210], "number_of_persons_injured"] = "x"
+    data.to_csv(file_path, index=False)
+
+    report = validate_file(file_path, chunk_size=40)
+    assert not report["valid"]
+    violations = report["violations"]
+    assert violations["non_integer_collision_id"] == {"count": 1, "sample_offsets": [9]}
+    assert violations["non_integer_number_of_persons_injured"] == {"count": 3, "sample_offsets": [20, 30, 210]}
+    # The other rules still ran over every chunk
+    assert violations["negative_number_of_persons_injured"] == {"count": 2, "sample_offsets": [7, 130]}
+    assert violations["null_vehicle_type_code1"]["count"] == 3
+
+
+def test_parallel_validation_matches_sequential(tmp_path):
+    file_path = write_dirty_csv(tmp_path)
+    assert validate_file(file_path, chunk_size=30, workers=2) == validate_file(file_path, chunk_size=30)
+
+
+def test_validate_file_reports_missing_file_and_columns(tmp_path):
+    assert validate_file(str(tmp_path / "absent.csv"))["missing_file"]
+
+    file_path = tmp_path / "partial.csv"
+    pd.DataFrame({"collision_id": [1], "crash_date": ["2024-01-01"]}).to_csv(file_path, index=False)
+    report = validate_file(str(file_path))
+    assert report["missing_columns"] == ["vehicle_type_code1", "number_of_persons_injured", "number_of_persons_killed"]
+    assert not report["valid"] and not report["violations"]
+
+
+def test_validate_data_prints_all_failures(tmp_path, capsys):
+    assert validate_data(write_dirty_csv(tmp_path), chunk_size=40) is False
+    output = capsys.readouterr().out
+    assert output.count("Validation failed") == 4
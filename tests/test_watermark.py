@@ -0,0 +1,74 @@
+import pandas as pd
+from scripts import load_runner
+from scripts.bulk_load import build_insert_query
+from scripts.watermark import advance_watermark, filter_new_rows
+
+CHUNK = pd.DataFrame({
+    "collision_id": [100, 101, 90, 102],
+    "crash_date": ["2024-01-10T00:00:00.000", "2024-01-02T00:00:00.000",
+                   "2024-01-09T00:00:00.000", None],
+})
+
+
+class WatermarkConnection:
+    """Connection stand-in that stores one watermark row and the upserted rows."""
+
+    def __init__(self, state):
+        self.state = state
+
+    def cursor(self, **kwargs):
+        return self
+
+    def execute(self, query, params=None):
+        if query.lstrip().startswith("SELECT"):
+            self.result = self.state.get("watermark")
+        else:
+            self.state["watermark"] = params[1:]
+
+    def fetchone(self):
+        return self.result
+
+    def executemany(self, query, rows):
+        self.state.setdefault("queries", []).append(query)
+        self.state.setdefault("rows", []).extend(rows)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_filter_new_rows_keeps_new_ids_and_lookback_window():
+    watermark = {"last_crash_date": pd.Timestamp("2024-01-10"), "last_collision_id": 100}
+    kept = filter_new_rows(CHUNK, watermark, lookback_days=3)
+    # 101 and 102 are new ids; 100 and 90 fall inside the 3-day correction window
+    assert kept["collision_id"].tolist() == [100, 101, 90, 102]
+    kept = filter_new_rows(CHUNK, watermark, lookback_days=0)
+    assert kept["collision_id"].tolist() == [100, 101, 102]
+
+
+def test_filter_new_rows_without_watermark_keeps_everything():
+    assert filter_new_rows(CHUNK, None).equals(CHUNK)
+
+
+def test_advance_watermark_takes_maximum():
+    watermark = advance_watermark(None, CHUNK)
+    assert watermark == {"last_crash_date": pd.Timestamp("2024-01-10"), "last_collision_id": 102}
+    assert advance_watermark(watermark, CHUNK.iloc[:0]) == watermark
+
+
+def test_build_insert_query_upsert():
+    query = build_insert_query("source_collision_data", ["collision_id", "borough"], upsert=True)
+    assert query.endswith("ON DUPLICATE KEY UPDATE collision_id = VALUES(collision_id), borough = VALUES(borough)")
+
+
+def test_incremental_load_upserts_delta_and_advances_watermark(monkeypatch):
+    state = {"watermark": (pd.Timestamp("2024-01-10").to_pydatetime(), 100)}
+    monkeypatch.setattr(load_runner, "get_db_connection", lambda **kwargs: WatermarkConnection(state))
+
+    stats = load_runner.load_chunks([CHUNK], "source_collision_data", list(CHUNK.columns),
+                                    incremental=True, lookback_days=0)
+    assert stats["rows"] == 3
+    assert "ON DUPLICATE KEY UPDATE" in state["queries"][0]
+    assert state["watermark"][1] == 102